@@ -1,9 +1,15 @@
 import argparse
+import atexit
 import logging
+from pathlib import Path
+from typing import TYPE_CHECKING
 
-from .server import language_server
+from .profiling import DEFAULT_INTERVAL
+from .replay.session import SessionRecorder
+from .utils import get_cache_dir
 
-logging.basicConfig(filename="galaxy-language-server.log", level=logging.DEBUG, filemode="w")
+if TYPE_CHECKING:
+    from .server import GalaxyToolsLanguageServer
 
 
 def add_arguments(parser: argparse.ArgumentParser) -> None:
@@ -13,12 +19,50 @@ def add_arguments(parser: argparse.ArgumentParser) -> None:
     parser.add_argument("--ws", action="store_true", help="Use WebSocket server")
     parser.add_argument("--host", default="127.0.0.1", help="Bind to this address")
     parser.add_argument("--port", type=int, default=2087, help="Bind to this port")
+    parser.add_argument(
+        "--log-stats-interval",
+        type=float,
+        default=0,
+        help="Dump the latency statistics to the log every this number of seconds, 0 to disable it",
+    )
+    parser.add_argument(
+        "--record",
+        metavar="FILE",
+        help="Record the messages exchanged with the client to this file, to replay them later with galaxyls-replay",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="FILE",
+        help="Sample the stacks of the server until it exits and write them to this file in the collapsed flamegraph format",
+    )
+    parser.add_argument(
+        "--profile-interval",
+        type=float,
+        default=DEFAULT_INTERVAL,
+        help="Seconds between the samples of the profiler",
+    )
 
 
 def main():
     parser = argparse.ArgumentParser()
     add_arguments(parser)
     args = parser.parse_args()
+    # The server is only imported here, since the indexing worker processes can import this
+    # module again when they start and they do not need it
+    from .server import language_server
+
+    logging.basicConfig(filename="galaxy-language-server.log", level=logging.DEBUG, filemode="w")
+    language_server.storage_dir = get_cache_dir()
+    language_server.stats_log_interval = args.log_stats_interval
+    if args.record:
+        recorder = SessionRecorder(open(args.record, "w", encoding="utf-8"))
+        recorder.attach(language_server.protocol)
+        atexit.register(recorder.close)
+    language_server.profiler.interval = args.profile_interval
+    if args.profile:
+        language_server.profile_path = Path(args.profile)
+        language_server.profiler.start()
+        atexit.register(_write_profile, language_server)
 
     if args.tcp:
         language_server.start_tcp(args.host, args.port)
@@ -28,5 +72,11 @@ def main():
         language_server.start_io()
 
 
+def _write_profile(language_server: "GalaxyToolsLanguageServer") -> None:
+    # The profiling may have been stopped with the command already
+    if language_server.profiler.is_running:
+        language_server.stop_profiling()
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,114 @@
+"""Headless benchmark of the Galaxy tools language server.
+
+Drives the language service directly, without a client, over a corpus of synthetic
+tool wrappers and prints the durations of every operation as JSON. The results of
+the synthetic wrappers are reported under the `synthetic/` path.
+The results of two runs, usually of different commits, can be compared with
+`--compare` to detect performance regressions.
+
+Usage:
+    galaxyls-bench [--repeat N] [--output FILE] [--compare BASELINE] [--corpus DIR ...]
+"""
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+from pathlib import Path
+
+import attrs
+
+from galaxyls.services.language import GalaxyToolLanguageService
+from galaxyls.version import GLS_VERSION
+
+from .corpus import (
+    SYNTHETIC_WRAPPERS_DIR,
+    CorpusOptions,
+    build_conditional_depths_corpus,
+    build_corpus,
+    load_wrappers,
+)
+from .runner import (
+    BenchmarkResult,
+    ToolBenchmark,
+    compare_results,
+    get_depth_scaling,
+    get_regressions,
+)
+
+
+def main() -> None:
+    defaults = CorpusOptions()
+    parser = argparse.ArgumentParser(description="Benchmarks the Galaxy tools language server operations.")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of measured runs of every operation.")
+    parser.add_argument("--output", type=Path, help="Write the JSON results to this file instead of the standard output.")
+    parser.add_argument("--compare", type=Path, help="JSON results of a previous run to compare with.")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed relative slowdown when comparing.")
+    parser.add_argument("--min-duration", type=float, default=0.1, help="Ignore operations faster than these milliseconds.")
+    parser.add_argument("--corpus", type=Path, action="append", default=[], help="Additional directory of tool wrappers.")
+    parser.add_argument(
+        "--no-synthetic-wrappers", action="store_true", help="Do not include the hand-written synthetic wrappers."
+    )
+    parser.add_argument("--params", type=int, default=defaults.params, help="Params of the synthetic tool.")
+    parser.add_argument("--depth", type=int, default=defaults.conditional_depth, help="Depth of nested conditionals.")
+    parser.add_argument(
+        "--max-depth",
+        type=int,
+        default=defaults.max_conditional_depth,
+        help="Maximum depth of nested conditionals of the diagnostics scaling measurements, 0 to skip them.",
+    )
+    parser.add_argument("--command-lines", type=int, default=defaults.command_lines, help="Lines of the command.")
+    parser.add_argument("--macro-files", type=int, default=defaults.macro_files, help="Imported macro files.")
+    args = parser.parse_args()
+
+    options = CorpusOptions(
+        params=args.params,
+        conditional_depth=args.depth,
+        max_conditional_depth=args.max_depth,
+        command_lines=args.command_lines,
+        macro_files=args.macro_files,
+    )
+    corpus = build_corpus(options, None if args.no_synthetic_wrappers else SYNTHETIC_WRAPPERS_DIR)
+    for corpus_dir in args.corpus:
+        corpus.extend(load_wrappers(corpus_dir))
+
+    benchmark = ToolBenchmark(GalaxyToolLanguageService(storage_dir=None), repeat=args.repeat)
+    with tempfile.TemporaryDirectory(prefix="galaxyls-bench-") as root:
+        results = benchmark.run(corpus, Path(root))
+        depth_results = benchmark.run_conditional_depths(
+            build_conditional_depths_corpus(options.max_conditional_depth), Path(root)
+        )
+    results.extend(depth_results)
+
+    report = {
+        "version": GLS_VERSION,
+        "python": platform.python_version(),
+        "repeat": args.repeat,
+        "corpus": attrs.asdict(options),
+        "results": [attrs.asdict(result) for result in results],
+        "diagnostics_by_conditional_depth": [attrs.asdict(scaling) for scaling in get_depth_scaling(depth_results)],
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(output + "\n", encoding="utf-8")
+    else:
+        print(output)
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        comparisons = compare_results([BenchmarkResult(**result) for result in baseline["results"]], results)
+        regressions = get_regressions(comparisons, args.threshold, args.min_duration)
+        for comparison in comparisons:
+            marker = " <- regression" if comparison in regressions else ""
+            print(
+                f"{comparison.document:<40} {comparison.operation:<22} {comparison.baseline:>10.3f} ms"
+                f" -> {comparison.current:>10.3f} ms ({comparison.ratio:.2f}x){marker}",
+                file=sys.stderr,
+            )
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""Corpus of Galaxy tool wrappers used by the benchmarks.
+
+The corpus is made of synthetic wrappers only. Some are generated to stress a single
+dimension of the server each (number of params, nesting of conditionals, size of the
+command and number of imported macro files). The others, in the `synthetic_wrappers`
+directory next to this module, are written by hand after the structure of common
+tools-iuc wrappers (BWA-MEM, featureCounts and samtools sort) with their macro files,
+tokens, sections and conditionals, but they are not copies of the real wrappers.
+"""
+
+import re
+from pathlib import Path
+
+import attrs
+
+SYNTHETIC_WRAPPERS_DIR = Path(__file__).parent / "synthetic_wrappers"
+SYNTHETIC_WRAPPERS_PREFIX = "synthetic/wrappers/"
+TOOL_ROOT_PATTERN = re.compile(r"\s*(<\?xml[^>]*\?>\s*)?(<!--.*?-->\s*)*<tool\b", re.DOTALL)
+
+PARAM_TYPES = (
+    '<param name="{name}" type="integer" value="{index}" min="0" label="Integer {index}" help="Help of integer {index}"/>',
+    '<param name="{name}" type="float" value="0.5" label="Float {index}"/>',
+    '<param name="{name}" type="text" value="text_{index}" label="Text {index}"/>',
+    '<param name="{name}" type="boolean" truevalue="--flag-{index}" falsevalue="" checked="false" label="Flag {index}"/>',
+    '<param name="{name}" type="data" format="tabular,txt" label="Data {index}"/>',
+    """<param name="{name}" type="select" label="Select {index}">
+            <option value="a" selected="true">Option A</option>
+            <option value="b">Option B</option>
+            <option value="c">Option C</option>
+        </param>""",
+)
+
+
+@attrs.define
+class CorpusOptions:
+    """The size of the synthetic wrappers of the corpus.
+
+    All the operations are measured on a tool nested to `conditional_depth`, close to the
+    deepest nesting found in real wrappers, and the diagnostics alone on tools nested from
+    1 to `max_conditional_depth` to report how their time changes with every level."""
+
+    params: int = 300
+    conditional_depth: int = 6
+    max_conditional_depth: int = 8
+    command_lines: int = 3000
+    macro_files: int = 30
+
+
+@attrs.define
+class CorpusFile:
+    """A file of the corpus with its path relative to the root of the benchmark workspace."""
+
+    path: str
+    source: str
+
+    @property
+    def is_tool(self) -> bool:
+        return TOOL_ROOT_PATTERN.match(self.source) is not None
+
+
+def build_corpus(options: CorpusOptions, wrappers_dir: Path | None = SYNTHETIC_WRAPPERS_DIR) -> list[CorpusFile]:
+    """Gets the generated wrappers and, unless `wrappers_dir` is None, the hand-written synthetic wrappers."""
+    corpus = build_synthetic_corpus(options)
+    if wrappers_dir is not None:
+        corpus.extend(load_wrappers(wrappers_dir, SYNTHETIC_WRAPPERS_PREFIX))
+    return corpus
+
+
+def build_synthetic_corpus(options: CorpusOptions) -> list[CorpusFile]:
+    """Generates one tool wrapper for each dimension of the given options, with the macro files they import."""
+    macro_files = [
+        CorpusFile(f"synthetic/macros/macros_{index}.xml", build_macros_file(index)) for index in range(options.macro_files)
+    ]
+    return [
+        CorpusFile("synthetic/params.xml", build_params_tool(options.params)),
+        CorpusFile("synthetic/conditionals.xml", build_conditionals_tool(options.conditional_depth)),
+        CorpusFile("synthetic/command.xml", build_command_tool(options.command_lines)),
+        CorpusFile("synthetic/macros.xml", build_macros_tool(options.macro_files)),
+        *macro_files,
+    ]
+
+
+def build_conditional_depths_corpus(max_depth: int) -> list[CorpusFile]:
+    """Generates one tool wrapper with nested conditionals for every depth from 1 to `max_depth`."""
+    return [
+        CorpusFile(f"synthetic/depths/conditionals_{depth}.xml", build_conditionals_tool(depth))
+        for depth in range(1, max_depth + 1)
+    ]
+
+
+def load_wrappers(wrappers_dir: Path, prefix: str = "") -> list[CorpusFile]:
+    """Loads all the XML files inside the given directory, with the prefix added to their relative paths."""
+    return [
+        CorpusFile(prefix + path.relative_to(wrappers_dir).as_posix(), path.read_text(encoding="utf-8"))
+        for path in sorted(wrappers_dir.rglob("*.xml"))
+    ]
+
+
+def write_corpus(corpus: list[CorpusFile], root: Path) -> None:
+    """Writes the files of the corpus inside the given directory."""
+    for corpus_file in corpus:
+        path = root / corpus_file.path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(corpus_file.source, encoding="utf-8")
+
+
+def build_params_tool(num_params: int) -> str:
+    """Generates a tool with the given number of params of all types."""
+    params = "\n        ".join(
+        PARAM_TYPES[index % len(PARAM_TYPES)].format(name=f"param_{index}", index=index) for index in range(num_params)
+    )
+    command = "\n".join(f"    --param-{index} '$param_{index}'" for index in range(num_params))
+    return build_tool("synthetic_params", f"tool\n{command}\n    > '$output'", params)
+
+
+def build_conditionals_tool(depth: int) -> str:
+    """Generates a tool with conditionals nested to the given depth."""
+    inputs = '<param name="leaf" type="text" value="" label="Leaf"/>'
+    for level in reversed(range(depth)):
+        indent = " " * (8 + 8 * level)
+        inputs = f"""<conditional name="level_{level}">
+{indent}    <param name="selector_{level}" type="select" label="Level {level}">
+{indent}        <option value="nested" selected="true">Nested</option>
+{indent}        <option value="flat">Flat</option>
+{indent}    </param>
+{indent}    <when value="nested">
+{indent}        {inputs}
+{indent}    </when>
+{indent}    <when value="flat">
+{indent}        <param name="flat_{level}" type="integer" value="{level}" label="Flat {level}"/>
+{indent}    </when>
+{indent}</conditional>"""
+    path = ".".join(f"level_{level}" for level in range(depth))
+    return build_tool("synthetic_conditionals", f"tool --leaf '${path}.leaf' > '$output'", inputs)
+
+
+def build_command_tool(num_lines: int) -> str:
+    """Generates a tool with a Cheetah command of about the given number of lines."""
+    blocks = []
+    for index in range(num_lines // 5):
+        blocks.append(
+            f"""#if str($mode) == "mode_{index % 10}":
+    step_{index} --input '$input' --threshold {index} ## step {index}
+#else:
+    echo "skipping step {index}" &&
+#end if"""
+        )
+    command = "\n".join(blocks) + "\ncat '$input' > '$output'"
+    inputs = """<param name="input" type="data" format="txt" label="Input"/>
+        <param name="mode" type="select" label="Mode">
+            <option value="mode_0">Mode 0</option>
+            <option value="mode_1">Mode 1</option>
+        </param>"""
+    return build_tool("synthetic_command", command, inputs)
+
+
+def build_macros_tool(num_files: int) -> str:
+    """Generates a tool importing the given number of macro files built with `build_macros_file`."""
+    imports = "\n        ".join(f"<import>macros/macros_{index}.xml</import>" for index in range(num_files))
+    expands = "\n        ".join(f'<expand macro="inputs_{index}"/>' for index in range(num_files))
+    tokens = "\n".join(f"    --option-{index} @TOKEN_{index}@" for index in range(num_files))
+    return build_tool("synthetic_macros", f"tool\n{tokens}\n    > '$output'", expands, macros=imports)
+
+
+def build_macros_file(index: int) -> str:
+    """Generates a macro file with a token and a couple of XML macros."""
+    return f"""<macros>
+    <token name="@TOKEN_{index}@">value_{index}</token>
+    <xml name="inputs_{index}">
+        <param name="macro_param_{index}" type="integer" value="{index}" label="Macro param {index}"/>
+        <expand macro="select_{index}"/>
+    </xml>
+    <xml name="select_{index}">
+        <param name="macro_select_{index}" type="select" label="Macro select {index}">
+            <option value="a">A</option>
+            <option value="b">B</option>
+        </param>
+    </xml>
+</macros>
+"""
+
+
+def build_tool(tool_id: str, command: str, inputs: str, macros: str = "") -> str:
+    macros_section = f"\n    <macros>\n        {macros}\n    </macros>" if macros else ""
+    return f"""<tool id="{tool_id}" name="{tool_id}" version="1.0.0" profile="22.05">{macros_section}
+    <requirements>
+        <requirement type="package" version="1.0">tool</requirement>
+    </requirements>
+    <command detect_errors="exit_code"><![CDATA[
+{command}
+    ]]></command>
+    <inputs>
+        {inputs}
+    </inputs>
+    <outputs>
+        <data name="output" format="txt"/>
+    </outputs>
+    <tests>
+        <test>
+            <output name="output" file="output.txt"/>
+        </test>
+    </tests>
+    <help><![CDATA[
+Synthetic tool generated for benchmarking.
+    ]]></help>
+    <citations>
+        <citation type="doi">10.1093/nar/gkac247</citation>
+    </citations>
+</tool>
+"""
@@ -0,0 +1,216 @@
+"""Measures the operations of the Galaxy tool language service over a corpus of tool wrappers."""
+
+import statistics
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import attrs
+from lsprotocol.types import (
+    CompletionContext,
+    CompletionParams,
+    CompletionTriggerKind,
+    DocumentFormattingParams,
+    FormattingOptions,
+    TextDocumentIdentifier,
+)
+from pygls.workspace import (
+    TextDocument,
+    Workspace,
+)
+
+from galaxyls.config import CompletionMode
+from galaxyls.services.language import GalaxyToolLanguageService
+from galaxyls.services.tools.workspace import WorkspaceToolIndex
+from galaxyls.services.xml.document import XmlDocument
+from galaxyls.services.xml.parser import XmlDocumentParser
+
+from .corpus import (
+    CorpusFile,
+    write_corpus,
+)
+
+WORKSPACE = "(workspace)"
+"""The document name of the results of the operations over the whole workspace."""
+COMPLETION_TAG = "<param "
+
+Operation = Callable[[], Any]
+
+
+@attrs.define
+class BenchmarkResult:
+    """The durations of the executions of an operation on a document, all in milliseconds."""
+
+    document: str
+    operation: str
+    runs: int
+    min: float
+    median: float
+    mean: float
+    max: float
+
+
+@attrs.define
+class BenchmarkComparison:
+    """The median durations of an operation on a document in two benchmark runs."""
+
+    document: str
+    operation: str
+    baseline: float
+    current: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline if self.baseline else 1.0
+
+
+@attrs.define
+class DepthScaling:
+    """The median duration of the diagnostics of a tool with conditionals nested to a depth."""
+
+    depth: int
+    median: float
+    growth: float
+    """The ratio between this median and the median of the previous depth."""
+
+
+class ToolBenchmark:
+    """Measures the operations of the language service on every tool of a corpus.
+
+    The corpus is written to a workspace directory and every operation is executed once
+    to warm up the caches the server would have when the user interacts with a document
+    and then `repeat` more times to measure it. The service should be created without a
+    storage directory, the workspace index of every run is discarded with its directory.
+    """
+
+    def __init__(self, service: GalaxyToolLanguageService, repeat: int = 5) -> None:
+        self.service = service
+        self.repeat = repeat
+
+    def run(self, corpus: list[CorpusFile], root: Path) -> list[BenchmarkResult]:
+        """Runs all the operations on the given corpus using `root` as the workspace directory."""
+        write_corpus(corpus, root)
+        workspace = Workspace(root.as_uri())
+        self.service.set_workspace(workspace)
+        results = [self._measure(WORKSPACE, "index", lambda: WorkspaceToolIndex(workspace).build())]
+        if self.service.workspace_index is not None:
+            self.service.workspace_index.build()
+        for corpus_file in corpus:
+            if corpus_file.is_tool:
+                document = TextDocument((root / corpus_file.path).as_uri(), corpus_file.source, version=1)
+                results.extend(self._run_document(corpus_file.path, document))
+        return results
+
+    def run_conditional_depths(self, corpus: list[CorpusFile], root: Path) -> list[BenchmarkResult]:
+        """Measures only the diagnostics of the tools built with `build_conditional_depths_corpus`.
+
+        Linting is the operation whose time depends the most on the depth of the nested
+        conditionals, measuring the others on every depth would only make the run slower.
+        """
+        write_corpus(corpus, root)
+        results = []
+        for corpus_file in corpus:
+            document = TextDocument((root / corpus_file.path).as_uri(), corpus_file.source, version=1)
+            xml_document = self.service.get_xml_document(document)
+            results.append(self._measure(corpus_file.path, "diagnostics", lambda: self.service.get_diagnostics(xml_document)))
+        return results
+
+    def _run_document(self, name: str, document: TextDocument) -> list[BenchmarkResult]:
+        return [self._measure(name, operation, function) for operation, function in self._get_operations(document).items()]
+
+    def _get_operations(self, document: TextDocument) -> dict[str, Operation]:
+        service = self.service
+        xml_document = service.get_xml_document(document)
+        tool_id = xml_document.root.get_attribute_value("id") if xml_document.root else None
+        operations: dict[str, Operation] = {
+            "parse": lambda: XmlDocumentParser().parse(document),
+        }
+        offset = document.source.rfind(COMPLETION_TAG)
+        if offset >= 0:
+            operations.update(
+                {
+                    "completion.node": self._get_completion(xml_document, offset + 1),
+                    "completion.attribute": self._get_completion(xml_document, offset + len(COMPLETION_TAG)),
+                    "hover": lambda: service.get_documentation(xml_document, xml_document.get_position(offset + 2)),
+                }
+            )
+        formatting_params = DocumentFormattingParams(
+            text_document=TextDocumentIdentifier(uri=document.uri), options=FormattingOptions(tab_size=4, insert_spaces=True)
+        )
+        operations.update(
+            {
+                "diagnostics": lambda: service.get_diagnostics(xml_document),
+                "symbols.document": lambda: service.symbols_provider.get_document_symbols(xml_document),
+                "symbols.workspace": lambda: service.get_workspace_symbols(tool_id or ""),
+                "formatting": lambda: service.format_document(document.source, formatting_params),
+                "tests.generate": lambda: service.generate_tests(document),
+            }
+        )
+        return operations
+
+    def _get_completion(self, xml_document: XmlDocument, offset: int) -> Operation:
+        params = CompletionParams(
+            text_document=TextDocumentIdentifier(uri=xml_document.document.uri),
+            position=xml_document.get_position(offset),
+            context=CompletionContext(trigger_kind=CompletionTriggerKind.Invoked),
+        )
+        return lambda: self.service.get_completion(xml_document, params, CompletionMode.AUTO)
+
+    def _measure(self, document: str, operation: str, function: Operation) -> BenchmarkResult:
+        function()
+        durations = []
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            function()
+            durations.append((time.perf_counter() - start) * 1000)
+        return BenchmarkResult(
+            document=document,
+            operation=operation,
+            runs=self.repeat,
+            min=round(min(durations), 4),
+            median=round(statistics.median(durations), 4),
+            mean=round(statistics.fmean(durations), 4),
+            max=round(max(durations), 4),
+        )
+
+
+def get_depth_scaling(results: list[BenchmarkResult]) -> list[DepthScaling]:
+    """Gets how the median grows between consecutive depths of the results of `run_conditional_depths`."""
+    scaling: list[DepthScaling] = []
+    for depth, result in enumerate(results, start=1):
+        previous = scaling[-1].median if scaling else 0.0
+        growth = round(result.median / previous, 2) if previous else 1.0
+        scaling.append(DepthScaling(depth=depth, median=result.median, growth=growth))
+    return scaling
+
+
+def compare_results(baseline: list[BenchmarkResult], current: list[BenchmarkResult]) -> list[BenchmarkComparison]:
+    """Pairs the results of the same operation on the same document in both runs."""
+    baseline_medians = {(result.document, result.operation): result.median for result in baseline}
+    return [
+        BenchmarkComparison(result.document, result.operation, baseline_medians[key], result.median)
+        for result in current
+        if (key := (result.document, result.operation)) in baseline_medians
+    ]
+
+
+def get_regressions(
+    comparisons: list[BenchmarkComparison], threshold: float, min_duration: float
+) -> list[BenchmarkComparison]:
+    """Gets the comparisons where the operation became slower than the given threshold.
+
+    Args:
+        comparisons (List[BenchmarkComparison]): The comparisons returned by `compare_results`.
+        threshold (float): The maximum allowed relative increase of the median, 0.25 allows 25% slower.
+        min_duration (float): The operations faster than this number of milliseconds in both runs
+        are ignored, as their durations are mostly noise.
+
+    Returns:
+        List[BenchmarkComparison]: The comparisons of the slower operations.
+    """
+    return [
+        comparison
+        for comparison in comparisons
+        if max(comparison.baseline, comparison.current) >= min_duration and comparison.ratio > 1 + threshold
+    ]
@@ -0,0 +1,90 @@
+"""Measures the throughput of the XML scanner in MB/s.
+
+By default it scans a synthetic tool wrapper with a few thousand parameters, comments,
+a CDATA command section and a help section. Any tool wrapper files passed as arguments
+are measured too.
+
+Usage:
+    python -m galaxyls.bench.scanner_throughput [--repeat N] [FILE ...]
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+from galaxyls.services.xml.scanner import XmlScanner
+from galaxyls.services.xml.types import TokenType
+
+PARAM_TEMPLATE = """        <!-- Parameter number {index} -->
+        <param name="param_{index}" type="integer" value="{index}" min="0" max="100" label="Parameter {index}"
+            help="Some help text for the parameter &quot;{index}&quot; that is long enough to be realistic"/>
+        <conditional name="cond_{index}">
+            <param name="select_{index}" type="select" label="Select">
+                <option value="a" selected="true">Option A</option>
+                <option value="b">Option B</option>
+            </param>
+            <when value="a"/>
+            <when value="b">
+                <param name="nested_{index}" type="text" value=""/>
+            </when>
+        </conditional>
+"""
+
+
+def build_synthetic_tool(num_params: int) -> str:
+    params = "".join(PARAM_TEMPLATE.format(index=index) for index in range(num_params))
+    command_lines = "\n".join(f"    --param_{index} '$param_{index}'" for index in range(num_params))
+    help_lines = "\n".join(f"Line {index} of the help section with *some* RST markup." for index in range(num_params))
+    return f"""<?xml version="1.0"?>
+<tool id="synthetic" name="Synthetic tool" version="1.0.0" profile="22.05">
+    <command detect_errors="exit_code"><![CDATA[
+tool
+{command_lines}
+    ]]></command>
+    <inputs>
+{params}    </inputs>
+    <outputs>
+        <data name="output" format="txt"/>
+    </outputs>
+    <help><![CDATA[
+{help_lines}
+    ]]></help>
+</tool>
+"""
+
+
+def scan(source: str) -> int:
+    scanner = XmlScanner(source)
+    count = 0
+    token = scanner.scan()
+    while token != TokenType.EOS:
+        count += 1
+        token = scanner.scan()
+    return count
+
+
+def measure(name: str, source: str, repeat: int) -> None:
+    size_mb = len(source.encode("utf-8")) / (1024 * 1024)
+    tokens = scan(source)  # warm up
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        scan(source)
+        best = min(best, time.perf_counter() - start)
+    print(f"{name}: {size_mb:.2f} MB, {tokens} tokens, best of {repeat}: {best * 1000:.1f} ms, {size_mb / best:.2f} MB/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measures the throughput of the XML scanner.")
+    parser.add_argument("files", nargs="*", type=Path, help="Tool wrapper files to scan.")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of measured runs per input.")
+    parser.add_argument("--params", type=int, default=2000, help="Number of parameters in the synthetic tool.")
+    args = parser.parse_args()
+
+    measure("synthetic", build_synthetic_tool(args.params), args.repeat)
+    for path in args.files:
+        measure(str(path), path.read_text(encoding="utf-8"), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
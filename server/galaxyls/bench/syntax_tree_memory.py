@@ -0,0 +1,52 @@
+"""Measures the memory used by the XML syntax tree in bytes per node.
+
+By default it parses the same synthetic tool wrapper used by the scanner throughput
+benchmark. Any tool wrapper files passed as arguments are measured too. The memory
+is measured with `tracemalloc` and includes every node allocated by the parser
+(elements, attributes and their keys and values, content, comments, etc.).
+
+Usage:
+    python -m galaxyls.bench.syntax_tree_memory [--params N] [FILE ...]
+"""
+
+import argparse
+import gc
+import tracemalloc
+from pathlib import Path
+
+from anytree import PreOrderIter  # type: ignore
+from pygls.workspace import TextDocument
+
+from galaxyls.services.xml.parser import XmlDocumentParser
+
+from .scanner_throughput import build_synthetic_tool
+
+
+def measure(name: str, source: str) -> None:
+    document = TextDocument("file:///benchmark.xml", source)
+    parser = XmlDocumentParser()
+    parser.parse(document)  # warm up
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    xml_document = parser.parse(document)
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    nodes = sum(1 for _ in PreOrderIter(xml_document))
+    size_kb = (after - before) / 1024
+    print(f"{name}: {nodes} nodes, {size_kb:.1f} KB, {(after - before) / nodes:.1f} bytes/node")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measures the memory used by the XML syntax tree.")
+    parser.add_argument("files", nargs="*", type=Path, help="Tool wrapper files to parse.")
+    parser.add_argument("--params", type=int, default=2000, help="Number of parameters in the synthetic tool.")
+    args = parser.parse_args()
+
+    measure("synthetic", build_synthetic_tool(args.params))
+    for path in args.files:
+        measure(str(path), path.read_text(encoding="utf-8"))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,8 @@ from enum import Enum
 
 import attrs
 
+from galaxyls.memory import DEFAULT_MEMORY_BUDGET
+
 
 class CompletionMode(str, Enum):
     AUTO = "auto"
@@ -22,6 +24,8 @@ class ServerConfig:
     """Language Server specific configuration."""
 
     silent_install: bool = attrs.field(default=False)
+    memory_budget: int = attrs.field(default=DEFAULT_MEMORY_BUDGET)
+    """Megabytes that all the caches of the server can use together, 0 to not limit them."""
 
 
 @attrs.define
@@ -18,6 +18,10 @@ class Commands:
     GENERATE_EXPANDED_DOCUMENT = "gls.generate.expandedDocument"
     INSERT_PARAM_REFERENCE = "gls.insert.paramReference"
     INSERT_PARAM_FILTER_REFERENCE = "gls.insert.paramFilterReference"
+    STATS = "gls.stats"
+    START_PROFILING = "gls.startProfiling"
+    STOP_PROFILING = "gls.stopProfiling"
+    MEMORY_USAGE = "gls.memoryUsage"
 
 
 class DiagnosticCodes:
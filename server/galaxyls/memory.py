@@ -0,0 +1,263 @@
+"""Memory accounting of the caches of the language server.
+
+The server usually runs for as long as the editor is open, so the memory kept between
+requests must be bounded. All the caches keep their entries in `CacheEntries` registered
+in a `CacheRegistry`, which estimates the memory used by every entry and discards the
+least recently used entries of any cache when the total goes over the memory budget.
+The memory used by data that is always needed, like the XSD tree, is also counted
+against the budget but it is never discarded.
+
+The sizes are estimated from the number of elements, attributes and characters of the
+documents, as measuring the actual memory of Python objects and lxml trees is much more
+expensive than building them. The constants were calibrated with the memory used by the
+syntax trees and lxml trees of the tool wrappers of the benchmark corpus.
+"""
+
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import (
+    Generic,
+    TypeVar,
+)
+
+import attrs
+from lxml import etree
+
+MEGABYTE = 1024 * 1024
+DEFAULT_MEMORY_BUDGET = 256
+"""The default memory budget of the caches in megabytes."""
+
+SYNTAX_TAG_SIZE = 350
+"""Bytes used by the syntax tree for every tag (`<`) of the source."""
+SYNTAX_ATTRIBUTE_SIZE = 520
+"""Bytes used by the syntax tree for every attribute (`="`) of the source."""
+XML_TREE_TAG_SIZE = 160
+"""Bytes used by the lxml tree for every tag (`<`) of the source."""
+XML_TREE_ATTRIBUTE_SIZE = 240
+"""Bytes used by the lxml tree for every attribute (`="`) of the source."""
+ELEMENT_SIZE = 530
+"""Bytes used by every element of a lxml tree."""
+ATTRIBUTE_SIZE = 170
+"""Bytes used by every attribute of a lxml tree."""
+XSD_NODE_SIZE = 1100
+"""Bytes used by every node of the XSD tree, including its documentation."""
+COMPILED_SCHEMA_SIZE = 2600 * 1024
+"""Bytes used by the compiled Galaxy tool schema."""
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+
+@attrs.define
+class CacheUsage:
+    """The estimated memory used by a cache."""
+
+    name: str
+    entries: int
+    size: int
+    """Estimated bytes used by the entries."""
+    evictions: int = 0
+    """Entries discarded to keep the memory under the budget."""
+    evictable: bool = True
+
+
+@attrs.define
+class MemoryUsage:
+    """The estimated memory used by all the caches of the server."""
+
+    budget: int
+    """Bytes the caches are allowed to use, 0 if they are not limited."""
+    total: int
+    caches: list[CacheUsage]
+
+
+class CacheEntries(Generic[K, V]):
+    """The entries of a cache sorted from the least to the most recently used.
+
+    The size of every entry is estimated when it is stored and, after storing it, the registry
+    discards the least recently used entries of all its caches until the memory used is under
+    the budget again. The cache can also be limited to a maximum number of entries.
+    """
+
+    def __init__(
+        self,
+        registry: "CacheRegistry",
+        name: str,
+        estimate_size: Callable[[V], int],
+        max_entries: int | None = None,
+    ) -> None:
+        self.registry = registry
+        self.name = name
+        self.estimate_size = estimate_size
+        self.max_entries = max_entries
+        self.size = 0
+        self.evictions = 0
+        self._entries: OrderedDict[K, tuple[V, int, int]] = OrderedDict()
+        """The value, estimated size and last access tick of every key."""
+        registry.register(self)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: K) -> bool:
+        return key in self._entries
+
+    def get(self, key: K) -> V | None:
+        """Gets the value of the key marking it as the most recently used entry."""
+        with self.registry.lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries[key] = (entry[0], entry[1], self.registry.next_tick())
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def peek(self, key: K) -> V | None:
+        """Gets the value of the key without changing the order of the entries."""
+        entry = self._entries.get(key)
+        return entry[0] if entry is not None else None
+
+    def items(self) -> list[tuple[K, V]]:
+        """Gets a copy of the entries from the least to the most recently used."""
+        with self.registry.lock:
+            return [(key, entry[0]) for key, entry in self._entries.items()]
+
+    def put(self, key: K, value: V) -> None:
+        """Stores the value as the most recently used entry and discards the entries over the limits."""
+        size = self.estimate_size(value)
+        with self.registry.lock:
+            self.pop(key)
+            self._entries[key] = (value, size, self.registry.next_tick())
+            self.size += size
+            while self.max_entries is not None and len(self._entries) > self.max_entries:
+                self._pop_oldest()
+            self.registry.trim()
+
+    def pop(self, key: K) -> V | None:
+        """Removes the entry of the key and returns its value if there was one."""
+        with self.registry.lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return None
+            self.size -= entry[1]
+            return entry[0]
+
+    def clear(self) -> None:
+        with self.registry.lock:
+            self._entries.clear()
+            self.size = 0
+
+    def get_usage(self) -> CacheUsage:
+        return CacheUsage(name=self.name, entries=len(self._entries), size=self.size, evictions=self.evictions)
+
+    def _get_oldest_tick(self) -> int | None:
+        for _, _, tick in self._entries.values():
+            return tick
+        return None
+
+    def _pop_oldest(self) -> None:
+        _, (_, size, _) = self._entries.popitem(last=False)
+        self.size -= size
+
+
+class CacheRegistry:
+    """Keeps the estimated memory used by all the registered caches under a common budget.
+
+    The entries of all the caches are discarded in least recently used order. The entry
+    stored last is never discarded, so the result of the current request is always cached.
+    It is thread safe, all the registered caches share its lock.
+    """
+
+    def __init__(self, budget: int = 0) -> None:
+        self.lock = threading.RLock()
+        self._budget = budget
+        self._tick = 0
+        self._caches: dict[str, CacheEntries] = {}
+        self._pinned: dict[str, Callable[[], int]] = {}
+
+    @property
+    def budget(self) -> int:
+        """Bytes the caches are allowed to use, 0 if they are not limited."""
+        return self._budget
+
+    @budget.setter
+    def budget(self, budget: int) -> None:
+        with self.lock:
+            self._budget = budget
+            self.trim()
+
+    def register(self, cache: CacheEntries) -> None:
+        """Accounts the memory used by the cache, replacing any previous cache with the same name."""
+        with self.lock:
+            self._caches[cache.name] = cache
+
+    def register_pinned(self, name: str, estimate_size: Callable[[], int]) -> None:
+        """Accounts the memory used by data that is never discarded, estimated by the given function."""
+        with self.lock:
+            self._pinned[name] = estimate_size
+
+    def next_tick(self) -> int:
+        """Gets the access time of an entry used now. Must be called with the lock held."""
+        self._tick += 1
+        return self._tick
+
+    def get_total_size(self) -> int:
+        with self.lock:
+            return sum(cache.size for cache in self._caches.values()) + sum(
+                estimate_size() for estimate_size in self._pinned.values()
+            )
+
+    def trim(self) -> None:
+        """Discards the least recently used entries of any cache until the memory used is under the budget."""
+        with self.lock:
+            if not self._budget:
+                return
+            excess = self.get_total_size() - self._budget
+            while excess > 0:
+                oldest: CacheEntries | None = None
+                oldest_tick = self._tick
+                for cache in self._caches.values():
+                    tick = cache._get_oldest_tick()
+                    if tick is not None and tick < oldest_tick:
+                        oldest, oldest_tick = cache, tick
+                if oldest is None:
+                    return
+                size = oldest.size
+                oldest._pop_oldest()
+                oldest.evictions += 1
+                excess -= size - oldest.size
+
+    def get_usage(self) -> MemoryUsage:
+        """Gets the estimated memory used by every cache and by the data that is never discarded."""
+        with self.lock:
+            caches = [cache.get_usage() for cache in self._caches.values()]
+            caches.extend(
+                CacheUsage(name=name, entries=1, size=estimate_size(), evictable=False)
+                for name, estimate_size in self._pinned.items()
+            )
+        caches.sort(key=lambda usage: usage.size, reverse=True)
+        return MemoryUsage(budget=self._budget, total=sum(usage.size for usage in caches), caches=caches)
+
+
+def estimate_document_size(source: str) -> int:
+    """Estimates the bytes used by the syntax tree of a document with the given source and by its lxml tree."""
+    tags = source.count("<")
+    attributes = source.count('="')
+    return (
+        tags * (SYNTAX_TAG_SIZE + XML_TREE_TAG_SIZE)
+        + attributes * (SYNTAX_ATTRIBUTE_SIZE + XML_TREE_ATTRIBUTE_SIZE)
+        + len(source)
+    )
+
+
+def estimate_tree_size(tree: etree._ElementTree) -> int:
+    """Estimates the bytes used by the lxml tree counting its elements, attributes and text."""
+    size = 0
+    for element in tree.iter():
+        size += ELEMENT_SIZE + ATTRIBUTE_SIZE * len(element.attrib)
+        if element.text:
+            size += len(element.text)
+        if element.tail:
+            size += len(element.tail)
+    return size
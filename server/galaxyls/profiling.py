@@ -0,0 +1,163 @@
+"""Sampling profiler of the language server process.
+
+A background thread takes a snapshot of the Python stacks of all the other threads every
+few milliseconds and counts how many times every stack was seen. The stacks are tagged with
+the LSP method of the innermost handler found in them, so the time spent by a slow hover
+can be told apart from the time spent computing the diagnostics in the background, and
+they are written in the collapsed stacks format read by flamegraph tools like
+`flamegraph.pl`, `inferno` or https://www.speedscope.app:
+
+    textDocument/hover;hover (galaxyls/server.py:301);get_documentation (...) 42
+
+Sampling does not slow down the server like a tracing profiler does, so it can be used
+on a server being used normally to find out what it is doing when it becomes slow.
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable
+from pathlib import Path
+from types import (
+    CodeType,
+    FrameType,
+)
+from typing import Any
+
+DEFAULT_INTERVAL = 0.005
+"""Seconds between the samples."""
+
+IDLE_FRAMES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+    ("thread.py", "run"),
+}
+"""The innermost frames of threads waiting for work, whose samples are discarded.
+
+The executor threads running a native function, like the reader of the standard input
+of the server, are waiting for it too since the work of the server is in Python frames."""
+
+METHOD_VARIABLE = "name"
+"""The variable of the handler wrappers holding the LSP method."""
+
+_method_wrappers: set[CodeType] = set()
+
+
+def add_method_wrapper(wrapper: Callable[..., Any]) -> None:
+    """Tags the samples taken while the given function runs with the LSP method in its `name` variable.
+
+    The method is read from the frames of every sampled stack instead of being recorded per
+    thread when the function starts, as the asynchronous handlers of the event loop thread
+    can be suspended and resumed in any order.
+    """
+    _method_wrappers.add(wrapper.__code__)
+
+
+class SamplingProfiler:
+    """Counts the stacks of all the threads of the process sampled at regular intervals."""
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL) -> None:
+        self.interval = interval
+        self.samples = 0
+        """The number of samples taken, including the discarded idle stacks."""
+        self._stacks: Counter[tuple[str, ...]] = Counter()
+        self._labels: dict[CodeType, str] = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None
+
+    def start(self) -> None:
+        """Starts sampling the stacks in a background thread, discarding the stacks of any previous run."""
+        if self._thread is not None:
+            return
+        with self._lock:
+            self._stacks.clear()
+            self.samples = 0
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="galaxyls-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stops sampling the stacks. The stacks sampled so far are kept until it is started again."""
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+
+    def sample(self) -> None:
+        """Takes a sample of the stacks of all the threads except the current one."""
+        current_thread_id = threading.get_ident()
+        threads = {thread.ident: thread.name for thread in threading.enumerate()}
+        stacks: list[tuple[str, ...]] = []
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == current_thread_id or _is_idle(frame):
+                continue
+            method, stack = self._get_stack(frame)
+            stacks.append((method or f"[{threads.get(thread_id, thread_id)}]", *stack))
+        with self._lock:
+            self.samples += 1
+            self._stacks.update(stacks)
+
+    def get_folded_stacks(self) -> list[str]:
+        """Gets the sampled stacks in the collapsed format, one line with the frames and the count per stack."""
+        with self._lock:
+            stacks = sorted(self._stacks.items())
+        return [f"{';'.join(stack)} {count}" for stack, count in stacks]
+
+    def write(self, path: Path) -> None:
+        """Writes the sampled stacks in the collapsed format to the given file."""
+        lines = self.get_folded_stacks()
+        path.write_text("".join(f"{line}\n" for line in lines), encoding="utf-8")
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            self.sample()
+
+    def _get_stack(self, frame: FrameType | None) -> tuple[str | None, list[str]]:
+        """Gets the labels of the frames from the outermost one and the method of the innermost handler wrapper."""
+        method = None
+        stack = []
+        while frame is not None:
+            if method is None and frame.f_code in _method_wrappers:
+                method = frame.f_locals.get(METHOD_VARIABLE)
+            stack.append(self._get_label(frame.f_code))
+            frame = frame.f_back
+        stack.reverse()
+        return method, stack
+
+    def _get_label(self, code: CodeType) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = f"{code.co_name} ({_get_module_path(code.co_filename)}:{code.co_firstlineno})"
+        return label
+
+
+def get_default_profile_path() -> Path:
+    """Gets a new file in the temporary directory to write the sampled stacks of this process."""
+    return Path(tempfile.gettempdir()) / f"galaxyls-{os.getpid()}-{time.strftime('%Y%m%d-%H%M%S')}.folded"
+
+
+def _is_idle(frame: FrameType) -> bool:
+    return (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in IDLE_FRAMES
+
+
+def _get_module_path(filename: str) -> str:
+    """Gets the path of the file relative to the entry of `sys.path` containing it."""
+    path = filename
+    for entry in sys.path:
+        if entry and filename.startswith(entry + os.sep):
+            relative = filename[len(entry) + 1 :]
+            if len(relative) < len(path):
+                path = relative
+    # The frames in the collapsed format are separated by semicolons
+    return path.replace(";", "_")
@@ -0,0 +1,74 @@
+"""Replays a recorded editing session against a new Galaxy tools language server.
+
+Sessions are recorded by starting the server with `--record FILE`. The replay reports
+the latency of every kind of request, the time they spent queued in the server and how
+the published diagnostics changed, so slowdowns reported by users can be reproduced
+and the effect of changes in the server can be validated with real editing patterns.
+
+Usage:
+    galaxyls-replay SESSION [--speed N] [--workspace DIR] [--output FILE]
+"""
+
+import argparse
+import json
+import shlex
+import sys
+from pathlib import Path
+
+import attrs
+
+from .player import SessionPlayer
+from .session import read_session
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replays a recorded session against a new language server.")
+    parser.add_argument("session", type=Path, help="The session recorded with `python -m galaxyls --record FILE`.")
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=0,
+        help="0 to send the messages as fast as possible, 1 to keep the recorded cadence, 2 to send them twice as fast...",
+    )
+    parser.add_argument("--settle", type=float, default=1.0, help="Seconds to wait for the last diagnostics.")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds to wait for the responses of the server.")
+    parser.add_argument("--workspace", type=Path, help="Directory to use as workspace instead of the recorded one.")
+    parser.add_argument("--server-command", help="Command to start the server, by default the server of this package.")
+    parser.add_argument("--output", type=Path, help="Write the JSON report to this file instead of the standard output.")
+    args = parser.parse_args()
+
+    player = SessionPlayer(
+        read_session(args.session),
+        server_command=shlex.split(args.server_command) if args.server_command else None,
+        speed=args.speed,
+        settle=args.settle,
+        timeout=args.timeout,
+        root_uri=args.workspace.resolve().as_uri() if args.workspace else None,
+    )
+    report = player.play()
+
+    output = json.dumps(attrs.asdict(report), indent=2)
+    if args.output:
+        args.output.write_text(output + "\n", encoding="utf-8")
+    else:
+        print(output)
+
+    recorded = {summary.name: summary for summary in report.recorded}
+    print(f"{'request':<40} {'count':>6} {'p50':>9} {'p99':>9} {'recorded p50':>13} {'queueing':>9}", file=sys.stderr)
+    for summary in report.requests:
+        recorded_p50 = f"{recorded[summary.name].p50:.3f}" if summary.name in recorded else "-"
+        queueing = f"{report.queueing[summary.name]:.3f}" if summary.name in report.queueing else "-"
+        print(
+            f"{summary.name:<40} {summary.count:>6} {summary.p50:>9.3f} {summary.p99:>9.3f} {recorded_p50:>13} {queueing:>9}",
+            file=sys.stderr,
+        )
+    churn = report.diagnostics
+    print(
+        f"diagnostics: {churn.publishes} published, {churn.changed} changed, {churn.stale} stale;"
+        f" replayed in {report.duration:.3f} s",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+"""Replays a recorded session against a new language server process."""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import deque
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any
+
+import attrs
+from pygls.uris import to_fs_path
+
+from galaxyls.constants import Commands
+from galaxyls.stats import (
+    LatencyStats,
+    LatencySummary,
+)
+
+from .session import (
+    CLIENT,
+    SERVER,
+    RecordedMessage,
+)
+
+SERVER_COMMAND = [sys.executable, "-m", "galaxyls"]
+PACKAGE_PARENT_DIR = Path(__file__).resolve().parent.parent.parent
+INITIALIZE = "initialize"
+SHUTDOWN = "shutdown"
+EXIT = "exit"
+PUBLISH_DIAGNOSTICS = "textDocument/publishDiagnostics"
+VERSIONED_NOTIFICATIONS = {"textDocument/didOpen", "textDocument/didChange"}
+STATS_REQUEST_ID = "replay-stats"
+SHUTDOWN_REQUEST_ID = "replay-shutdown"
+
+
+@attrs.define
+class DiagnosticsChurn:
+    """How the diagnostics published by the server changed during a session."""
+
+    publishes: int = 0
+    changed: int = 0
+    """Publishes with different diagnostics than the previous publish for the same document."""
+    stale: int = 0
+    """Publishes for an older version of the document than the last one sent by the client."""
+
+
+@attrs.define
+class ReplayReport:
+    """The results of replaying a session, all the durations in milliseconds except `duration`."""
+
+    duration: float
+    """Seconds from the server being initialized until all the requests were answered."""
+    requests: list[LatencySummary]
+    """The latencies of the requests as seen by the client during the replay."""
+    recorded: list[LatencySummary]
+    """The latencies of the requests in the recorded session."""
+    server: list[LatencySummary]
+    """The time spent by the server in every handler during the replay."""
+    queueing: dict[str, float]
+    """The mean time every kind of request waited before or after being handled by the server."""
+    diagnostics: DiagnosticsChurn
+
+
+class SessionMetrics:
+    """Computes the latencies and diagnostics churn of a session from the messages exchanged.
+
+    The latency of a request is the time until its response is received. The latency of
+    the diagnostics, recorded as `textDocument/publishDiagnostics`, is the time from the
+    client sending a version of a document until the server publishes the diagnostics
+    for that version.
+    """
+
+    def __init__(self) -> None:
+        self.latencies = LatencyStats()
+        self.churn = DiagnosticsChurn()
+        self._pending: dict[int | str | None, tuple[str, float]] = {}
+        self._versions: dict[str, tuple[int, float]] = {}
+        self._diagnostics: dict[str, list[Any]] = {}
+
+    @classmethod
+    def from_session(cls, session: Iterable[RecordedMessage]) -> "SessionMetrics":
+        """Computes the metrics of a recorded session using the recorded times."""
+        metrics = cls()
+        for recorded in session:
+            if recorded.sender == CLIENT:
+                metrics.on_client_message(recorded.message, recorded.time)
+            else:
+                metrics.on_server_message(recorded.message, recorded.time)
+        return metrics
+
+    def on_client_message(self, message: dict[str, Any], time: float) -> None:
+        method = message.get("method")
+        if method is None:
+            return
+        if "id" in message:
+            self._pending[message["id"]] = (method, time)
+        elif method in VERSIONED_NOTIFICATIONS:
+            document = message["params"]["textDocument"]
+            self._versions[document["uri"]] = (document.get("version"), time)
+
+    def on_server_message(self, message: dict[str, Any], time: float) -> None:
+        method = message.get("method")
+        if method is None:
+            pending = self._pending.pop(message.get("id"), None)
+            if pending:
+                self.latencies.record(pending[0], time - pending[1])
+        elif method == PUBLISH_DIAGNOSTICS:
+            self._on_diagnostics_published(message["params"], time)
+
+    def _on_diagnostics_published(self, params: dict[str, Any], time: float) -> None:
+        uri = params["uri"]
+        diagnostics = params.get("diagnostics", [])
+        self.churn.publishes += 1
+        if self._diagnostics.get(uri) != diagnostics:
+            self.churn.changed += 1
+        self._diagnostics[uri] = diagnostics
+        version = params.get("version")
+        sent = self._versions.get(uri)
+        if version is None or sent is None:
+            return
+        if version < sent[0]:
+            self.churn.stale += 1
+        elif version == sent[0]:
+            self.latencies.record(PUBLISH_DIAGNOSTICS, time - sent[1])
+            # Only the first publish of a version measures how long the user waited for it
+            self._versions.pop(uri)
+
+
+class SessionPlayer:
+    """Replays the client messages of a recorded session against a new server process.
+
+    With `speed` 0 the messages are sent as fast as possible, otherwise they are sent
+    with the recorded cadence, `speed` times faster. The requests sent by the server are
+    answered with the responses of the client in the recording. The shutdown of the
+    recorded session is replaced by a request of the server latency statistics before
+    shutting it down.
+    """
+
+    def __init__(
+        self,
+        session: list[RecordedMessage],
+        server_command: list[str] | None = None,
+        speed: float = 0,
+        settle: float = 1.0,
+        timeout: float = 60.0,
+        root_uri: str | None = None,
+    ) -> None:
+        self.session = session
+        self.server_command = server_command or SERVER_COMMAND
+        self.speed = speed
+        self.settle = settle
+        """Seconds to wait for the last diagnostics after all the requests are answered."""
+        self.timeout = timeout
+        self.root_uri = root_uri
+        """Replaces the workspace of the recorded session, as its files may not exist anymore."""
+        self._futures: dict[int | str | None, asyncio.Future] = {}
+        self._client_responses = self._get_client_responses()
+        self._response_times = {
+            recorded.id: recorded.time for recorded in session if recorded.sender == SERVER and recorded.is_response
+        }
+
+    def play(self) -> ReplayReport:
+        """Replays the session and waits for the server to exit."""
+        return asyncio.run(self.play_async())
+
+    async def play_async(self) -> ReplayReport:
+        env = dict(
+            os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(PACKAGE_PARENT_DIR), os.environ.get("PYTHONPATH")]))
+        )
+        with tempfile.TemporaryDirectory(prefix="galaxyls-replay-") as cwd:
+            process = await asyncio.create_subprocess_exec(
+                *self.server_command,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+                cwd=cwd,
+                env=env,
+            )
+            assert process.stdin and process.stdout
+            metrics = SessionMetrics()
+            reader = asyncio.ensure_future(self._read_messages(process.stdin, process.stdout, metrics))
+            try:
+                duration = await self._send_messages(process.stdin, metrics)
+                server = await self._request(
+                    process.stdin, STATS_REQUEST_ID, "workspace/executeCommand", {"command": Commands.STATS, "arguments": []}
+                )
+                await self._request(process.stdin, SHUTDOWN_REQUEST_ID, SHUTDOWN, None)
+                write_message(process.stdin, {"jsonrpc": "2.0", "method": EXIT})
+                await asyncio.wait_for(process.wait(), self.timeout)
+            finally:
+                reader.cancel()
+                if process.returncode is None:
+                    process.kill()
+        requests = metrics.latencies.get_summaries()
+        server_summaries = [LatencySummary(**summary) for summary in server.get("result") or []]
+        return ReplayReport(
+            duration=round(duration, 3),
+            requests=requests,
+            recorded=SessionMetrics.from_session(self.session).latencies.get_summaries(),
+            server=server_summaries,
+            queueing=get_queueing_delays(requests, server_summaries),
+            diagnostics=metrics.churn,
+        )
+
+    async def _send_messages(self, stdin: asyncio.StreamWriter, metrics: SessionMetrics) -> float:
+        start = time.perf_counter()
+        session_start = start
+        for recorded in self.session:
+            if recorded.sender != CLIENT or recorded.is_response or recorded.method in (SHUTDOWN, EXIT):
+                continue
+            if self.speed > 0:
+                await asyncio.sleep(session_start + recorded.time / self.speed - time.perf_counter())
+            message = self._prepare_message(recorded.message)
+            future = None
+            if recorded.is_request:
+                future = self._futures[message["id"]] = asyncio.get_running_loop().create_future()
+            metrics.on_client_message(message, time.perf_counter())
+            write_message(stdin, message)
+            await stdin.drain()
+            if future and recorded.method == INITIALIZE:
+                # Like the clients, wait until the server has started and is initialized before sending anything else
+                await asyncio.wait_for(future, self.timeout)
+                start = time.perf_counter()
+                session_start = start - self._response_times.get(recorded.id, recorded.time) / (self.speed or 1)
+        if self._futures:
+            await asyncio.wait(list(self._futures.values()), timeout=self.timeout)
+        duration = time.perf_counter() - start
+        await asyncio.sleep(self.settle)
+        return duration
+
+    async def _request(self, stdin: asyncio.StreamWriter, id: str, method: str, params: Any) -> dict[str, Any]:
+        future = self._futures[id] = asyncio.get_running_loop().create_future()
+        write_message(stdin, {"jsonrpc": "2.0", "id": id, "method": method, "params": params})
+        await stdin.drain()
+        return await asyncio.wait_for(future, self.timeout)
+
+    async def _read_messages(self, stdin: asyncio.StreamWriter, stdout: asyncio.StreamReader, metrics: SessionMetrics) -> None:
+        while (message := await read_message(stdout)) is not None:
+            metrics.on_server_message(message, time.perf_counter())
+            method = message.get("method")
+            if method is None:
+                future = self._futures.pop(message.get("id"), None)
+                if future and not future.done():
+                    future.set_result(message)
+            elif "id" in message:
+                responses = self._client_responses.get(method)
+                result = responses.popleft() if responses else None
+                write_message(stdin, {"jsonrpc": "2.0", "id": message["id"], "result": result})
+
+    def _prepare_message(self, message: dict[str, Any]) -> dict[str, Any]:
+        if self.root_uri is None or message.get("method") != INITIALIZE:
+            return message
+        params = dict(message["params"], rootUri=self.root_uri, rootPath=to_fs_path(self.root_uri))
+        if params.get("workspaceFolders"):
+            params["workspaceFolders"] = [{"uri": self.root_uri, "name": Path(params["rootPath"]).name}]
+        return dict(message, params=params)
+
+    def _get_client_responses(self) -> dict[str, deque]:
+        """Gets the results of the responses of the client to every kind of server request in order."""
+        methods: dict[int | str | None, str] = {
+            recorded.id: recorded.method
+            for recorded in self.session
+            if recorded.sender == SERVER and recorded.is_request and recorded.method
+        }
+        responses: dict[str, deque] = {}
+        for recorded in self.session:
+            if recorded.sender == CLIENT and recorded.is_response and recorded.id in methods:
+                responses.setdefault(methods[recorded.id], deque()).append(recorded.message.get("result"))
+        return responses
+
+
+def get_queueing_delays(requests: list[LatencySummary], server: list[LatencySummary]) -> dict[str, float]:
+    """Gets the mean time every kind of request spent outside of its handler in the server.
+
+    It is the difference between the mean latency seen by the client and the mean time spent
+    in the server handler, so it includes the time waiting for other messages to be handled
+    and the time to transfer, parse and serialize the messages."""
+    handled = {summary.name: summary.mean for summary in server}
+    return {
+        summary.name: round(max(0.0, summary.mean - handled[summary.name]), 3)
+        for summary in requests
+        if summary.name in handled
+    }
+
+
+def write_message(stdin: asyncio.StreamWriter, message: dict[str, Any]) -> None:
+    body = json.dumps(message).encode("utf-8")
+    stdin.write(f"Content-Length: {len(body)}\r\n\r\n".encode("ascii") + body)
+
+
+async def read_message(stdout: asyncio.StreamReader) -> dict[str, Any] | None:
+    """Reads the next message sent by the server or returns None when the server closes the output."""
+    content_length = 0
+    while line := await stdout.readline():
+        line = line.strip()
+        if not line:
+            if content_length:
+                return json.loads(await stdout.readexactly(content_length))
+        elif line.lower().startswith(b"content-length:"):
+            content_length = int(line.split(b":", 1)[1])
+    return None
@@ -0,0 +1,101 @@
+"""Recording of the JSON-RPC messages exchanged between a client and the language server.
+
+A session is stored as JSON lines, one per message, with the seconds elapsed since the
+start of the recording, the side that sent the message (`client` or `server`) and the
+message itself:
+
+    {"time": 0.0312, "sender": "client", "message": {"jsonrpc": "2.0", "id": 1, "method": "initialize", ...}}
+"""
+
+import json
+import threading
+import time
+from pathlib import Path
+from typing import (
+    Any,
+    TextIO,
+)
+
+import attrs
+from pygls.protocol import JsonRPCProtocol
+
+CLIENT = "client"
+SERVER = "server"
+PROTOCOL_ATTRIBUTES = ("handle_message", "_send_data", "_converter", "_serialize_message")
+"""The attributes of the pygls protocol used to record the messages, most of them private."""
+
+
+@attrs.define
+class RecordedMessage:
+    """A JSON-RPC message of a recorded session."""
+
+    time: float
+    """Seconds since the start of the recording."""
+    sender: str
+    message: dict[str, Any]
+
+    @property
+    def method(self) -> str | None:
+        return self.message.get("method")
+
+    @property
+    def id(self) -> int | str | None:
+        return self.message.get("id")
+
+    @property
+    def is_request(self) -> bool:
+        return "method" in self.message and "id" in self.message
+
+    @property
+    def is_response(self) -> bool:
+        return "method" not in self.message and "id" in self.message
+
+
+class SessionRecorder:
+    """Records all the messages received and sent by the protocol of a language server.
+
+    The messages are written to the file as they are exchanged, so the recording of a
+    session is preserved even if the server does not shut down cleanly.
+    """
+
+    def __init__(self, file: TextIO) -> None:
+        self.file = file
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def attach(self, protocol: JsonRPCProtocol) -> None:
+        """Starts recording the messages handled and sent by the given protocol."""
+        handle_message = protocol.handle_message
+        send_data = protocol._send_data
+
+        def recording_handle_message(message: Any) -> None:
+            self._write(CLIENT, json.dumps(protocol._converter.unstructure(message)))
+            handle_message(message)
+
+        def recording_send_data(data: Any) -> None:
+            if data:
+                self._write(SERVER, json.dumps(data, default=protocol._serialize_message))
+            send_data(data)
+
+        # The handlers are replaced in the instance as the server protocol is created before parsing the arguments
+        setattr(protocol, "handle_message", recording_handle_message)
+        setattr(protocol, "_send_data", recording_send_data)
+
+    def close(self) -> None:
+        """Closes the file. The messages exchanged afterwards, while the server shuts down, are not recorded."""
+        with self._lock:
+            self.file.close()
+
+    def _write(self, sender: str, message: str) -> None:
+        elapsed = time.perf_counter() - self._start
+        with self._lock:
+            if self.file.closed:
+                return
+            self.file.write(f'{{"time": {elapsed:.6f}, "sender": "{sender}", "message": {message}}}\n')
+            self.file.flush()
+
+
+def read_session(path: Path) -> list[RecordedMessage]:
+    """Reads the messages of a session recorded by `SessionRecorder`."""
+    with path.open(encoding="utf-8") as file:
+        return [RecordedMessage(**json.loads(line)) for line in file if line.strip()]
@@ -1,10 +1,19 @@
 """Galaxy Tools Language Server implementation"""
 
+import asyncio
+import logging
+import uuid
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
 from lsprotocol.types import (
+    COMPLETION_ITEM_RESOLVE,
     INITIALIZED,
     TEXT_DOCUMENT_CODE_ACTION,
     TEXT_DOCUMENT_COMPLETION,
     TEXT_DOCUMENT_DEFINITION,
+    TEXT_DOCUMENT_DID_CHANGE,
     TEXT_DOCUMENT_DID_CLOSE,
     TEXT_DOCUMENT_DID_OPEN,
     TEXT_DOCUMENT_DID_SAVE,
@@ -12,11 +21,17 @@ from lsprotocol.types import (
     TEXT_DOCUMENT_DOCUMENT_SYMBOL,
     TEXT_DOCUMENT_FORMATTING,
     TEXT_DOCUMENT_HOVER,
+    TEXT_DOCUMENT_PREPARE_RENAME,
+    TEXT_DOCUMENT_REFERENCES,
+    TEXT_DOCUMENT_RENAME,
     WORKSPACE_DID_CHANGE_CONFIGURATION,
+    WORKSPACE_DID_CHANGE_WATCHED_FILES,
+    WORKSPACE_SYMBOL,
     CodeAction,
     CodeActionKind,
     CodeActionOptions,
     CodeActionParams,
+    CompletionItem,
     CompletionList,
     CompletionOptions,
     CompletionParams,
@@ -24,6 +39,9 @@ from lsprotocol.types import (
     ConfigurationParams,
     Diagnostic,
     DidChangeConfigurationParams,
+    DidChangeTextDocumentParams,
+    DidChangeWatchedFilesParams,
+    DidChangeWatchedFilesRegistrationOptions,
     DidCloseTextDocumentParams,
     DidOpenTextDocumentParams,
     DidSaveTextDocumentParams,
@@ -32,31 +50,64 @@ from lsprotocol.types import (
     DocumentLinkParams,
     DocumentSymbol,
     DocumentSymbolParams,
+    FileSystemWatcher,
     Hover,
     InitializeParams,
     Location,
     LogMessageParams,
     MessageType,
+    PrepareRenameParams,
+    PrepareRenamePlaceholder,
     PublishDiagnosticsParams,
+    ReferenceParams,
+    Registration,
+    RegistrationParams,
+    RenameParams,
     ShowMessageParams,
     TextDocumentIdentifier,
     TextDocumentPositionParams,
     TextEdit,
+    WorkDoneProgressBegin,
+    WorkDoneProgressEnd,
+    WorkDoneProgressReport,
+    WorkspaceEdit,
+    WorkspaceSymbol,
+    WorkspaceSymbolParams,
+)
+from pygls.exceptions import (
+    JsonRpcContentModified,
+    JsonRpcInvalidParams,
 )
 from pygls.lsp.server import LanguageServer
 from pygls.workspace import TextDocument
 
 from galaxyls.config import CompletionMode, GalaxyToolsConfiguration
 from galaxyls.constants import Commands
+from galaxyls.memory import MemoryUsage
+from galaxyls.profiling import (
+    SamplingProfiler,
+    get_default_profile_path,
+)
 from galaxyls.services.language import GalaxyToolLanguageService
+from galaxyls.services.scheduler import (
+    DIAGNOSTICS_DEBOUNCE_DELAY,
+    DiagnosticsScheduler,
+)
+from galaxyls.services.tools.workspace import StaleIndexError
 from galaxyls.services.validation import DocumentValidator
 from galaxyls.services.xml.document import XmlDocument
-from galaxyls.services.xml.parser import XmlDocumentParser
+from galaxyls.stats import (
+    F,
+    LatencySummary,
+    latency_stats,
+    timed,
+)
 from galaxyls.types import (
     AutoCloseTagResult,
     GeneratedExpandedDocument,
     GeneratedSnippetResult,
     ParamReferencesResult,
+    ProfileResult,
     ReplaceTextRangeResult,
     TestSuiteInfoResult,
     WorkspaceEditResult,
@@ -65,6 +116,10 @@ from galaxyls.utils import convert_to
 from galaxyls.version import GLS_VERSION
 
 GLS_NAME = "galaxy-tools-language-server"
+WATCHED_FILES_GLOB_PATTERN = "**/*.xml"
+INDEXING_PROGRESS_TITLE = "Indexing Galaxy tools"
+
+logger = logging.getLogger(__name__)
 
 
 class GalaxyToolsLanguageServer(LanguageServer):
@@ -72,8 +127,43 @@ class GalaxyToolsLanguageServer(LanguageServer):
 
     def __init__(self) -> None:
         super().__init__(name=GLS_NAME, version=GLS_VERSION)
-        self.service = GalaxyToolLanguageService()
+        self.storage_dir: Path | None = None
+        """Directory where the service persists the data it builds between sessions, set when the server is started."""
+        self._service: GalaxyToolLanguageService | None = None
         self.configuration: GalaxyToolsConfiguration = GalaxyToolsConfiguration()
+        self.diagnostics_scheduler = DiagnosticsScheduler()
+        self.indexing_task: asyncio.Future | None = None
+        self.stats_log_interval: float = 0
+        """Seconds between the dumps of the latency statistics to the log, 0 to never dump them."""
+        self.stats_task: asyncio.Future | None = None
+        self.profiler = SamplingProfiler()
+        self.profile_path: Path | None = None
+        """File where the sampled stacks are written when the profiler stops, by default a new temporary file."""
+
+    @property
+    def service(self) -> GalaxyToolLanguageService:
+        """The language service, created the first time it is used so it uses the `storage_dir` of the started server."""
+        if self._service is None:
+            self._service = GalaxyToolLanguageService(storage_dir=self.storage_dir)
+        return self._service
+
+    def feature(self, feature_name: str, options: Any | None = None) -> Callable[[F], F]:
+        """Registers the handler of a LSP feature recording the latency of every call."""
+        register = super().feature(feature_name, options)
+        return lambda handler: register(timed(feature_name, handler))
+
+    def command(self, command_name: str) -> Callable[[F], F]:
+        """Registers the handler of a custom command recording the latency of every call."""
+        register = super().command(command_name)
+        return lambda handler: register(timed(command_name, handler))
+
+    def stop_profiling(self) -> ProfileResult:
+        """Stops the profiler and writes the sampled stacks to the profile file."""
+        self.profiler.stop()
+        path = self.profile_path or get_default_profile_path()
+        self.profiler.write(path)
+        logger.info("Profile with %d samples written to %s", self.profiler.samples, path)
+        return ProfileResult(path=str(path), samples=self.profiler.samples)
 
 
 language_server = GalaxyToolsLanguageServer()
@@ -92,6 +182,7 @@ async def _load_client_config_async(server: GalaxyToolsLanguageServer) -> None:
         )
         if config and config[0]:
             server.configuration = convert_to(config[0], GalaxyToolsConfiguration)
+            server.service.set_memory_budget(server.configuration.server.memory_budget)
     except BaseException as err:
         server.window_log_message(LogMessageParams(type=MessageType.Error, message=f"Error loading configuration: {err}"))
         server.window_show_message(
@@ -104,6 +195,101 @@ async def initialized(server: GalaxyToolsLanguageServer, params: InitializeParam
     """Loads the client configuration after initialization."""
     await _load_client_config_async(server)
     server.service.set_workspace(server.workspace)
+    await _register_watched_files_async(server)
+    server.indexing_task = asyncio.ensure_future(_index_workspace_async(server))
+    if server.stats_log_interval > 0:
+        server.stats_task = asyncio.ensure_future(_log_stats_periodically_async(server))
+
+
+async def _log_stats_periodically_async(server: GalaxyToolsLanguageServer) -> None:
+    """Dumps the latency statistics to the log every `stats_log_interval` seconds."""
+    while True:
+        await asyncio.sleep(server.stats_log_interval)
+        logger.info("Latency statistics (milliseconds):\n%s", latency_stats.format_summaries())
+
+
+async def _index_workspace_async(server: GalaxyToolsLanguageServer) -> None:
+    """Builds the index of the tools in the workspace in a worker thread.
+
+    The progress is reported to the client if it supports server initiated progress."""
+    workspace_index = server.service.workspace_index
+    if workspace_index is None:
+        return
+    token = await _create_progress_async(server)
+    loop = asyncio.get_running_loop()
+    reported_percentage = -1
+
+    def on_progress(done: int, total: int) -> None:
+        nonlocal reported_percentage
+        percentage = done * 100 // total
+        if token is not None and percentage != reported_percentage:
+            reported_percentage = percentage
+            report = WorkDoneProgressReport(message=f"{done}/{total} files", percentage=percentage)
+            loop.call_soon_threadsafe(server.work_done_progress.report, token, report)
+
+    if token is not None:
+        server.work_done_progress.begin(token, WorkDoneProgressBegin(title=INDEXING_PROGRESS_TITLE, percentage=0))
+    message = None
+    try:
+        await asyncio.to_thread(workspace_index.build, on_progress)
+        message = f"{len(workspace_index)} tool and macro files indexed"
+    except BaseException as err:
+        message = "Unable to index the workspace"
+        server.window_log_message(LogMessageParams(type=MessageType.Warning, message=f"{message}: {err}"))
+    finally:
+        if token is not None:
+            server.work_done_progress.end(token, WorkDoneProgressEnd(message=message))
+
+
+async def _refresh_workspace_index_async(server: GalaxyToolsLanguageServer) -> None:
+    """Indexes again, in a background thread, the workspace files changed since they were indexed.
+
+    Files can be changed without any notification, so the features using the workspace index check them first."""
+    await asyncio.to_thread(server.service.refresh_workspace_index)
+
+
+async def _create_progress_async(server: GalaxyToolsLanguageServer) -> str | None:
+    """Asks the client to create a progress token and returns it or None if the client does not support it."""
+    capabilities = server.client_capabilities.window
+    if not capabilities or not capabilities.work_done_progress:
+        return None
+    token = str(uuid.uuid4())
+    try:
+        await server.work_done_progress.create_async(token)
+    except BaseException:
+        return None
+    return token
+
+
+async def _register_watched_files_async(server: GalaxyToolsLanguageServer) -> None:
+    """Asks the client to notify changes in the XML files of the workspace if it supports dynamic registration."""
+    capabilities = server.client_capabilities.workspace
+    watched_files = capabilities.did_change_watched_files if capabilities else None
+    if not watched_files or not watched_files.dynamic_registration:
+        return
+    try:
+        await server.client_register_capability_async(
+            RegistrationParams(
+                registrations=[
+                    Registration(
+                        id=WORKSPACE_DID_CHANGE_WATCHED_FILES,
+                        method=WORKSPACE_DID_CHANGE_WATCHED_FILES,
+                        register_options=DidChangeWatchedFilesRegistrationOptions(
+                            watchers=[FileSystemWatcher(glob_pattern=WATCHED_FILES_GLOB_PATTERN)]
+                        ),
+                    )
+                ]
+            )
+        )
+    except BaseException as err:
+        server.window_log_message(LogMessageParams(type=MessageType.Warning, message=f"Unable to watch files: {err}"))
+
+
+@language_server.feature(WORKSPACE_DID_CHANGE_WATCHED_FILES)
+def did_change_watched_files(server: GalaxyToolsLanguageServer, params: DidChangeWatchedFilesParams) -> None:
+    """Occurs when files in the workspace are created, changed or deleted outside the editor."""
+    for change in params.changes:
+        server.service.notify_file_changed(change.uri)
 
 
 @language_server.feature(WORKSPACE_DID_CHANGE_CONFIGURATION)
@@ -113,24 +299,30 @@ async def did_change_configuration(server: GalaxyToolsLanguageServer, params: Di
     server.window_show_message(ShowMessageParams(type=MessageType.Info, message="Settings updated"))
 
 
-@language_server.feature(TEXT_DOCUMENT_COMPLETION, CompletionOptions(trigger_characters=["<", " "]))
+@language_server.feature(TEXT_DOCUMENT_COMPLETION, CompletionOptions(trigger_characters=["<", " "], resolve_provider=True))
 def completions(server: GalaxyToolsLanguageServer, params: CompletionParams) -> CompletionList | None:
     """Returns completion items depending on the current document context."""
     if server.configuration.completion.mode == CompletionMode.DISABLED:
         return None
     document = _get_valid_document(server, params.text_document.uri)
     if document:
-        xml_document = _get_xml_document(document)
+        xml_document = _get_xml_document(server, document)
         return server.service.get_completion(xml_document, params, server.configuration.completion.mode)
     return None
 
 
+@language_server.feature(COMPLETION_ITEM_RESOLVE)
+def completion_item_resolve(server: GalaxyToolsLanguageServer, params: CompletionItem) -> CompletionItem:
+    """Adds the documentation to the completion item selected in the client."""
+    return server.service.resolve_completion_item(params)
+
+
 @language_server.feature(TEXT_DOCUMENT_HOVER)
 def hover(server: GalaxyToolsLanguageServer, params: TextDocumentPositionParams) -> Hover | None:
     """Displays Markdown documentation for the element under the cursor."""
     document = _get_valid_document(server, params.text_document.uri)
     if document:
-        xml_document = _get_xml_document(document)
+        xml_document = _get_xml_document(server, document)
         return server.service.get_documentation(xml_document, params.position)
     return None
 
@@ -150,18 +342,32 @@ async def did_open(server: GalaxyToolsLanguageServer, params: DidOpenTextDocumen
     """Occurs when a new xml document is open."""
     document = server.workspace.get_text_document(params.text_document.uri)
     if not DocumentValidator.is_empty_document(document):
-        _validate(server, params)
+        _validate(server, params.text_document.uri)
+
+
+@language_server.feature(TEXT_DOCUMENT_DID_CHANGE)
+def did_change(server: GalaxyToolsLanguageServer, params: DidChangeTextDocumentParams) -> None:
+    """Occurs when the xml document content changes."""
+    document = _get_valid_document(server, params.text_document.uri)
+    if document:
+        server.service.xml_document_cache.update(document, params.content_changes)
+    server.service.notify_file_changed(params.text_document.uri)
+    _validate(server, params.text_document.uri, delay=DIAGNOSTICS_DEBOUNCE_DELAY)
 
 
 @language_server.feature(TEXT_DOCUMENT_DID_SAVE)
 def did_save(server: GalaxyToolsLanguageServer, params: DidSaveTextDocumentParams) -> None:
     """Occurs when the xml document is saved to disk."""
-    _validate(server, params)
+    server.service.notify_file_changed(params.text_document.uri)
+    _validate(server, params.text_document.uri)
 
 
 @language_server.feature(TEXT_DOCUMENT_DID_CLOSE)
 def did_close(server: GalaxyToolsLanguageServer, params: DidCloseTextDocumentParams) -> None:
     """Occurs when the xml document is closed."""
+    server.service.xml_document_cache.evict(params.text_document.uri)
+    server.service.notify_file_changed(params.text_document.uri)
+    server.diagnostics_scheduler.cancel(params.text_document.uri)
     server.text_document_publish_diagnostics(PublishDiagnosticsParams(uri=params.text_document.uri, diagnostics=[]))
 
 
@@ -170,16 +376,54 @@ def definition(server: GalaxyToolsLanguageServer, params: TextDocumentPositionPa
     """Provides the location of a symbol definition."""
     document = _get_valid_document(server, params.text_document.uri)
     if document:
-        xml_document = _get_xml_document(document)
+        xml_document = _get_xml_document(server, document)
         return server.service.go_to_definition(xml_document, params.position)
     return None
 
 
+@language_server.feature(TEXT_DOCUMENT_REFERENCES)
+async def references(server: GalaxyToolsLanguageServer, params: ReferenceParams) -> list[Location] | None:
+    """Provides the locations where the macro or token under the cursor is used in the workspace."""
+    await _refresh_workspace_index_async(server)
+    document = _get_valid_document(server, params.text_document.uri)
+    if document:
+        xml_document = _get_xml_document(server, document)
+        return server.service.find_references(xml_document, params.position, params.context.include_declaration)
+    return None
+
+
+@language_server.feature(TEXT_DOCUMENT_PREPARE_RENAME)
+async def prepare_rename(server: GalaxyToolsLanguageServer, params: PrepareRenameParams) -> PrepareRenamePlaceholder | None:
+    """Checks if the symbol under the cursor is a macro or token that can be renamed."""
+    await _refresh_workspace_index_async(server)
+    document = _get_valid_document(server, params.text_document.uri)
+    if document:
+        xml_document = _get_xml_document(server, document)
+        return server.service.prepare_rename(xml_document, params.position)
+    return None
+
+
+@language_server.feature(TEXT_DOCUMENT_RENAME)
+async def rename(server: GalaxyToolsLanguageServer, params: RenameParams) -> WorkspaceEdit | None:
+    """Renames the macro or token under the cursor in all the tools and macro files of the workspace."""
+    await _refresh_workspace_index_async(server)
+    document = _get_valid_document(server, params.text_document.uri)
+    if document:
+        xml_document = _get_xml_document(server, document)
+        try:
+            return server.service.rename(xml_document, params.position, params.new_name)
+        except ValueError as error:
+            raise JsonRpcInvalidParams(str(error)) from error
+        except StaleIndexError as error:
+            raise JsonRpcContentModified(str(error)) from error
+    return None
+
+
 @language_server.feature(TEXT_DOCUMENT_DOCUMENT_LINK)
 def document_link(server: GalaxyToolsLanguageServer, params: DocumentLinkParams) -> list[DocumentLink]:
     document = _get_valid_document(server, params.text_document.uri)
     if document:
-        xml_document = _get_xml_document(document)
+        xml_document = _get_xml_document(server, document)
         return server.service.link_provider.get_document_links(xml_document)
     return []
 
@@ -196,7 +440,7 @@ def process_code_actions(server: GalaxyToolsLanguageServer, params: CodeActionPa
     document = _get_valid_document(server, params.text_document.uri)
     if document is None:
         return None
-    xml_document = _get_xml_document(document)
+    xml_document = _get_xml_document(server, document)
     return server.service.get_available_refactoring_actions(xml_document, params)
 
 
@@ -205,18 +449,25 @@ def document_symbol(server: GalaxyToolsLanguageServer, params: DocumentSymbolPar
     """Returns a list of symbols defined in the document."""
     document = _get_valid_document(server, params.text_document.uri)
     if document:
-        xml_document = _get_xml_document(document)
+        xml_document = _get_xml_document(server, document)
         return server.service.symbols_provider.get_document_symbols(xml_document)
     return None
 
 
+@language_server.feature(WORKSPACE_SYMBOL)
+async def workspace_symbol(server: GalaxyToolsLanguageServer, params: WorkspaceSymbolParams) -> list[WorkspaceSymbol] | None:
+    """Returns the symbols defined in the tools and macro files of the workspace matching the query."""
+    await _refresh_workspace_index_async(server)
+    return server.service.get_workspace_symbols(params.query)
+
+
 @language_server.command(Commands.AUTO_CLOSE_TAGS)
 def auto_close_tag(server: GalaxyToolsLanguageServer, params: TextDocumentPositionParams) -> AutoCloseTagResult | None:
     """Responds to a close tag request to close the currently opened node."""
     if server.configuration.completion.auto_close_tags:
         document = _get_valid_document(server, params.text_document.uri)
         if document:
-            xml_document = _get_xml_document(document)
+            xml_document = _get_xml_document(server, document)
             return server.service.get_auto_close_tag(xml_document, params.position)
     return None
 
@@ -261,7 +512,7 @@ def sort_single_param_attrs_command(
     """Sorts the attributes of the param element under the cursor."""
     document = _get_valid_document(server, params.text_document.uri)
     if document:
-        xml_document = _get_xml_document(document)
+        xml_document = _get_xml_document(server, document)
         return server.service.sort_single_param_attrs(xml_document, params.position)
     return None
 
@@ -273,7 +524,7 @@ def sort_document_params_attrs_command(
     """Sorts the attributes of all the param elements contained in the document."""
     document = _get_valid_document(server, params.uri)
     if document:
-        xml_document = _get_xml_document(document)
+        xml_document = _get_xml_document(server, document)
         return server.service.sort_document_param_attributes(xml_document)
     return None
 
@@ -283,15 +534,46 @@ def generate_expanded_command(server: GalaxyToolsLanguageServer, params: TextDoc
     """Generates a expanded version (with all macros replaced) of the tool document."""
     document = server.workspace.get_text_document(params.uri)
     if document and DocumentValidator.is_tool_document(document):
-        return server.service.macro_expander.generate_expanded_from(document.path)
+        xml_document = _get_xml_document(server, document)
+        return server.service.macro_expander.generate_expanded_from(xml_document)
     return GeneratedExpandedDocument(errorMessage=f"The document {document.filename} is not a valid Galaxy Tool wrapper.")
 
 
+@language_server.command(Commands.STATS)
+def stats_command(server: GalaxyToolsLanguageServer) -> list[LatencySummary]:
+    """Returns the latency statistics of all the handlers and operations of the server."""
+    return latency_stats.get_summaries()
+
+
+@language_server.command(Commands.MEMORY_USAGE)
+def memory_usage_command(server: GalaxyToolsLanguageServer) -> MemoryUsage:
+    """Returns the estimated memory used by every cache of the server."""
+    return server.service.get_memory_usage()
+
+
+@language_server.command(Commands.START_PROFILING)
+def start_profiling_command(server: GalaxyToolsLanguageServer) -> ProfileResult:
+    """Starts sampling the stacks of the server until the profiling is stopped."""
+    if server.profiler.is_running:
+        return ProfileResult(errorMessage="The profiler is already running.")
+    server.profiler.start()
+    return ProfileResult()
+
+
+@language_server.command(Commands.STOP_PROFILING)
+def stop_profiling_command(server: GalaxyToolsLanguageServer) -> ProfileResult:
+    """Stops the profiler and returns the file where the sampled stacks were written."""
+    if not server.profiler.is_running:
+        return ProfileResult(errorMessage="The profiler is not running.")
+    return server.stop_profiling()
+
+
 @language_server.command(Commands.DISCOVER_TESTS_IN_WORKSPACE)
-def discover_tests_in_workspace_command(
+async def discover_tests_in_workspace_command(
     server: GalaxyToolsLanguageServer,
 ) -> list[TestSuiteInfoResult]:
     """Returns a list of test suites, one for each tool file in the workspace."""
+    await _refresh_workspace_index_async(server)
     return server.service.test_discovery_service.discover_tests_in_workspace(server.workspace)
 
 
@@ -302,7 +584,7 @@ def discover_tests_in_document_command(
     """Returns a test suite containing all tests for a particular XML tool document."""
     document = _get_valid_document(server, params.uri)
     if document:
-        xml_document = _get_xml_document(document)
+        xml_document = _get_xml_document(server, document)
         return server.service.test_discovery_service.discover_tests_in_document(xml_document)
     return None
 
@@ -314,7 +596,7 @@ async def cmd_insert_param_reference(
     """Provides a list of possible parameter references to be inserted in the command section of the document."""
     document = _get_valid_document(server, params.uri)
     if document:
-        xml_document = _get_xml_document(document)
+        xml_document = _get_xml_document(server, document)
         return server.service.param_references_provider.get_param_command_references(xml_document)
     return None
 
@@ -326,22 +608,41 @@ async def cmd_insert_param_filter_reference(
     """Provides a list of possible parameter references to be inserted as output filters."""
     document = _get_valid_document(server, params.uri)
     if document:
-        xml_document = _get_xml_document(document)
+        xml_document = _get_xml_document(server, document)
         return server.service.param_references_provider.get_param_filter_references(xml_document)
     return None
 
 
-def _validate(server: GalaxyToolsLanguageServer, params) -> None:
-    """Validates the Galaxy tool and reports any problem found."""
-    diagnostics: list[Diagnostic] = []
-    document = _get_valid_document(server, params.text_document.uri)
-    if document:
-        xml_document = _get_xml_document(document)
-        try:
-            diagnostics = server.service.get_diagnostics(xml_document)
-        except Exception as e:
-            server.window_log_message(LogMessageParams(type=MessageType.Error, message=f"Error validating document: {e}"))
-    server.text_document_publish_diagnostics(PublishDiagnosticsParams(uri=params.text_document.uri, diagnostics=diagnostics))
+def _validate(server: GalaxyToolsLanguageServer, uri: str, delay: float = 0.0) -> None:
+    """Schedules the validation of the Galaxy tool to report any problem found.
+
+    The validation runs in the background after the given delay (in seconds). Any previously
+    scheduled validation of the same document is cancelled."""
+    document = _get_valid_document(server, uri)
+    if document is None:
+        server.diagnostics_scheduler.cancel(uri)
+        server.text_document_publish_diagnostics(PublishDiagnosticsParams(uri=uri, diagnostics=[]))
+        return
+
+    # The validation runs in another thread while the following changes update the cached
+    # syntax tree, so it uses a version of the tree that is never modified
+    xml_document = server.service.get_xml_document_snapshot(document)
+    version = document.version
+
+    def publish(diagnostics: list[Diagnostic]) -> None:
+        server.text_document_publish_diagnostics(PublishDiagnosticsParams(uri=uri, diagnostics=diagnostics, version=version))
+
+    def on_error(error: Exception) -> None:
+        server.window_log_message(LogMessageParams(type=MessageType.Error, message=f"Error validating document: {error}"))
+        publish([])
+
+    server.diagnostics_scheduler.schedule(
+        uri,
+        compute=lambda: server.service.get_diagnostics(xml_document),
+        publish=publish,
+        on_error=on_error,
+        delay=delay,
+    )
 
 
 def _get_valid_document(server: GalaxyToolsLanguageServer, uri: str) -> TextDocument | None:
@@ -351,10 +652,11 @@ def _get_valid_document(server: GalaxyToolsLanguageServer, uri: str) -> TextDocu
     return None
 
 
-def _get_xml_document(document: TextDocument) -> XmlDocument:
-    """Parses the input TextDocument and returns an XmlDocument."""
-    xml_document = XmlDocumentParser().parse(document)
-    return xml_document
+def _get_xml_document(server: GalaxyToolsLanguageServer, document: TextDocument) -> XmlDocument:
+    """Returns the parsed XmlDocument for the current version of the input TextDocument.
+
+    The syntax tree is shared by all the requests for the same document version."""
+    return server.service.get_xml_document(document)
 
 
 def _is_document_supported(document: TextDocument) -> bool:
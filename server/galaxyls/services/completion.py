@@ -1,6 +1,7 @@
 """Module in charge of the auto-completion feature."""
 
 from typing import (
+    Any,
     cast,
 )
 
@@ -29,6 +30,7 @@ from .xsd.parser import (
     XsdNode,
     XsdTree,
 )
+from .xsd.types import XsdBase
 
 
 class XmlCompletionService:
@@ -112,7 +114,7 @@ class XmlCompletionService:
                 if attr_name in existing_attr_names:
                     continue
                 attr = context.xsd_element.attributes[attr_name]
-                result.append(self._build_attribute_completion_item(attr, len(result)))
+                result.append(self._build_attribute_completion_item(attr, context.xsd_element, len(result)))
             if context.node.name == "expand":
                 element = cast(XmlElement, context.node)
                 macro_name = element.get_attribute_value("macro")
@@ -134,6 +136,24 @@ class XmlCompletionService:
                         )
         return CompletionList(items=result, is_incomplete=False)
 
+    def resolve_completion_item(self, item: CompletionItem) -> CompletionItem:
+        """Adds the documentation from the XSD schema to a completion item of a node or attribute.
+
+        The completion lists do not include the documentation of each item, the client
+        requests it only for the items it displays.
+
+        Args:
+            item (CompletionItem): The completion item returned by this service.
+
+        Returns:
+            CompletionItem: The same completion item with the documentation if it is available.
+        """
+        if item.documentation is None:
+            element = self._find_completion_item_element(item.data)
+            if element is not None:
+                item.documentation = element.get_doc()
+        return item
+
     def get_attribute_value_completion(self, context: XmlContext) -> CompletionList:
         """Gets a list of possible values for an enumeration restricted attribute if exists.
 
@@ -207,17 +227,18 @@ class XmlCompletionService:
         return CompletionItem(
             label=node.name,
             kind=CompletionItemKind.Class,
-            documentation=node.get_doc(),
             sort_text=str(order).zfill(2),
+            data={"node": get_node_stack(node)},
         )
 
-    def _build_attribute_completion_item(self, attr: XsdAttribute, order: int = 0) -> CompletionItem:
+    def _build_attribute_completion_item(self, attr: XsdAttribute, node: XsdNode, order: int = 0) -> CompletionItem:
         """Generates a completion item with the information about the
         given attribute definition.
 
         Args:
             attr (XsdAttribute): The attribute definition used to build the
             completion item.
+            node (XsdNode): The node definition the attribute belongs to.
             order (int): The position for ordering this item.
 
         Returns:
@@ -231,8 +252,22 @@ class XmlCompletionService:
         return CompletionItem(
             label=attr.name,
             kind=CompletionItemKind.Variable,
-            documentation=attr.get_doc(),
             insert_text=f'{attr.name}="{value_placeholder}"',
             insert_text_format=InsertTextFormat.Snippet,
             sort_text=str(order).zfill(2),
+            data={"node": get_node_stack(node), "attribute": attr.name},
         )
+
+    def _find_completion_item_element(self, data: Any) -> XsdBase | None:
+        if not isinstance(data, dict) or not isinstance(data.get("node"), list):
+            return None
+        node = self.xsd_tree.find_node_by_stack(data["node"])
+        attribute_name = data.get("attribute")
+        if node is None or attribute_name is None:
+            return node
+        return node.attributes.get(attribute_name)
+
+
+def get_node_stack(node: XsdNode) -> list[str]:
+    """Gets the names of the node definitions from the root of the tree to the given node."""
+    return [ancestor.name for ancestor in node.path]
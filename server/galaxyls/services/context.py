@@ -17,11 +17,14 @@ from galaxyls.services.xml.nodes import (
     XmlSyntaxNode,
 )
 from galaxyls.services.xml.types import NodeType
-from galaxyls.services.xml.utils import convert_document_offsets_to_range
 from galaxyls.services.xsd.types import (
     XsdNode,
     XsdTree,
 )
+from galaxyls.stats import (
+    XSD_MATCH,
+    measure,
+)
 
 
 class XmlContext:
@@ -137,7 +140,7 @@ class XmlContext:
     @property
     def attribute_name(self) -> str | None:
         """The name of the attribute if the context is an attribute or None."""
-        return self._node and self._node.get_attribute_name()
+        return self._node.get_attribute_name() if self._node else None
 
     @property
     def is_content(self) -> bool:
@@ -208,13 +211,14 @@ class XmlContextService:
             definition and other information. If the context can not be
             determined, the default context with no information is returned.
         """
-        offset = xml_document.document.offset_at_position(position)
+        offset = xml_document.get_offset(position)
 
         if xml_document.is_empty:
             return XmlContext(xml_document, self.xsd_tree.root, node=None)
         node = xml_document.get_node_at(offset)
-        xsd_node = self.find_matching_xsd_element(node, self.xsd_tree)
-        line_text = xml_document.document.lines[position.line]
+        with measure(XSD_MATCH):
+            xsd_node = self.find_matching_xsd_element(node, self.xsd_tree)
+        line_text = xml_document.line_index.get_line_text(position.line)
         context = XmlContext(xml_document, xsd_node, node, line_text, position, offset)
         return context
 
@@ -230,7 +234,7 @@ class XmlContextService:
             XsdNode: The matching xsd node or None if there is no matching.
         """
         if node:
-            node_stack = node.stack
+            node_stack = node.path
             if len(node_stack) > 0 and MACROS in node_stack:
                 return xsd_tree.find_node_by_name(node_stack[-1])
             xsd_node = xsd_tree.find_node_by_stack(node_stack)
@@ -243,4 +247,4 @@ class XmlContextService:
         if context.node is None:
             return None
         start_offset, end_offset = context.node.get_offsets(context.offset)
-        return convert_document_offsets_to_range(xml_document.document, start_offset, end_offset)
+        return xml_document.get_range(start_offset, end_offset)
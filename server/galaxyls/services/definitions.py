@@ -29,9 +29,9 @@ class DocumentDefinitionsProvider:
         if macro_definition:
             return [macro_definition.location]
 
-        offset = xml_document.document.offset_at_position(position)
+        offset = xml_document.get_offset(position)
         node = xml_document.find_node_at(offset)
-        if isinstance(node, XmlContent) and node.parent.name == "import":
+        if isinstance(node, XmlContent) and node.parent is not None and node.parent.name == "import":
             content_node = node
             start, end = content_node.get_content_offsets()
             import_filename = xml_document.get_text_between_offsets(start, end)
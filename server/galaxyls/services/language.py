@@ -1,6 +1,9 @@
+from pathlib import Path
+
 from lsprotocol.types import (
     CodeAction,
     CodeActionParams,
+    CompletionItem,
     CompletionList,
     CompletionParams,
     Diagnostic,
@@ -10,8 +13,11 @@ from lsprotocol.types import (
     MarkupContent,
     MarkupKind,
     Position,
+    PrepareRenamePlaceholder,
     Range,
     TextEdit,
+    WorkspaceEdit,
+    WorkspaceSymbol,
 )
 from pygls.workspace import (
     TextDocument,
@@ -20,9 +26,18 @@ from pygls.workspace import (
 
 from galaxyls.services.definitions import DocumentDefinitionsProvider
 from galaxyls.services.links import DocumentLinksProvider
-from galaxyls.services.macros import MacroExpanderService
-from galaxyls.services.references import ParamReferencesProvider
-from galaxyls.services.symbols import DocumentSymbolsProvider
+from galaxyls.services.macros import (
+    ExpandedToolTreeCache,
+    MacroExpanderService,
+)
+from galaxyls.services.references import (
+    MacroReferencesProvider,
+    ParamReferencesProvider,
+)
+from galaxyls.services.symbols import (
+    DocumentSymbolsProvider,
+    WorkspaceSymbolsProvider,
+)
 from galaxyls.services.tools.common import (
     TestsDiscoveryService,
     ToolParamAttributeSorter,
@@ -38,8 +53,19 @@ from galaxyls.services.tools.refactor import (
     RefactorMacrosService,
 )
 from galaxyls.services.tools.testing import ToolTestsDiscoveryService
+from galaxyls.services.tools.workspace import WorkspaceToolIndex
 
 from ..config import CompletionMode
+from ..memory import (
+    DEFAULT_MEMORY_BUDGET,
+    MEGABYTE,
+    CacheRegistry,
+    MemoryUsage,
+)
+from ..stats import (
+    DIAGNOSTICS,
+    measure,
+)
 from ..types import (
     GeneratedSnippetResult,
     ReplaceTextRangeResult,
@@ -51,6 +77,7 @@ from .completion import (
 )
 from .context import XmlContextService
 from .format import GalaxyToolFormatService
+from .xml.cache import XmlDocumentCache
 from .xml.document import XmlDocument
 from .xsd.service import GalaxyToolXsdService
 
@@ -62,32 +89,97 @@ class GalaxyToolLanguageService:
     by the LSP.
     """
 
-    def __init__(self) -> None:
-        self.xsd_service = GalaxyToolXsdService()
+    def __init__(self, memory_budget: int = DEFAULT_MEMORY_BUDGET, storage_dir: Path | None = None) -> None:
+        """Initializes the service.
+
+        Args:
+            memory_budget (int): Megabytes that all the caches can use together, 0 to not limit them.
+            storage_dir (Optional[Path]): Directory where the workspace index and the XSD tree are
+            persisted between sessions. If it is not provided they are built again on every start.
+        """
+        self.storage_dir = storage_dir
+        self.cache_registry = CacheRegistry(memory_budget * MEGABYTE)
+        self.xsd_service = GalaxyToolXsdService(snapshot_dir=storage_dir)
+        self.cache_registry.register_pinned("xsd", self.xsd_service.get_estimated_size)
         self.format_service = GalaxyToolFormatService()
-        self.xsd_tree = self.xsd_service.xsd_parser.get_tree()
+        self.xsd_tree = self.xsd_service.xsd_tree
         self.xml_context_service = XmlContextService(self.xsd_tree)
         self.sort_service: ToolParamAttributeSorter = IUCToolParamAttributeSorter()
         self.test_discovery_service: TestsDiscoveryService = ToolTestsDiscoveryService()
         self.macro_expander = MacroExpanderService()
         self.refactoring_service: RefactoringService | None = None
         self.linter = GalaxyToolLinter()
+        self.macro_definitions_provider: MacroDefinitionsProvider | None = None
+        self.expanded_tool_trees: ExpandedToolTreeCache | None = None
         self.definitions_provider: DocumentDefinitionsProvider | None = None
         self.link_provider = DocumentLinksProvider()
         self.symbols_provider = DocumentSymbolsProvider()
         self.param_references_provider = ParamReferencesProvider()
+        self.xml_document_cache = XmlDocumentCache(registry=self.cache_registry)
+        self.workspace_index: WorkspaceToolIndex | None = None
+        self.workspace_symbols_provider: WorkspaceSymbolsProvider | None = None
+        self.macro_references_provider: MacroReferencesProvider | None = None
 
     def set_workspace(self, workspace: Workspace) -> None:
-        macro_definitions_provider = MacroDefinitionsProvider(workspace)
+        workspace_index = WorkspaceToolIndex(workspace, storage_dir=self.storage_dir)
+        self.workspace_index = workspace_index
+        self.workspace_symbols_provider = WorkspaceSymbolsProvider(workspace_index)
+        self.macro_references_provider = MacroReferencesProvider(workspace_index, self.xml_document_cache.get)
+        self.test_discovery_service = ToolTestsDiscoveryService(workspace_index, self.xml_document_cache.get)
+        expanded_tool_trees = ExpandedToolTreeCache(workspace, registry=self.cache_registry)
+        self.expanded_tool_trees = expanded_tool_trees
+        self.xml_document_cache.expanded_tree_loader = expanded_tool_trees.get
+        macro_definitions_provider = MacroDefinitionsProvider(workspace, self.cache_registry)
+        self.macro_definitions_provider = macro_definitions_provider
         self.definitions_provider = DocumentDefinitionsProvider(macro_definitions_provider)
         self.completion_service = XmlCompletionService(self.xsd_tree, self.definitions_provider)
         self.refactoring_service = RefactoringService(
             RefactorMacrosService(workspace, macro_definitions_provider, self.format_service)
         )
 
+    def notify_file_changed(self, file_uri: str) -> None:
+        """Discards any information derived from the file with the given URI.
+
+        Must be called when a file in the workspace is created, changed or deleted
+        either on disk or in the editor."""
+        if self.macro_definitions_provider:
+            self.macro_definitions_provider.macro_files_index.invalidate(file_uri)
+        if self.expanded_tool_trees:
+            self.expanded_tool_trees.invalidate(file_uri)
+        if self.workspace_index:
+            self.workspace_index.invalidate(file_uri)
+
+    def refresh_workspace_index(self) -> None:
+        """Indexes again the files of the workspace changed since they were indexed, even if they were not reported.
+
+        Reads the modification time of every indexed file, so it is meant to run in a background thread
+        before the features that use the workspace index."""
+        if self.workspace_index:
+            self.workspace_index.invalidate_changed()
+            self.workspace_index.refresh()
+
+    def set_memory_budget(self, memory_budget: int) -> None:
+        """Sets the megabytes all the caches can use together, discarding the least recently used entries
+        if they are using more. With 0 the caches are not limited."""
+        self.cache_registry.budget = memory_budget * MEGABYTE
+
+    def get_memory_usage(self) -> MemoryUsage:
+        """Gets the estimated memory used by every cache of the service."""
+        return self.cache_registry.get_usage()
+
+    def get_xml_document(self, document: TextDocument) -> XmlDocument:
+        """Gets the parsed XML document for the current version of the given text document."""
+        return self.xml_document_cache.get(document)
+
+    def get_xml_document_snapshot(self, document: TextDocument) -> XmlDocument:
+        """Gets the parsed XML document for the current version of the given text document
+        that is never modified by the following changes, so it can be used in other threads."""
+        return self.xml_document_cache.get_snapshot(document)
+
     def get_diagnostics(self, xml_document: XmlDocument) -> list[Diagnostic]:
         """Validates the Galaxy tool XML document and returns a list of diagnostics if there are any problems."""
-        return self.xsd_service.validate_document(xml_document) + self.linter.lint_document(xml_document)
+        with measure(DIAGNOSTICS):
+            return self.xsd_service.validate_document(xml_document) + self.linter.lint_document(xml_document)
 
     def get_documentation(self, xml_document: XmlDocument, position: Position) -> Hover | None:
         """Gets the documentation about the element at the given position."""
@@ -121,10 +213,14 @@ class GalaxyToolLanguageService:
         context = self.xml_context_service.get_xml_context(xml_document, params.position)
         return self.completion_service.get_completion_at_context(context, params.context, mode)
 
+    def resolve_completion_item(self, item: CompletionItem) -> CompletionItem:
+        """Adds the documentation to a completion item returned by `get_completion`."""
+        return self.completion_service.resolve_completion_item(item)
+
     def get_auto_close_tag(self, xml_document: XmlDocument, position: Position) -> AutoCloseTagResult | None:
         """Gets the closing result for the currently opened tag in context."""
         # The trigger character `/` or `>` is placed right before the actual position, so we get the position.character - 1
-        trigger_character = xml_document.document.lines[position.line][position.character - 1]
+        trigger_character = xml_document.line_index.get_line_text(position.line)[position.character - 1]
         # We want to get the context information right before the trigger character so we get position.character - 2
         position_before_trigger = Position(line=position.line, character=position.character - 2)
         context = self.xml_context_service.get_xml_context(xml_document, position_before_trigger)
@@ -133,27 +229,27 @@ class GalaxyToolLanguageService:
     def generate_tests(self, document: TextDocument) -> GeneratedSnippetResult | None:
         """Generates a code snippet with some tests for the current inputs and outputs
         of this tool wrapper."""
-        tool = GalaxyToolXmlDocument(document)
+        tool = GalaxyToolXmlDocument(document, self.get_xml_document(document))
         generator = GalaxyToolTestSnippetGenerator(tool)
         return generator.generate_snippet()
 
     def update_tests_profile(self, document: TextDocument) -> WorkspaceEditResult | None:
         """Generates a workspace edit to update the test cases if they are not
         compatible with the 24.2 profile validation."""
-        tool = GalaxyToolXmlDocument(document)
+        tool = GalaxyToolXmlDocument(document, self.get_xml_document(document))
         generator = GalaxyToolTestUpdater(tool)
         return generator.generate_workspace_edit()
 
     def generate_command(self, document: TextDocument) -> GeneratedSnippetResult | None:
         """Generates a boilerplate Cheetah code snippet based on the current inputs and outputs
         of this tool wrapper."""
-        tool = GalaxyToolXmlDocument(document)
+        tool = GalaxyToolXmlDocument(document, self.get_xml_document(document))
         generator = GalaxyToolCommandSnippetGenerator(tool)
         return generator.generate_snippet()
 
     def sort_single_param_attrs(self, xml_document: XmlDocument, position: Position) -> ReplaceTextRangeResult | None:
         """Sorts the attributes of the param element under the cursor."""
-        offset = xml_document.document.offset_at_position(position)
+        offset = xml_document.get_offset(position)
         param_element = xml_document.find_element_at(offset)
         if param_element:
             return self.sort_service.sort_param_attributes(param_element, xml_document)
@@ -170,6 +266,34 @@ class GalaxyToolLanguageService:
             return None
         return self.refactoring_service.get_available_refactoring_actions(xml_document, params)
 
+    def get_workspace_symbols(self, query: str) -> list[WorkspaceSymbol] | None:
+        """Gets the symbols defined in the tools and macro files of the workspace matching the query."""
+        if self.workspace_symbols_provider:
+            return self.workspace_symbols_provider.get_workspace_symbols(query)
+        return None
+
+    def find_references(
+        self, xml_document: XmlDocument, position: Position, include_declaration: bool
+    ) -> list[Location] | None:
+        """Gets the locations in the workspace where the macro or token at the given position is used."""
+        if self.macro_references_provider:
+            return self.macro_references_provider.get_references(xml_document, position, include_declaration)
+        return None
+
+    def prepare_rename(self, xml_document: XmlDocument, position: Position) -> PrepareRenamePlaceholder | None:
+        """Gets the range and name of the macro or token at the given position if it can be renamed."""
+        if self.macro_references_provider:
+            return self.macro_references_provider.prepare_rename(xml_document, position)
+        return None
+
+    def rename(self, xml_document: XmlDocument, position: Position, new_name: str) -> WorkspaceEdit | None:
+        """Renames the macro or token at the given position in all the files of the workspace.
+
+        Raises a `StaleIndexError` if the files to edit keep changing on disk."""
+        if self.macro_references_provider:
+            return self.macro_references_provider.rename(xml_document, position, new_name)
+        return None
+
     def go_to_definition(self, xml_document: XmlDocument, position: Position) -> list[Location] | None:
         if self.definitions_provider:
             return self.definitions_provider.go_to_definition(xml_document, position)
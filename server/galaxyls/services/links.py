@@ -1,10 +1,8 @@
-
 from lsprotocol.types import DocumentLink
 
 from galaxyls.services.tools.document import GalaxyToolXmlDocument
 from galaxyls.services.xml.document import XmlDocument
 from galaxyls.services.xml.nodes import XmlElement
-from galaxyls.services.xml.utils import convert_document_offsets_to_range
 
 
 class DocumentLinksProvider:
@@ -31,7 +29,7 @@ class DocumentLinksProvider:
 
                 test_data_file_path = tool.get_test_data_path() / filename
                 start_offset, end_offset = value_attribute.value.get_unquoted_content_offsets()
-                link_range = convert_document_offsets_to_range(tool.xml_document.document, start_offset, end_offset)
+                link_range = tool.xml_document.get_range(start_offset, end_offset)
                 result.append(
                     DocumentLink(
                         target=test_data_file_path.as_uri(),
@@ -1,9 +1,45 @@
-from galaxy.util import xml_macros
+import hashlib
+import os
+import threading
+from collections.abc import Callable
+from copy import deepcopy
+from typing import (
+    TYPE_CHECKING,
+    cast,
+)
+
+import attrs
+from galaxy.util import (
+    Element,
+    xml_macros,
+)
 from lxml import etree
+from pygls.uris import (
+    from_fs_path,
+    to_fs_path,
+)
+from pygls.workspace import Workspace
 
+from galaxyls.memory import (
+    CacheEntries,
+    CacheRegistry,
+    estimate_tree_size,
+)
 from galaxyls.services.format import DEFAULT_INDENTATION
+from galaxyls.stats import (
+    MACROS_EXPAND,
+    measure,
+)
 from galaxyls.types import GeneratedExpandedDocument
 
+if TYPE_CHECKING:
+    from galaxyls.services.xml.document import XmlDocument
+
+DEFAULT_MAX_EXPANDED_TREES = 32
+
+SourceReader = Callable[[str], str]
+ExpandedTreeLoader = Callable[[str, str, etree._ElementTree], etree._ElementTree]
+
 
 def remove_macros(xml_tree: etree._ElementTree) -> etree._ElementTree:
     """Removes the macros section from the tool tree.
@@ -22,11 +58,240 @@ def remove_macros(xml_tree: etree._ElementTree) -> etree._ElementTree:
     return xml_tree
 
 
+def read_file_source(path: str) -> str:
+    """Reads the contents of the file in the given path from disk."""
+    with open(path, encoding="utf-8") as file:
+        return file.read()
+
+
+def parse_xml_source(source: str, path: str, remove_comments: bool = True) -> etree._ElementTree:
+    """Parses the XML contents of the file in the given path.
+
+    The path is only used as the base URL of the document, so it is reported in syntax errors.
+    The elements keep the line numbers where they are defined.
+    """
+    parser = etree.XMLParser(remove_comments=remove_comments, encoding="utf-8")
+    return etree.ElementTree(etree.fromstring(source.encode("utf-8"), parser, base_url=path))
+
+
+def copy_tree_without_comments(xml_tree: etree._ElementTree) -> etree._ElementTree:
+    """Returns a copy of the tree without any comments, as if it was parsed with `remove_comments`."""
+    root = deepcopy(xml_tree.getroot())
+    etree.strip_tags(root, etree.Comment)
+    return etree.ElementTree(root)
+
+
+def load_with_references(
+    tool_path: str, tool_tree: etree._ElementTree, read_source: SourceReader = read_file_source
+) -> tuple[etree._ElementTree, list[str]]:
+    """Expands all the macros used by the tool.
+
+    This does the same as `galaxy.util.xml_macros.load_with_references` but the tool
+    is already parsed and the imported macro files are read with `read_source`, so
+    the documents being edited can be expanded without saving them first. It is built on
+    private helpers of `xml_macros`, a unit test checks it still returns the same result.
+
+    Args:
+        tool_path (str): The path of the tool. The imported macro files are relative to it.
+        tool_tree (etree._ElementTree): The tree of the tool without comments. It is modified in place.
+        read_source (SourceReader, optional): Reads the contents of a macros file given its path.
+        Defaults to reading the file from disk.
+
+    Returns:
+        Tuple[etree._ElementTree, List[str]]: The expanded tool tree and the paths of all the
+        macro files imported directly or indirectly by the tool.
+    """
+    tree = tool_tree
+    root = cast(Element, tree.getroot())
+
+    macros_el = xml_macros._macros_el(root)
+    if macros_el is None:
+        return tree, []
+
+    macros: xml_macros.MacrosDictT = {}
+    macro_paths = _load_macros(macros_el, os.path.dirname(tool_path), macros, read_source)
+    macros_el.clear()
+
+    tokens: dict[str, str] = {}
+    for macro in macros.get("token", []):
+        token_name = macro.get("name")
+        assert token_name
+        tokens[token_name] = macro.text or ""
+    tokens = xml_macros.expand_nested_tokens(tokens)
+
+    macro_dict: dict[str, xml_macros.XmlMacroDef] = {}
+    for macro in macros.get("xml", []):
+        macro_name = macro.get("name")
+        assert macro_name
+        macro_dict[macro_name] = xml_macros.XmlMacroDef(macro)
+    xml_macros._expand_macros([root], macro_dict, tokens)
+
+    # Template macros are used during tool execution so they are kept
+    for macro in macros.get("template", []):
+        macros_el.append(macro)
+    xml_macros._expand_tokens_for_el(root, tokens)
+    return tree, macro_paths
+
+
+def expand_macros(tool_path: str, tool_source: str, tool_tree: etree._ElementTree) -> etree._ElementTree:
+    """Returns a copy of the tool tree with all the macros expanded reading the imported files from disk.
+
+    Args:
+        tool_path (str): The path of the tool.
+        tool_source (str): The contents of the tool.
+        tool_tree (etree._ElementTree): The tree parsed from the tool contents. It is not modified.
+
+    Returns:
+        etree._ElementTree: The expanded tree of the tool.
+    """
+    tree, _ = load_with_references(tool_path, copy_tree_without_comments(tool_tree))
+    return tree
+
+
+def _load_macros(
+    macros_el: Element, xml_base_dir: str, macros: xml_macros.MacrosDictT, read_source: SourceReader
+) -> list[str]:
+    macro_paths = []
+    for import_path in xml_macros._imported_macro_paths_from_el(macros_el):
+        macro_path = os.path.join(xml_base_dir, import_path)
+        macro_paths.append(macro_path)
+        macros_file_root = cast(Element, parse_xml_source(read_source(macro_path), macro_path).getroot())
+        macro_paths.extend(_load_macros(macros_file_root, xml_base_dir, macros, read_source))
+    xml_macros._load_embedded_macros(macros_el, macros)
+    return macro_paths
+
+
+def _get_content_hash(source: str) -> str:
+    return hashlib.sha256(source.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+@attrs.define
+class ExpandedToolTree:
+    tree: etree._ElementTree
+    dependencies: dict[str, str]
+    """The content hash of the tool and every macros file it imports by path."""
+
+
+def _estimate_size(entry: ExpandedToolTree) -> int:
+    return estimate_tree_size(entry.tree)
+
+
+class ExpandedToolTreeCache:
+    """Keeps the macro-expanded trees of the most recently used tools.
+
+    Expanding macros requires parsing the tool and all the macro files it imports,
+    so the result is shared by validation, linting and any other feature needing it.
+    Every entry is keyed by the tool path and remembers the content hash of the tool
+    and of every imported macros file, directly or indirectly. An entry is only reused
+    while all those hashes match the current contents and it is discarded as soon as
+    any of those files is invalidated.
+
+    The contents of the files opened in the editor are taken from the workspace
+    documents, so unsaved changes are always taken into account.
+
+    The cached trees are shared, they must not be modified. The least recently used trees
+    are discarded when there are more than `max_size` or when the memory budget of the
+    registry is exceeded.
+    """
+
+    def __init__(
+        self, workspace: Workspace, max_size: int = DEFAULT_MAX_EXPANDED_TREES, registry: CacheRegistry | None = None
+    ) -> None:
+        self.workspace = workspace
+        self.hits = 0
+        self.misses = 0
+        self._entries: CacheEntries[str, ExpandedToolTree] = CacheEntries(
+            registry or CacheRegistry(), "expanded_trees", _estimate_size, max_entries=max_size
+        )
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, tool_path: str) -> bool:
+        return tool_path in self._entries
+
+    def get(self, tool_path: str, tool_source: str, tool_tree: etree._ElementTree) -> etree._ElementTree:
+        """Gets the tree of the tool with all the macros expanded.
+
+        The macros are only expanded again if the tool or any of the imported files changed.
+
+        Args:
+            tool_path (str): The path of the tool.
+            tool_source (str): The current contents of the tool.
+            tool_tree (etree._ElementTree): The tree parsed from the tool contents. It is not modified.
+
+        Raises:
+            etree.XMLSyntaxError: If any of the imported files is not valid XML.
+            OSError: If any of the imported files cannot be read.
+
+        Returns:
+            etree._ElementTree: The expanded tree of the tool.
+        """
+        sources = {tool_path: tool_source}
+
+        def read_source(path: str) -> str:
+            source = sources.get(path)
+            if source is None:
+                source = self.read_source(path)
+                sources[path] = source
+            return source
+
+        entry = self._entries.peek(tool_path)
+        if entry is not None and self._is_up_to_date(entry, read_source):
+            with self._lock:
+                self.hits += 1
+            self._entries.get(tool_path)
+            return entry.tree
+
+        with measure(MACROS_EXPAND):
+            tree, macro_paths = load_with_references(tool_path, copy_tree_without_comments(tool_tree), read_source)
+        dependencies = {path: _get_content_hash(read_source(path)) for path in [tool_path, *macro_paths]}
+        with self._lock:
+            self.misses += 1
+        self._entries.put(tool_path, ExpandedToolTree(tree, dependencies))
+        return tree
+
+    def read_source(self, path: str) -> str:
+        """Reads the contents of the file in the given path.
+
+        If the file is open in the editor the contents of the document are returned, otherwise it is read from disk.
+        """
+        uri = from_fs_path(path)
+        document = self.workspace.text_documents.get(uri) if uri else None
+        if document is not None:
+            return document.source
+        return read_file_source(path)
+
+    def invalidate(self, file_uri: str) -> None:
+        """Discards the expanded trees of all the tools depending on the file with the given URI."""
+        path = to_fs_path(file_uri)
+        if path is None:
+            return
+        for tool_path, entry in self._entries.items():
+            if path in entry.dependencies:
+                self._entries.pop(tool_path)
+
+    def clear(self) -> None:
+        """Discards all the expanded trees and resets the statistics."""
+        self._entries.clear()
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def _is_up_to_date(self, entry: ExpandedToolTree, read_source: SourceReader) -> bool:
+        try:
+            return all(_get_content_hash(read_source(path)) == digest for path, digest in entry.dependencies.items())
+        except OSError:
+            return False
+
+
 class MacroExpanderService:
-    def generate_expanded_from(self, tool_path: str) -> GeneratedExpandedDocument:
+    def generate_expanded_from(self, xml_document: "XmlDocument") -> GeneratedExpandedDocument:
         result = GeneratedExpandedDocument()
         try:
-            expanded_tool_tree, _ = xml_macros.load_with_references(tool_path)
+            # The expanded tree may be shared with other features so it is copied before removing the macros
+            expanded_tool_tree = deepcopy(xml_document.load_expanded_tree())
             expanded_xml = remove_macros(expanded_tool_tree)
             root = expanded_xml.getroot()
             etree.indent(root, space=DEFAULT_INDENTATION)
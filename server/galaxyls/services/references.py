@@ -1,11 +1,47 @@
+import re
+from collections import defaultdict
 from collections.abc import Callable
+from typing import cast
 
+from lsprotocol.types import (
+    Location,
+    Position,
+    PrepareRenamePlaceholder,
+    Range,
+    TextEdit,
+    WorkspaceEdit,
+)
+from pygls.workspace import TextDocument
+
+from galaxyls.services.tools.constants import (
+    EXPAND,
+    MACRO,
+    NAME,
+    TOKEN,
+    XML,
+)
 from galaxyls.services.tools.document import GalaxyToolXmlDocument
+from galaxyls.services.tools.workspace import (
+    TOKEN_PATTERN,
+    DerivedWorkspaceIndex,
+    IndexedElement,
+    StaleIndexError,
+    WorkspaceToolIndex,
+    XmlFileSummary,
+    summarize_xml_document,
+)
 from galaxyls.services.xml.document import XmlDocument
-from galaxyls.services.xml.nodes import XmlElement
+from galaxyls.services.xml.nodes import (
+    XmlAttributeValue,
+    XmlElement,
+)
 from galaxyls.types import ParamReferencesResult
 
 ReferenceBuilder = Callable[[XmlElement], str | None]
+TOKEN_NAME_PATTERN = re.compile(r"\w+")
+MACRO_NAME_PATTERN = re.compile(r"[^\s\"'<>&]+")
+MacroReference = tuple[str, str]
+"""The kind, `macro` or `token`, and the name of a macro or token. Token names include the `@` delimiters."""
 
 
 class ParamReferencesProvider:
@@ -48,7 +84,7 @@ class ParamReferencesProvider:
     def _get_param_path(self, param: XmlElement) -> list[str]:
         path = []
         # Skip the first 3 ancestors (document root, tool, inputs) to start at the input element.
-        ancestors = param.ancestors[3:]
+        ancestors = cast(tuple[XmlElement, ...], param.ancestors[3:])
         for ancestor in ancestors:
             name = ancestor.get_attribute_value("name")
             if name:
@@ -70,3 +106,260 @@ class ParamReferencesProvider:
         if argument.startswith("--"):
             argument = argument[2:]
         return argument.replace("-", "_")
+
+
+def get_macro_reference(element: IndexedElement) -> MacroReference:
+    """Gets the macro or token declared or used by the indexed element."""
+    return (TOKEN, element.name) if element.tag == TOKEN else (MACRO, element.name)
+
+
+def get_macro_reference_at(xml_document: XmlDocument, position: Position) -> MacroReference | None:
+    """Gets the macro or token at the given position of the document.
+
+    The position can be on a token, on the name of an expanded macro or on the name of a macro definition.
+
+    Args:
+        xml_document (XmlDocument): The parsed document.
+        position (Position): The position in the document.
+
+    Returns:
+        Optional[MacroReference]: The macro or token at the position if there is any.
+    """
+    result = find_macro_reference_at(xml_document, xml_document.get_offset(position))
+    return result[0] if result else None
+
+
+def find_macro_reference_at(xml_document: XmlDocument, offset: int) -> tuple[MacroReference, int, int] | None:
+    """Finds the macro or token at the given offset of the document.
+
+    Returns:
+        Optional[Tuple[MacroReference, int, int]]: The macro or token and the start and end offsets of its name,
+        without the `@` delimiters in the case of a token, or None if there is no macro or token at the offset.
+    """
+    source = xml_document.source
+    line_start = source.rfind("\n", 0, offset) + 1
+    line_end = source.find("\n", offset)
+    for match in TOKEN_PATTERN.finditer(source, line_start, line_end if line_end >= 0 else len(source)):
+        if match.start() <= offset <= match.end():
+            return (TOKEN, match.group()), match.start() + 1, match.end() - 1
+    node = xml_document.find_node_at(offset)
+    if isinstance(node, XmlAttributeValue) and node.unquoted:
+        element_name = node.owner.owner.name
+        if (element_name == EXPAND and node.owner.name == MACRO) or (element_name in (XML, MACRO) and node.owner.name == NAME):
+            start, end = node.get_unquoted_content_offsets()
+            return (MACRO, node.unquoted), start, end
+    return None
+
+
+def validate_new_name(reference: MacroReference, new_name: str) -> str:
+    """Checks the new name for the given macro or token.
+
+    Args:
+        reference (MacroReference): The macro or token to rename.
+        new_name (str): The new name. The `@` delimiters of a token are optional.
+
+    Raises:
+        ValueError: If the name can not be used for the macro or token.
+
+    Returns:
+        str: The new name without the `@` delimiters in the case of a token.
+    """
+    kind, _ = reference
+    if kind == TOKEN:
+        new_name = new_name.strip("@")
+        if not TOKEN_NAME_PATTERN.fullmatch(new_name):
+            raise ValueError(f"'{new_name}' is not a valid token name, only letters, digits and underscores are allowed.")
+    elif not MACRO_NAME_PATTERN.fullmatch(new_name):
+        raise ValueError(f"'{new_name}' is not a valid macro name.")
+    return new_name
+
+
+class MacroReferencesProvider(DerivedWorkspaceIndex):
+    """Finds and renames the usages of macros and tokens in all the tools and macro files of the workspace.
+
+    Keeps a reverse index from every macro and token to the files using or declaring it, built from
+    the summaries in the workspace index. The documents open in the editor may have unsaved changes,
+    so their usages are taken from the current version of the document instead.
+    """
+
+    def __init__(self, workspace_index: WorkspaceToolIndex, get_xml_document: Callable[[TextDocument], XmlDocument]) -> None:
+        super().__init__(workspace_index)
+        self.get_xml_document = get_xml_document
+        self._usages: dict[MacroReference, dict[str, list[IndexedElement]]] = defaultdict(dict)
+        self._declarations: dict[MacroReference, dict[str, list[IndexedElement]]] = defaultdict(dict)
+        self._open_documents: dict[str, tuple[int, XmlFileSummary | None]] = {}
+
+    def get_references(
+        self, xml_document: XmlDocument, position: Position, include_declaration: bool
+    ) -> list[Location] | None:
+        """Gets the locations where the macro or token at the given position is used in the workspace.
+
+        Args:
+            xml_document (XmlDocument): The document where the references are requested.
+            position (Position): The position of the macro or token in the document.
+            include_declaration (bool): Whether to include the locations where the macro or token is declared.
+
+        Returns:
+            Optional[List[Location]]: The locations sorted by URI and position or None if there is no macro
+            or token at the given position.
+        """
+        reference = get_macro_reference_at(xml_document, position)
+        if reference is None:
+            return None
+        usages, declarations = self._get_elements(reference)
+        ranges_by_uri: dict[str, list[Range]] = defaultdict(list)
+        for elements_by_uri in [usages, declarations] if include_declaration else [usages]:
+            for uri, elements in elements_by_uri.items():
+                ranges_by_uri[uri].extend(element.range for element in elements)
+        return [
+            Location(uri=uri, range=range)
+            for uri in sorted(ranges_by_uri)
+            for range in sorted(ranges_by_uri[uri], key=get_range_start)
+        ]
+
+    def prepare_rename(self, xml_document: XmlDocument, position: Position) -> PrepareRenamePlaceholder | None:
+        """Gets the range and current name of the macro or token at the given position if it can be renamed.
+
+        Only the macros and tokens declared in some file of the workspace can be renamed.
+
+        Args:
+            xml_document (XmlDocument): The document where the rename is requested.
+            position (Position): The position of the macro or token in the document.
+
+        Returns:
+            Optional[PrepareRenamePlaceholder]: The range of the name, without the `@` delimiters of tokens,
+            and the name itself or None if there is nothing to rename at the position.
+        """
+        result = find_macro_reference_at(xml_document, xml_document.get_offset(position))
+        if result is None:
+            return None
+        reference, start, end = result
+        _, declarations = self._get_elements(reference)
+        if not declarations:
+            return None
+        return PrepareRenamePlaceholder(
+            range=xml_document.get_range(start, end), placeholder=xml_document.get_text_between_offsets(start, end)
+        )
+
+    def rename(self, xml_document: XmlDocument, position: Position, new_name: str) -> WorkspaceEdit | None:
+        """Renames the macro or token at the given position in all the files of the workspace.
+
+        The edits are computed from the reverse index, only the open documents are parsed again if they changed.
+        The files that are not open are indexed again first if they changed on disk since they were indexed,
+        so the ranges of the edits match their current content.
+
+        Args:
+            xml_document (XmlDocument): The document where the rename is requested.
+            position (Position): The position of the macro or token in the document.
+            new_name (str): The new name. The `@` delimiters of a token are optional.
+
+        Raises:
+            ValueError: If the new name can not be used for the macro or token.
+            StaleIndexError: If the files to edit keep changing on disk.
+
+        Returns:
+            Optional[WorkspaceEdit]: The edits renaming every declaration and usage or None if there is nothing
+            to rename at the position.
+        """
+        reference = get_macro_reference_at(xml_document, position)
+        if reference is None:
+            return None
+        new_name = validate_new_name(reference, new_name)
+        usages, declarations = self._get_elements(reference)
+        changed = self.workspace_index.find_changed(self._get_closed_files(usages, declarations))
+        if changed:
+            for uri in changed:
+                self.workspace_index.invalidate(uri)
+            usages, declarations = self._get_elements(reference)
+            changed = self.workspace_index.find_changed(self._get_closed_files(usages, declarations))
+            if changed:
+                raise StaleIndexError(f"The files {', '.join(changed)} changed while renaming, try again.")
+        if not declarations:
+            return None
+        changes: dict[str, list[TextEdit]] = defaultdict(list)
+        for elements_by_uri, is_declaration in ((usages, False), (declarations, True)):
+            for uri, elements in elements_by_uri.items():
+                for element in elements:
+                    range = get_rename_range(element, is_declaration)
+                    if range is not None:
+                        changes[uri].append(TextEdit(range=range, new_text=new_name))
+        return WorkspaceEdit(
+            changes={uri: sorted(changes[uri], key=lambda edit: get_range_start(edit.range)) for uri in sorted(changes)}
+        )
+
+    def _get_elements(
+        self, reference: MacroReference
+    ) -> tuple[dict[str, list[IndexedElement]], dict[str, list[IndexedElement]]]:
+        """Gets the elements using and declaring the macro or token by URI."""
+        self.update()
+        open_documents = self._get_open_document_summaries()
+        usages = {uri: elements for uri, elements in self._usages.get(reference, {}).items() if uri not in open_documents}
+        declarations = {
+            uri: elements for uri, elements in self._declarations.get(reference, {}).items() if uri not in open_documents
+        }
+        for uri, summary in open_documents.items():
+            self._add_elements(usages, uri, summary.usages, reference)
+            self._add_elements(declarations, uri, summary.macros, reference)
+        return usages, declarations
+
+    def _get_closed_files(self, *elements_by_uri: dict[str, list[IndexedElement]]) -> set[str]:
+        """Gets the URIs of the files with some of the elements whose ranges come from the workspace index."""
+        return {uri for elements in elements_by_uri for uri in elements if uri not in self._open_documents}
+
+    def _get_open_document_summaries(self) -> dict[str, XmlFileSummary]:
+        result: dict[str, XmlFileSummary] = {}
+        open_documents: dict[str, tuple[int, XmlFileSummary | None]] = {}
+        for uri, document in self.workspace_index.workspace.text_documents.items():
+            if document.version is None or not uri.lower().endswith(".xml"):
+                continue
+            entry = self._open_documents.get(uri)
+            if entry is None or entry[0] != document.version:
+                summary = summarize_xml_document(self.get_xml_document(document), (0, 0))
+                entry = (document.version, summary)
+            open_documents[uri] = entry
+            if entry[1] is not None:
+                result[uri] = entry[1]
+        self._open_documents = open_documents
+        return result
+
+    def _add_summary(self, summary: XmlFileSummary) -> None:
+        for element in summary.usages:
+            self._usages[get_macro_reference(element)].setdefault(summary.uri, []).append(element)
+        for element in summary.macros:
+            self._declarations[get_macro_reference(element)].setdefault(summary.uri, []).append(element)
+
+    def _remove_summary(self, summary: XmlFileSummary) -> None:
+        for index, elements in ((self._usages, summary.usages), (self._declarations, summary.macros)):
+            for reference in {get_macro_reference(element) for element in elements}:
+                files = index[reference]
+                files.pop(summary.uri, None)
+                if not files:
+                    del index[reference]
+
+    def _add_elements(
+        self,
+        elements_by_uri: dict[str, list[IndexedElement]],
+        uri: str,
+        elements: list[IndexedElement],
+        reference: MacroReference,
+    ) -> None:
+        matching = [element for element in elements if get_macro_reference(element) == reference]
+        if matching:
+            elements_by_uri[uri] = matching
+
+
+def get_rename_range(element: IndexedElement, is_declaration: bool) -> Range | None:
+    """Gets the range to replace when renaming the macro or token used or declared by the element.
+
+    The `@` delimiters of the tokens are kept."""
+    range = element.name_range if is_declaration else element.range
+    if range is None or element.tag != TOKEN:
+        return range
+    return Range(
+        start=Position(line=range.start.line, character=range.start.character + 1),
+        end=Position(line=range.end.line, character=range.end.character - 1),
+    )
+
+
+def get_range_start(range: Range) -> tuple[int, int]:
+    return (range.start.line, range.start.character)
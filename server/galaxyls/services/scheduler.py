@@ -0,0 +1,105 @@
+"""This module provides a scheduler to compute the document diagnostics in the background."""
+
+import asyncio
+import logging
+from collections.abc import Callable
+from concurrent.futures import (
+    Executor,
+    ThreadPoolExecutor,
+)
+
+from lsprotocol.types import Diagnostic
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait after the last change in a document before validating it
+DIAGNOSTICS_DEBOUNCE_DELAY = 0.5
+
+DiagnosticsProducer = Callable[[], list[Diagnostic]]
+DiagnosticsConsumer = Callable[[list[Diagnostic]], None]
+ErrorHandler = Callable[[Exception], None]
+
+
+class DiagnosticsScheduler:
+    """Schedules the computation of diagnostics for documents outside of the event loop.
+
+    There is at most one scheduled run per document. Scheduling a new run for a document
+    cancels the previous one, so when a document changes quickly only the diagnostics for
+    the latest version are published. The diagnostics are computed in a worker thread to
+    keep the server responsive to other requests in the meantime.
+    """
+
+    def __init__(self, executor: Executor | None = None) -> None:
+        self._executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix="galaxyls-diagnostics")
+        self._pending: dict[str, asyncio.Task] = {}
+
+    def schedule(
+        self,
+        uri: str,
+        compute: DiagnosticsProducer,
+        publish: DiagnosticsConsumer,
+        on_error: ErrorHandler | None = None,
+        delay: float = 0.0,
+    ) -> asyncio.Task:
+        """Schedules the computation of the diagnostics of a document.
+
+        Must be called from the event loop thread.
+
+        Args:
+            uri (str): The URI of the document.
+            compute (DiagnosticsProducer): Computes the diagnostics. It runs in a worker thread.
+            publish (DiagnosticsConsumer): Receives the resulting diagnostics in the event loop
+            thread if the run was not cancelled in the meantime.
+            on_error (Optional[ErrorHandler]): Receives any exception raised while computing the
+            diagnostics in the event loop thread.
+            delay (float, optional): Seconds to wait before starting the computation. Defaults to 0.
+
+        Returns:
+            asyncio.Task: The task of the scheduled run.
+        """
+        self.cancel(uri)
+        task = asyncio.ensure_future(self._run(uri, compute, publish, on_error, delay))
+        self._pending[uri] = task
+        return task
+
+    def cancel(self, uri: str) -> None:
+        """Cancels the scheduled run for the given document if there is one.
+
+        If the diagnostics are already being computed, the computation will finish in
+        the worker thread but the result will be discarded."""
+        task = self._pending.pop(uri, None)
+        if task is not None:
+            task.cancel()
+
+    def is_pending(self, uri: str) -> bool:
+        """Indicates if there is a scheduled run for the given document that has not finished yet."""
+        return uri in self._pending
+
+    async def _run(
+        self,
+        uri: str,
+        compute: DiagnosticsProducer,
+        publish: DiagnosticsConsumer,
+        on_error: ErrorHandler | None,
+        delay: float,
+    ) -> None:
+        if delay > 0:
+            await asyncio.sleep(delay)
+        loop = asyncio.get_running_loop()
+        try:
+            diagnostics = await loop.run_in_executor(self._executor, compute)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._finish(uri)
+            if on_error is None:
+                logger.exception("Error computing diagnostics for %s", uri)
+            else:
+                on_error(e)
+            return
+        self._finish(uri)
+        publish(diagnostics)
+
+    def _finish(self, uri: str) -> None:
+        if self._pending.get(uri) is asyncio.current_task():
+            del self._pending[uri]
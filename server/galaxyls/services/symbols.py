@@ -1,16 +1,46 @@
+import heapq
+import os
+import re
+from collections import defaultdict
+from collections.abc import Iterable
 
 from lsprotocol.types import (
     DocumentSymbol,
+    Location,
+    Position,
+    Range,
     SymbolKind,
+    WorkspaceSymbol,
 )
+from pygls.uris import to_fs_path
 
+from galaxyls.services.tools.constants import (
+    MACRO,
+    TOKEN,
+    XML,
+)
+from galaxyls.services.tools.workspace import (
+    DerivedWorkspaceIndex,
+    WorkspaceToolIndex,
+    XmlFileSummary,
+)
 from galaxyls.services.xml.document import XmlDocument
 from galaxyls.services.xml.nodes import (
     XmlAttribute,
     XmlElement,
     XmlSyntaxNode,
 )
-from galaxyls.services.xml.utils import convert_document_offsets_to_range
+
+MAX_WORKSPACE_SYMBOLS = 256
+TRIGRAM_SIZE = 3
+MACRO_SYMBOL_KINDS = {
+    TOKEN: SymbolKind.Constant,
+    XML: SymbolKind.Function,
+    MACRO: SymbolKind.Function,
+}
+
+IndexedSymbol = tuple[str, SymbolKind, Range | None, str]
+"""The name, kind, range and container name of a workspace symbol."""
 
 
 class DocumentSymbolsProvider:
@@ -32,7 +62,7 @@ class DocumentSymbolsProvider:
         return result
 
     def _get_element_symbol_definition(self, xml_document: XmlDocument, element: XmlElement) -> DocumentSymbol:
-        element_range = convert_document_offsets_to_range(xml_document.document, element.start, element.end)
+        element_range = xml_document.get_range(element.start, element.end)
         return DocumentSymbol(
             name=self._get_node_name(element),
             kind=SymbolKind.Field,
@@ -43,7 +73,7 @@ class DocumentSymbolsProvider:
         )
 
     def _get_attribute_symbol_definition(self, xml_document: XmlDocument, attribute: XmlAttribute) -> DocumentSymbol:
-        attribute_range = convert_document_offsets_to_range(xml_document.document, attribute.start, attribute.end)
+        attribute_range = xml_document.get_range(attribute.start, attribute.end)
         return DocumentSymbol(
             name=self._get_node_name(attribute),
             kind=SymbolKind.Property,
@@ -67,3 +97,134 @@ class DocumentSymbolsProvider:
         else:
             detail = element.get_attribute_value("id") or element.get_attribute_value("name")
         return detail
+
+
+class WorkspaceSymbolsProvider(DerivedWorkspaceIndex):
+    """Provides the symbols defined in all the tools and macro files of the workspace.
+
+    The symbols are the tool ids, the input params, the outputs and the macros and tokens
+    declared in every file of the workspace index. They are kept in an inverted index from
+    the trigrams of their names, so a query only needs to check the names sharing some
+    trigram with it. The symbols of a file are replaced when its summary changes in the
+    workspace index.
+    """
+
+    def __init__(self, workspace_index: WorkspaceToolIndex) -> None:
+        super().__init__(workspace_index)
+        self._symbols: dict[str, dict[str, list[IndexedSymbol]]] = {}
+        """The symbols by lower case name and URI of the file declaring them."""
+        self._names_by_trigram: dict[str, set[str]] = defaultdict(set)
+
+    def get_workspace_symbols(self, query: str, limit: int = MAX_WORKSPACE_SYMBOLS) -> list[WorkspaceSymbol]:
+        """Gets the symbols in the workspace whose name matches the given query.
+
+        A name matches if it contains all the characters of the query in the same order,
+        ignoring case. Exact matches come first, then the names starting with the query,
+        the names containing it and finally the rest of the matches. Queries with three or
+        more characters only match names sharing at least one trigram with the query.
+
+        Args:
+            query (str): The text to search. All symbols match an empty query.
+            limit (int, optional): The maximum number of symbols to return.
+
+        Returns:
+            List[WorkspaceSymbol]: The matching symbols.
+        """
+        self.update()
+        query = query.strip().lower()
+        if not query:
+            return self._get_symbols(self._symbols, limit)
+        pattern = re.compile(".*?".join(map(re.escape, query)))
+        matches = (
+            (get_match_rank(query, name), len(name), name) for name in self._get_candidate_names(query) if pattern.search(name)
+        )
+        # Every name has at least one symbol so there is no need to sort more names than the limit
+        names = [name for _, _, name in heapq.nsmallest(limit, matches)]
+        return self._get_symbols(names, limit)
+
+    def _get_symbols(self, names: Iterable[str], limit: int) -> list[WorkspaceSymbol]:
+        result: list[WorkspaceSymbol] = []
+        for name in names:
+            for uri, symbols in self._symbols[name].items():
+                for symbol in symbols[: limit - len(result)]:
+                    result.append(_create_symbol(uri, *symbol))
+                if len(result) >= limit:
+                    return result
+        return result
+
+    def _get_candidate_names(self, query: str) -> Iterable[str]:
+        if len(query) < TRIGRAM_SIZE:
+            return self._symbols.keys()
+        names: set[str] = set()
+        for trigram in get_trigrams(query):
+            names.update(self._names_by_trigram.get(trigram, ()))
+        return names
+
+    def _add_summary(self, summary: XmlFileSummary) -> None:
+        for symbol in get_summary_symbols(summary):
+            name = symbol[0].lower()
+            symbols = self._symbols.get(name)
+            if symbols is None:
+                symbols = self._symbols[name] = {}
+                for trigram in get_trigrams(name):
+                    self._names_by_trigram[trigram].add(name)
+            symbols.setdefault(summary.uri, []).append(symbol)
+
+    def _remove_summary(self, summary: XmlFileSummary) -> None:
+        for name in {symbol[0].lower() for symbol in get_summary_symbols(summary)}:
+            symbols = self._symbols[name]
+            symbols.pop(summary.uri, None)
+            if symbols:
+                continue
+            del self._symbols[name]
+            for trigram in get_trigrams(name):
+                names = self._names_by_trigram[trigram]
+                names.discard(name)
+                if not names:
+                    del self._names_by_trigram[trigram]
+
+
+def get_trigrams(text: str) -> set[str]:
+    """Gets all the substrings of three characters of the given text."""
+    return {text[index : index + TRIGRAM_SIZE] for index in range(len(text) - TRIGRAM_SIZE + 1)}
+
+
+def get_match_rank(query: str, name: str) -> int | None:
+    """Gets how well the lower case name matches the lower case query, lower is better.
+
+    Returns:
+        Optional[int]: 0 if the name is the query, 1 if it starts with the query, 2 if it contains
+        the query, 3 if it contains all the characters of the query in order or None if it does not match.
+    """
+    if name == query:
+        return 0
+    if name.startswith(query):
+        return 1
+    if query in name:
+        return 2
+    characters = iter(name)
+    if all(character in characters for character in query):
+        return 3
+    return None
+
+
+def get_summary_symbols(summary: XmlFileSummary) -> list[IndexedSymbol]:
+    """Gets the name, kind, range and container name of the symbols declared in the indexed file."""
+    path = to_fs_path(summary.uri)
+    file_name = os.path.basename(path) if path else summary.uri
+    container = summary.tool_id or file_name
+    result: list[IndexedSymbol] = []
+    if summary.tool_id:
+        result.append((summary.tool_id, SymbolKind.Class, summary.tool_range, file_name))
+    result.extend((element.name, SymbolKind.Field, element.range, container) for element in summary.inputs)
+    result.extend((element.name, SymbolKind.Property, element.range, container) for element in summary.outputs)
+    result.extend(
+        (element.name, MACRO_SYMBOL_KINDS.get(element.tag, SymbolKind.Function), element.range, container)
+        for element in summary.macros
+    )
+    return result
+
+
+def _create_symbol(uri: str, name: str, kind: SymbolKind, range: Range | None, container: str) -> WorkspaceSymbol:
+    range = range or Range(start=Position(line=0, character=0), end=Position(line=0, character=0))
+    return WorkspaceSymbol(name=name, kind=kind, location=Location(uri=uri, range=range), container_name=container)
@@ -58,3 +58,4 @@ IMPORT = "import"
 TOKEN = "token"
 MACRO = "macro"
 XML = "xml"
+EXPAND = "expand"
@@ -3,8 +3,6 @@ from typing import (
     cast,
 )
 
-from anytree import find  # type: ignore
-from galaxy.util import xml_macros
 from lsprotocol.types import (
     Position,
     Range,
@@ -59,7 +57,7 @@ class GalaxyToolXmlDocument:
     @property
     def source(self) -> str:
         """The contents of the tool document."""
-        return self.xml_document.document.source
+        return self.xml_document.source
 
     @property
     def path(self) -> str | None:
@@ -77,8 +75,11 @@ class GalaxyToolXmlDocument:
         Returns:
             Optional[XmlElement]: The first element matching the name.
         """
-        node = find(self.xml_document, filter_=lambda node: node.name == name, maxlevel=maxlevel)
-        return cast(XmlElement, node)
+        for element in self.xml_document.get_elements_with_name(name):
+            # The document itself is at the first level
+            if element.depth < maxlevel:
+                return element
+        return None
 
     def get_content_range(self, element: XmlContainerNode | None) -> Range | None:
         """Returns the Range of the content block of the given element.
@@ -199,7 +200,7 @@ class GalaxyToolXmlDocument:
         import_elements = self.get_macro_import_elements()
         if import_elements:
             for imp in import_elements:
-                filename = imp.get_content(self.xml_document.document.source)
+                filename = imp.get_content(self.xml_document.source)
                 if filename:
                     path = tool_directory / filename
                     if path.exists():
@@ -222,7 +223,7 @@ class GalaxyToolXmlDocument:
             import_elements = self.get_macro_import_elements()
             if import_elements:
                 for imp in import_elements:
-                    imp_filename = imp.get_content(self.xml_document.document.source)
+                    imp_filename = imp.get_content(self.xml_document.source)
                     if imp_filename == filename:
                         return self.xml_document.get_full_range(imp)
         return None
@@ -234,8 +235,7 @@ class GalaxyToolXmlDocument:
         if self.uses_macros:
             try:
                 document = self.document
-                expanded_tool_tree, _ = xml_macros.load_with_references(document.path)
-                expanded_tool_tree = cast(etree._ElementTree, expanded_tool_tree)  # type: ignore
+                expanded_tool_tree = self.xml_document.load_expanded_tree()
                 expanded_source = etree.tostring(expanded_tool_tree, encoding=str)
                 expanded_document = TextDocument(uri=document.uri, source=expanded_source, version=document.version)
                 return GalaxyToolXmlDocument(expanded_document)
@@ -118,8 +118,7 @@ class SnippetGenerator(ABC):
         """
         if options:
             if default_option:
-                options.remove(default_option)
-                options.insert(0, default_option)
+                options = [default_option, *(option for option in options if option != default_option)]
             self.tabstop_count += 1
             return f"${{{self.tabstop_count}|{','.join(options)}|}}"
         return self._get_next_tabstop()
@@ -529,9 +529,8 @@ class GalaxyToolTestUpdater(WorkspaceEditsGenerator):
         return root
 
     def _get_valid_ancestors(self, input_param: XmlElement) -> list[XmlElement]:
-        ancestors = input_param.ancestors
-        ancestors = [ancestor for ancestor in ancestors if self._is_valid_ancestor(ancestor)]
-        return ancestors
+        ancestors = cast(tuple[XmlElement, ...], input_param.ancestors)
+        return [ancestor for ancestor in ancestors if self._is_valid_ancestor(ancestor)]
 
     def _remove_params(self, params: set[XmlElement], result_edits: list[ReplaceTextRangeResult]) -> None:
         for param in sorted(
@@ -1,4 +1,3 @@
-
 from galaxyls.services.tools.common import ToolParamAttributeSorter
 from galaxyls.services.tools.constants import (
     ARGUMENT,
@@ -21,7 +20,6 @@ from galaxyls.services.xml.nodes import (
     XmlAttribute,
     XmlElement,
 )
-from galaxyls.services.xml.utils import convert_document_offsets_to_range
 from galaxyls.types import ReplaceTextRangeResult
 
 ORDER_LAST = 100
@@ -53,7 +51,7 @@ class IUCToolParamAttributeSorter(ToolParamAttributeSorter):
             sorted_attributes_text = self._get_param_attributes_as_text_sorted(param, sorted_attribute_names)
             start, end = param.get_attributes_offsets()
             return ReplaceTextRangeResult(
-                replace_range=convert_document_offsets_to_range(xml_document.document, start, end),
+                replace_range=xml_document.get_range(start, end),
                 text=sorted_attributes_text,
             )
         return None
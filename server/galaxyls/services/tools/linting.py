@@ -16,6 +16,10 @@ from lsprotocol.types import (
 
 from galaxyls.services.tools.common import ToolLinter
 from galaxyls.services.xml.document import XmlDocument
+from galaxyls.stats import (
+    LINT,
+    measure,
+)
 
 
 class GalaxyToolLinter(ToolLinter):
@@ -23,6 +27,10 @@ class GalaxyToolLinter(ToolLinter):
 
     def lint_document(self, xml_document: XmlDocument) -> list[Diagnostic]:
         """Lint the given document using the Galaxy linter modules and return a list of Diagnostics."""
+        with measure(LINT):
+            return self._lint_document(xml_document)
+
+    def _lint_document(self, xml_document: XmlDocument) -> list[Diagnostic]:
         result: list[Diagnostic] = []
         xml_tree = xml_document.xml_tree_expanded
         if not xml_document.is_tool_file or xml_tree is None:
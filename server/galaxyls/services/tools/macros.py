@@ -1,7 +1,16 @@
+import os
+from collections.abc import Callable
+
 import attrs
 from lsprotocol.types import Location
+from pygls.uris import to_fs_path
 from pygls.workspace import Workspace
 
+from galaxyls.memory import (
+    CacheEntries,
+    CacheRegistry,
+    estimate_document_size,
+)
 from galaxyls.services.tools.constants import (
     MACRO,
     NAME,
@@ -12,6 +21,10 @@ from galaxyls.services.tools.document import GalaxyToolXmlDocument
 from galaxyls.services.xml.document import XmlDocument
 from galaxyls.services.xml.nodes import XmlElement
 from galaxyls.services.xml.parser import XmlDocumentParser
+from galaxyls.stats import (
+    MACROS_LOAD,
+    measure,
+)
 
 
 @attrs.define
@@ -80,20 +93,102 @@ class ToolMacroDefinitions:
         return self.macros.get(macro_name)
 
 
+FileStamp = tuple[str, int, int]
+
+
+class MacroFilesIndex:
+    """Workspace wide cache of the parsed macro files.
+
+    Many tools in the same repository usually import the same macros file, so each
+    file is parsed only once and shared until it changes. Every entry is stamped with
+    the version of the document if it is open in the editor or with the modification
+    time and size of the file on disk otherwise. An entry is discarded when it is
+    explicitly invalidated, when its stamp no longer matches or when it is the least
+    recently used entry and the memory budget of the registry is exceeded.
+    """
+
+    def __init__(
+        self, workspace: Workspace, load: Callable[[str], ImportedMacrosFile], registry: CacheRegistry | None = None
+    ) -> None:
+        self.workspace = workspace
+        self._load = load
+        self._entries: CacheEntries[str, tuple[FileStamp, ImportedMacrosFile]] = CacheEntries(
+            registry or CacheRegistry(), "macro_files", _estimate_size
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, file_uri: str) -> bool:
+        return file_uri in self._entries
+
+    def get(self, file_name: str, file_uri: str) -> ImportedMacrosFile:
+        """Gets the definitions in the macros file with the given URI.
+
+        Args:
+            file_name (str): The name used to import the file from the tool.
+            file_uri (str): The URI of the macros file.
+
+        Returns:
+            ImportedMacrosFile: The parsed macros file.
+        """
+        stamp = self._get_stamp(file_uri)
+        entry = self._entries.get(file_uri)
+        if entry is not None and stamp is not None and entry[0] == stamp:
+            macros_file = entry[1]
+        else:
+            macros_file = self._load(file_uri)
+            if stamp is None:
+                self._entries.pop(file_uri)
+            else:
+                self._entries.put(file_uri, (stamp, macros_file))
+        if macros_file.file_name != file_name:
+            return attrs.evolve(macros_file, file_name=file_name)
+        return macros_file
+
+    def invalidate(self, file_uri: str) -> None:
+        """Discards the cached definitions of the file with the given URI if there are any."""
+        self._entries.pop(file_uri)
+
+    def clear(self) -> None:
+        """Discards all the cached definitions."""
+        self._entries.clear()
+
+    def _get_stamp(self, file_uri: str) -> FileStamp | None:
+        document = self.workspace.text_documents.get(file_uri)
+        if document is not None and document.version is not None:
+            return ("version", document.version, 0)
+        path = to_fs_path(file_uri)
+        if path is None:
+            return None
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return ("mtime", stat.st_mtime_ns, stat.st_size)
+
+
+def _estimate_size(entry: tuple[FileStamp, ImportedMacrosFile]) -> int:
+    document = entry[1].document
+    return estimate_document_size(document.source) if document else 0
+
+
 class MacroDefinitionsProvider:
     """Provides location information about macros imported by a tool."""
 
-    def __init__(self, workspace: Workspace) -> None:
+    def __init__(self, workspace: Workspace, registry: CacheRegistry | None = None) -> None:
         self.workspace = workspace
+        self.macro_files_index = MacroFilesIndex(workspace, self._load_macros_file, registry)
 
     def load_macro_definitions(self, tool_xml: XmlDocument) -> ToolMacroDefinitions:
-        tool = GalaxyToolXmlDocument.from_xml_document(tool_xml)
-        tokens = self._get_token_definitions(tool_xml)
-        macros = self._get_macro_definitions(tool_xml)
-        imported_macro_files = self._get_imported_macro_files_from_tool(tool)
-        for file in imported_macro_files.values():
-            tokens.update(file.tokens)
-            macros.update(file.macros)
+        with measure(MACROS_LOAD):
+            tool = GalaxyToolXmlDocument.from_xml_document(tool_xml)
+            tokens = self._get_token_definitions(tool_xml)
+            macros = self._get_macro_definitions(tool_xml)
+            imported_macro_files = self._get_imported_macro_files_from_tool(tool)
+            for file in imported_macro_files.values():
+                tokens.update(file.tokens)
+                macros.update(file.macros)
         return ToolMacroDefinitions(
             tool_document=tool_xml,
             imported_macros=imported_macro_files,
@@ -120,18 +215,19 @@ class MacroDefinitionsProvider:
         macro_files = {}
         uris_dict = tool.get_macro_import_uris()
         for file_name, file_uri in uris_dict.items():
-            macros_document = self._load_macros_document(file_uri)
-            tokens = self._get_token_definitions(macros_document)
-            macros = self._get_macro_definitions(macros_document)
-            macro_files[file_name] = ImportedMacrosFile(
-                file_name=file_name,
-                file_uri=file_uri,
-                document=macros_document,
-                tokens=tokens,
-                macros=macros,
-            )
+            macro_files[file_name] = self.macro_files_index.get(file_name, file_uri)
         return macro_files
 
+    def _load_macros_file(self, file_uri: str) -> ImportedMacrosFile:
+        macros_document = self._load_macros_document(file_uri)
+        return ImportedMacrosFile(
+            file_name=os.path.basename(macros_document.document.path),
+            file_uri=file_uri,
+            document=macros_document,
+            tokens=self._get_token_definitions(macros_document),
+            macros=self._get_macro_definitions(macros_document),
+        )
+
     def _load_macros_document(self, document_uri: str) -> XmlDocument:
         document = self.workspace.get_text_document(document_uri)
         xml_document = XmlDocumentParser().parse(document)
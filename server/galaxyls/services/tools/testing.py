@@ -1,7 +1,16 @@
-from pygls.workspace import Workspace
+from collections.abc import Callable
+
+from pygls.workspace import (
+    TextDocument,
+    Workspace,
+)
 
 from galaxyls.services.tools.common import TestsDiscoveryService
 from galaxyls.services.tools.document import GalaxyToolXmlDocument
+from galaxyls.services.tools.workspace import (
+    WorkspaceToolIndex,
+    XmlFileSummary,
+)
 from galaxyls.services.validation import DocumentValidator
 from galaxyls.services.xml.document import XmlDocument
 from galaxyls.services.xml.parser import XmlDocumentParser
@@ -12,17 +21,39 @@ from galaxyls.types import (
 
 
 class ToolTestsDiscoveryService(TestsDiscoveryService):
+    """Discovers the tests of the tools in the workspace.
+
+    The tests of the documents open in the editor are taken from their current contents.
+    If there is a workspace index, the tests of the rest of tools are taken from it.
+    """
+
     document_validator = DocumentValidator()
 
+    def __init__(
+        self,
+        workspace_index: WorkspaceToolIndex | None = None,
+        get_xml_document: Callable[[TextDocument], XmlDocument] | None = None,
+    ) -> None:
+        self.workspace_index = workspace_index
+        self._get_xml_document = get_xml_document or XmlDocumentParser().parse
+
     def discover_tests_in_workspace(self, workspace: Workspace) -> list[TestSuiteInfoResult]:
         rval: list[TestSuiteInfoResult] = []
+        open_documents = set()
         for doc_uri in workspace.text_documents:
+            open_documents.add(doc_uri)
             document = workspace.get_text_document(doc_uri)
             if self.document_validator.is_tool_document(document):
-                xml_document = XmlDocumentParser().parse(document)
+                xml_document = self._get_xml_document(document)
                 test_suite = self._get_test_suite_from_document(xml_document)
                 if test_suite:
                     rval.append(test_suite)
+        if self.workspace_index is not None:
+            for summary in self.workspace_index.get_tool_summaries():
+                if summary.uri not in open_documents:
+                    test_suite = self._get_test_suite_from_summary(summary)
+                    if test_suite:
+                        rval.append(test_suite)
         return rval
 
     def discover_tests_in_document(self, xml_document: XmlDocument) -> TestSuiteInfoResult | None:
@@ -56,3 +87,18 @@ class ToolTestsDiscoveryService(TestsDiscoveryService):
                 children=test_cases,
             )
         return None
+
+    def _get_test_suite_from_summary(self, summary: XmlFileSummary) -> TestSuiteInfoResult | None:
+        tool_id = summary.tool_id
+        if tool_id and summary.tests_range:
+            test_cases = [
+                TestInfoResult(tool_id=tool_id, test_id=str(test_number), uri=summary.uri, range=test_range)
+                for test_number, test_range in enumerate(summary.tests, start=1)
+            ]
+            return TestSuiteInfoResult(
+                tool_id=tool_id,
+                uri=summary.uri,
+                range=summary.tests_range,
+                children=test_cases,
+            )
+        return None
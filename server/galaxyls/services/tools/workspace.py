@@ -0,0 +1,666 @@
+"""Index of the tool wrappers and macro files in the workspace.
+
+Features like the test discovery need some information about every tool in the
+workspace, not only about the documents open in the editor. Parsing all the XML
+files every time is too slow for repositories with hundreds of tools, so the
+relevant information of every tool and macros file is extracted once into a small
+summary and kept in an index.
+
+The index is built in the background when the server starts and it is stored in
+the cache directory, so on the next start only the files modified in the meantime
+need to be parsed again. When many files need to be parsed, they are distributed
+across a pool of worker processes, so the summaries must be picklable. Afterwards,
+the files reported as changed are indexed again the next time the index is used.
+Files can also change without being reported, for example with a `git checkout` or
+with clients that do not watch the files, so the stamps of the indexed files are
+checked again, in a background thread, before the features that read them.
+"""
+
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+from abc import (
+    ABC,
+    abstractmethod,
+)
+from collections.abc import (
+    Callable,
+    Iterable,
+    Iterator,
+)
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any
+
+import attrs
+from lsprotocol.types import (
+    Position,
+    Range,
+)
+from pygls.uris import (
+    from_fs_path,
+    to_fs_path,
+)
+from pygls.workspace import (
+    TextDocument,
+    Workspace,
+)
+
+from galaxyls.services.tools.constants import (
+    ARGUMENT,
+    EXPAND,
+    IMPORT,
+    MACRO,
+    NAME,
+    TOKEN,
+    XML,
+)
+from galaxyls.services.tools.document import GalaxyToolXmlDocument
+from galaxyls.services.validation import (
+    MAX_PEEK_CONTENT,
+    DocumentValidator,
+)
+from galaxyls.services.xml.document import XmlDocument
+from galaxyls.services.xml.nodes import (
+    XmlAttributeValue,
+    XmlElement,
+)
+from galaxyls.services.xml.parser import XmlDocumentParser
+from galaxyls.services.xml.types import DocumentType
+from galaxyls.version import GLS_VERSION
+
+logger = logging.getLogger(__name__)
+
+# Must be increased every time the structure of the stored index changes
+INDEX_FORMAT_VERSION = 4
+INDEX_FILE_PREFIX = "workspace-index-"
+MAX_STORED_INDEXES = 16
+"""The indexes of the workspaces opened least recently are deleted when there are more than this."""
+IGNORED_DIRECTORIES = {"node_modules", "__pycache__"}
+INDEXED_DOCUMENT_TYPES = {DocumentType.TOOL.name.lower(), DocumentType.MACROS.name.lower()}
+MACRO_DEFINITION_TAGS = [TOKEN, XML, MACRO]
+TOKEN_PATTERN = re.compile(r"@\w+@")
+
+# Indexing less files than this in worker processes is slower than doing it in the current thread
+PARALLEL_INDEXING_THRESHOLD = 64
+MAX_INDEXING_CHUNK_SIZE = 16
+DEFAULT_MAX_INDEXING_WORKERS = min(8, os.cpu_count() or 1)
+INDEX_SAVE_DELAY = 5.0
+"""Seconds to wait before storing the index after a change, to store it once for many changes."""
+
+FileStamp = tuple[int, int]
+IndexingProgressHandler = Callable[[int, int], None]
+
+
+class StaleIndexError(Exception):
+    """Raised when some indexed files keep changing while a result is computed from their summaries."""
+
+
+@attrs.define
+class IndexedElement:
+    """An element declared in an indexed file."""
+
+    name: str
+    tag: str
+    range: Range
+    name_range: Range | None = None
+    """The range of the value of the `name` attribute without quotes, if the element has one."""
+
+
+@attrs.define
+class XmlFileSummary:
+    """The information extracted from a tool or macros file for the workspace index.
+
+    All the ranges use UTF-16 code units, the default position encoding of the protocol.
+    """
+
+    uri: str
+    document_type: DocumentType
+    stamp: FileStamp
+    """The modification time and size of the file when it was indexed."""
+    tool_id: str | None = None
+    tool_version: str | None = None
+    tool_range: Range | None = None
+    tests_range: Range | None = None
+    tests: list[Range] = attrs.Factory(list)
+    inputs: list[IndexedElement] = attrs.Factory(list)
+    outputs: list[IndexedElement] = attrs.Factory(list)
+    macros: list[IndexedElement] = attrs.Factory(list)
+    """The tokens, xml and macro definitions declared in the file."""
+    imports: list[str] = attrs.Factory(list)
+    """The names of the imported macro files."""
+    usages: list[IndexedElement] = attrs.Factory(list)
+    """The macros expanded and the tokens used in the file, tagged as `expand` or `token`."""
+
+    @property
+    def is_tool(self) -> bool:
+        return self.document_type == DocumentType.TOOL
+
+
+def get_file_stamp(path: str) -> FileStamp | None:
+    """Gets the modification time and size of the file or None if it does not exist."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def iter_xml_files(root: str) -> Iterator[str]:
+    """Yields the paths of all the XML files under the given directory.
+
+    Hidden directories and some well known directories that never contain tools are skipped."""
+    for directory, subdirectories, files in os.walk(root):
+        subdirectories[:] = [name for name in subdirectories if not name.startswith(".") and name not in IGNORED_DIRECTORIES]
+        for name in files:
+            if name.lower().endswith(".xml"):
+                yield os.path.join(directory, name)
+
+
+def create_indexing_executor(max_workers: int) -> ProcessPoolExecutor:
+    """Creates the pool of worker processes used to index the files.
+
+    The workers are spawned instead of forked since the server has other threads running. They
+    only import this module to summarize the files, and the module that started the process
+    when it is a script, which is why the entry point of the server imports it lazily."""
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def index_file(path: str) -> XmlFileSummary | None:
+    """Extracts the summary of the tool or macros file in the given path.
+
+    Only the beginning of the file is read if it is not a tool or macros file.
+
+    Args:
+        path (str): The path of the file.
+
+    Returns:
+        Optional[XmlFileSummary]: The summary of the file or None if it is not a tool
+        or macros file or it can not be read.
+    """
+    stamp = get_file_stamp(path)
+    uri = from_fs_path(path)
+    if stamp is None or uri is None:
+        return None
+    try:
+        with open(path, encoding="utf-8") as file:
+            head = file.read(MAX_PEEK_CONTENT)
+            root_tag = DocumentValidator.get_document_root_tag(TextDocument(uri, head))
+            if root_tag not in INDEXED_DOCUMENT_TYPES:
+                return None
+            source = head + file.read()
+    except (OSError, UnicodeDecodeError):
+        return None
+    xml_document = XmlDocumentParser().parse(TextDocument(uri, source))
+    return summarize_xml_document(xml_document, stamp)
+
+
+def summarize_xml_document(xml_document: XmlDocument, stamp: FileStamp) -> XmlFileSummary | None:
+    """Extracts the information stored in the workspace index from the parsed document.
+
+    Args:
+        xml_document (XmlDocument): The parsed tool or macros file.
+        stamp (FileStamp): The modification time and size of the file.
+
+    Returns:
+        Optional[XmlFileSummary]: The summary of the document or None if it is not a tool or macros file.
+    """
+    if not (xml_document.is_tool_file or xml_document.is_macros_file):
+        return None
+    summary = XmlFileSummary(uri=xml_document.document.uri, document_type=xml_document.document_type, stamp=stamp)
+    source = xml_document.source
+    for tag in MACRO_DEFINITION_TAGS:
+        summary.macros.extend(_get_named_elements(xml_document, xml_document.get_elements_with_name(tag)))
+    summary.macros.sort(key=lambda element: (element.range.start.line, element.range.start.character))
+    summary.imports = [
+        file_name for element in xml_document.get_elements_with_name(IMPORT) if (file_name := element.get_content(source))
+    ]
+    summary.usages = get_macro_usages(xml_document)
+    if xml_document.is_tool_file:
+        tool = GalaxyToolXmlDocument.from_xml_document(xml_document)
+        tool_element = tool.get_tool_element()
+        if tool_element:
+            summary.tool_id = tool_element.get_attribute_value("id")
+            summary.tool_version = tool_element.get_attribute_value("version")
+            summary.tool_range = xml_document.get_full_range(tool_element)
+        summary.tests_range = tool.get_tests_range()
+        summary.tests = [range for test in tool.get_tests() if (range := xml_document.get_full_range(test))]
+        summary.inputs = _get_named_elements(xml_document, tool.get_input_params())
+        summary.outputs = _get_named_elements(xml_document, tool.get_outputs())
+    return summary
+
+
+def get_macro_usages(xml_document: XmlDocument) -> list[IndexedElement]:
+    """Gets the macros expanded and the tokens used in the document.
+
+    The range of a macro usage is the name in the `macro` attribute of the `expand` element and the range of a
+    token usage is the token including the `@` delimiters. The names of the `token` elements are not usages.
+
+    Args:
+        xml_document (XmlDocument): The parsed document.
+
+    Returns:
+        List[IndexedElement]: The usages sorted by position.
+    """
+    result: list[tuple[int, IndexedElement]] = []
+    for element in xml_document.get_elements_with_name(EXPAND):
+        attribute = element.attributes.get(MACRO)
+        if attribute and attribute.value and attribute.value.unquoted:
+            start, end = attribute.value.get_unquoted_content_offsets()
+            result.append((start, IndexedElement(attribute.value.unquoted, EXPAND, xml_document.get_range(start, end))))
+    for match in TOKEN_PATTERN.finditer(xml_document.source):
+        if not _is_token_declaration(xml_document, match.start()):
+            range = xml_document.get_range(match.start(), match.end())
+            result.append((match.start(), IndexedElement(match.group(), TOKEN, range)))
+    result.sort(key=lambda item: item[0])
+    return [usage for _, usage in result]
+
+
+def _is_token_declaration(xml_document: XmlDocument, offset: int) -> bool:
+    node = xml_document.find_node_at(offset)
+    return (
+        isinstance(node, XmlAttributeValue)
+        and node.owner.name == NAME
+        and node.owner.owner.name == TOKEN
+        and node.start < offset < node.end
+    )
+
+
+def _get_named_elements(xml_document: XmlDocument, elements: Iterable[XmlElement]) -> list[IndexedElement]:
+    result = []
+    for element in elements:
+        name = element.get_attribute_value(NAME)
+        name_range = None
+        if name:
+            name_attribute = element.attributes[NAME]
+            if name_attribute.value:
+                name_range = xml_document.get_range(*name_attribute.value.get_unquoted_content_offsets())
+        else:
+            argument = element.get_attribute_value(ARGUMENT)
+            name = argument.lstrip("-").replace("-", "_") if argument else None
+        range = xml_document.get_full_range(element)
+        if name and element.name and range:
+            result.append(IndexedElement(name, element.name, range, name_range))
+    return result
+
+
+class WorkspaceToolIndex:
+    """Keeps the summaries of all the tool and macro files found in the workspace folders.
+
+    The index is built by `build` which is meant to run in a background thread, the summaries
+    are available as soon as each file is indexed. Files reported as changed with
+    `invalidate` are indexed again, if their modification time or size changed, the next
+    time the index is used. `invalidate_changed` finds the files changed without being
+    reported. The index is stored again in a background thread a few seconds after it
+    changes. All the methods are thread safe.
+    """
+
+    def __init__(
+        self, workspace: Workspace, storage_dir: Path | None = None, max_workers: int = DEFAULT_MAX_INDEXING_WORKERS
+    ) -> None:
+        self.workspace = workspace
+        self.storage_dir = storage_dir
+        self.max_workers = max_workers
+        self.parallel_threshold = PARALLEL_INDEXING_THRESHOLD
+        self.save_delay = INDEX_SAVE_DELAY
+        self.is_ready = False
+        self.version = 0
+        """Increased every time a summary is added, replaced or removed."""
+        self._entries: dict[str, XmlFileSummary] = {}
+        self._ignored: dict[str, FileStamp] = {}
+        """The stamps of the XML files that are neither tools nor macro files."""
+        self._stale: set[str] = set()
+        self._save_timer: threading.Timer | None = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, uri: str) -> bool:
+        return uri in self._entries
+
+    def get_roots(self) -> list[str]:
+        """Gets the paths of the workspace folders."""
+        uris = [folder.uri for folder in self.workspace.folders.values()] or [self.workspace.root_uri]
+        paths = [to_fs_path(uri) for uri in uris if uri]
+        return sorted({path for path in paths if path})
+
+    def build(self, on_progress: IndexingProgressHandler | None = None) -> None:
+        """Indexes all the tool and macro files in the workspace folders.
+
+        The summaries stored in a previous session are reused for the files that were not modified since then.
+        When there are many files to parse, they are distributed across a pool of worker processes.
+        Each summary is available in the index as soon as the file is indexed.
+
+        Args:
+            on_progress (Optional[IndexingProgressHandler], optional): Called with the number of files
+            indexed so far and the total number of files to index, every time a file is indexed.
+        """
+        stored, stored_ignored = self._load()
+        found: set[str] = set()
+        ignored: dict[str, FileStamp] = {}
+        pending: list[tuple[str, str, FileStamp]] = []
+        for path in self._iter_files():
+            uri = from_fs_path(path)
+            stamp = get_file_stamp(path)
+            if uri is None or stamp is None:
+                continue
+            found.add(uri)
+            summary = stored.get(uri)
+            if stored_ignored.get(uri) == stamp:
+                ignored[uri] = stamp
+            elif summary is not None and summary.stamp == stamp:
+                with self._lock:
+                    self._entries[uri] = summary
+                    self.version += 1
+            else:
+                pending.append((path, uri, stamp))
+
+        indexed = 0
+
+        def add_summaries(summaries: Iterable[XmlFileSummary | None]) -> None:
+            nonlocal indexed
+            for summary in summaries:
+                _, uri, stamp = pending[indexed]
+                with self._lock:
+                    if summary is None:
+                        if self._entries.pop(uri, None) is not None:
+                            self.version += 1
+                        ignored[uri] = stamp
+                    else:
+                        self._entries[uri] = summary
+                        self.version += 1
+                indexed += 1
+                if on_progress is not None:
+                    on_progress(indexed, len(pending))
+
+        paths = [path for path, _, _ in pending]
+        if self.max_workers > 1 and len(pending) >= self.parallel_threshold:
+            chunksize = max(1, min(MAX_INDEXING_CHUNK_SIZE, len(paths) // (self.max_workers * 4)))
+            try:
+                with create_indexing_executor(self.max_workers) as executor:
+                    add_summaries(executor.map(index_file, paths, chunksize=chunksize))
+            except (BrokenProcessPool, OSError):
+                logger.warning("Unable to index the workspace in worker processes", exc_info=True)
+        # Any file not indexed by the worker processes is indexed in this thread
+        add_summaries(map(index_file, paths[indexed:]))
+
+        with self._lock:
+            for uri in [uri for uri in self._entries if uri not in found]:
+                del self._entries[uri]
+                self.version += 1
+            self._ignored = ignored
+            self.is_ready = True
+        self._save()
+
+    def invalidate(self, uri: str) -> None:
+        """Marks the file with the given URI to be checked again the next time the index is used.
+
+        Must be called when the file is created, changed or deleted."""
+        if uri.lower().endswith(".xml"):
+            with self._lock:
+                self._stale.add(uri)
+
+    def find_changed(self, uris: Iterable[str] | None = None) -> list[str]:
+        """Gets the indexed files whose modification time or size changed since they were indexed.
+
+        Args:
+            uris (Optional[Iterable[str]], optional): The URIs of the files to check. By default all
+            the indexed files are checked, including the XML files that are neither tools nor macro files,
+            which reads the stamps of all of them so it should not be done in the event loop.
+
+        Returns:
+            List[str]: The URIs of the changed or deleted files.
+        """
+        with self._lock:
+            stamps = {uri: summary.stamp for uri, summary in self._entries.items()}
+            stamps.update(self._ignored)
+        if uris is not None:
+            stamps = {uri: stamps[uri] for uri in uris if uri in stamps}
+        changed = []
+        for uri, stamp in stamps.items():
+            path = to_fs_path(uri)
+            if path is None or get_file_stamp(path) != stamp:
+                changed.append(uri)
+        return changed
+
+    def invalidate_changed(self, uris: Iterable[str] | None = None) -> None:
+        """Marks the indexed files changed since they were indexed to be indexed again, like `invalidate`.
+
+        Detects the files changed without being reported, see `find_changed`."""
+        changed = self.find_changed(uris)
+        with self._lock:
+            self._stale.update(changed)
+
+    def get(self, uri: str) -> XmlFileSummary | None:
+        """Gets the summary of the file with the given URI if it is indexed."""
+        self.refresh()
+        with self._lock:
+            return self._entries.get(uri)
+
+    def get_summaries(self) -> list[XmlFileSummary]:
+        """Gets the summaries of all the files indexed so far sorted by URI."""
+        self.refresh()
+        with self._lock:
+            return [self._entries[uri] for uri in sorted(self._entries)]
+
+    def get_tool_summaries(self) -> list[XmlFileSummary]:
+        """Gets the summaries of all the tools indexed so far sorted by URI."""
+        return [summary for summary in self.get_summaries() if summary.is_tool]
+
+    def refresh(self) -> None:
+        """Indexes again the files invalidated since the last time the index was used."""
+        with self._lock:
+            stale, self._stale = self._stale, set()
+        if not stale:
+            return
+        roots = [os.path.join(root, "") for root in self.get_roots()]
+        changed = False
+        for uri in stale:
+            path = to_fs_path(uri)
+            stamp = get_file_stamp(path) if path else None
+            with self._lock:
+                entry = self._entries.get(uri)
+            if entry is not None and entry.stamp == stamp:
+                continue
+            in_workspace = path is not None and any(path.startswith(root) for root in roots)
+            summary = index_file(path) if path and stamp and in_workspace else None
+            with self._lock:
+                if summary is None:
+                    changed = self._entries.pop(uri, None) is not None or changed
+                    if stamp and in_workspace:
+                        self._ignored[uri] = stamp
+                    else:
+                        self._ignored.pop(uri, None)
+                else:
+                    self._entries[uri] = summary
+                    self._ignored.pop(uri, None)
+                    changed = True
+        if changed:
+            with self._lock:
+                self.version += 1
+        if changed and self.is_ready:
+            self._schedule_save()
+
+    def get_storage_path(self) -> Path | None:
+        """Gets the path of the file where the index of this workspace is stored."""
+        if self.storage_dir is None:
+            return None
+        key = hashlib.sha256("\n".join(self.get_roots()).encode()).hexdigest()[:32]
+        return self.storage_dir / f"{INDEX_FILE_PREFIX}{key}.json"
+
+    def _iter_files(self) -> Iterator[str]:
+        for root in self.get_roots():
+            yield from iter_xml_files(root)
+
+    def _load(self) -> tuple[dict[str, XmlFileSummary], dict[str, FileStamp]]:
+        path = self.get_storage_path()
+        if path is None:
+            return {}, {}
+        try:
+            with open(path, encoding="utf-8") as index_file:
+                data = json.load(index_file)
+            if data.get("format") != INDEX_FORMAT_VERSION or data.get("version") != GLS_VERSION:
+                return {}, {}
+            summaries = {summary.uri: summary for summary in map(deserialize_summary, data["files"])}
+            ignored = {uri: (mtime, size) for uri, (mtime, size) in data["ignored"].items()}
+            return summaries, ignored
+        except FileNotFoundError:
+            return {}, {}
+        except (OSError, ValueError, KeyError, IndexError, TypeError):
+            logger.warning("Ignoring invalid workspace index %s", path, exc_info=True)
+            return {}, {}
+
+    def _schedule_save(self) -> None:
+        """Stores the index in a background thread after `save_delay` seconds, once for all the changes made meanwhile."""
+        if self.get_storage_path() is None:
+            return
+        with self._lock:
+            if self._save_timer is not None:
+                return
+            self._save_timer = threading.Timer(self.save_delay, self._save_scheduled)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def _save_scheduled(self) -> None:
+        with self._lock:
+            self._save_timer = None
+        self._save()
+
+    def _save(self) -> None:
+        path = self.get_storage_path()
+        if path is None:
+            return
+        with self._lock:
+            files = [serialize_summary(summary) for summary in self._entries.values()]
+            ignored = {uri: list(stamp) for uri, stamp in self._ignored.items()}
+        data = {"format": INDEX_FORMAT_VERSION, "version": GLS_VERSION, "files": files, "ignored": ignored}
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=path.parent, suffix=".tmp", delete=False) as file:
+                json.dump(data, file, separators=(",", ":"))
+            os.replace(file.name, path)
+        except OSError:
+            logger.warning("Unable to store the workspace index in %s", path, exc_info=True)
+        prune_stored_indexes(path.parent)
+
+
+def prune_stored_indexes(storage_dir: Path, max_indexes: int = MAX_STORED_INDEXES) -> None:
+    """Deletes the least recently stored workspace indexes in the directory over the given maximum."""
+    try:
+        paths = [(path.stat().st_mtime_ns, path) for path in storage_dir.glob(f"{INDEX_FILE_PREFIX}*.json")]
+    except OSError:
+        return
+    paths.sort(reverse=True)
+    for _, path in paths[max_indexes:]:
+        try:
+            path.unlink()
+        except OSError:
+            logger.warning("Unable to delete the workspace index %s", path, exc_info=True)
+
+
+class DerivedWorkspaceIndex(ABC):
+    """Base class of the indexes built from the summaries in the workspace index.
+
+    `update` brings the derived index up to date by removing the summaries of the files
+    changed since the last update and adding their new summaries.
+    """
+
+    def __init__(self, workspace_index: WorkspaceToolIndex) -> None:
+        self.workspace_index = workspace_index
+        self._index_version = -1
+        self._summaries: dict[str, XmlFileSummary] = {}
+
+    def update(self) -> None:
+        """Applies the changes in the workspace index since the last update."""
+        self.workspace_index.refresh()
+        if self.workspace_index.version == self._index_version:
+            return
+        self._index_version = self.workspace_index.version
+        summaries = {summary.uri: summary for summary in self.workspace_index.get_summaries()}
+        for uri, summary in list(self._summaries.items()):
+            if summaries.get(uri) is not summary:
+                del self._summaries[uri]
+                self._remove_summary(summary)
+        for uri, summary in summaries.items():
+            if uri not in self._summaries:
+                self._summaries[uri] = summary
+                self._add_summary(summary)
+
+    @abstractmethod
+    def _add_summary(self, summary: XmlFileSummary) -> None:
+        """Adds the information of a new or changed file to the derived index."""
+
+    @abstractmethod
+    def _remove_summary(self, summary: XmlFileSummary) -> None:
+        """Removes the information of a deleted or changed file from the derived index."""
+
+
+def serialize_summary(summary: XmlFileSummary) -> dict[str, Any]:
+    """Converts the summary into a compact JSON serializable structure."""
+    return {
+        "uri": summary.uri,
+        "type": summary.document_type.name,
+        "stamp": list(summary.stamp),
+        "id": summary.tool_id,
+        "version": summary.tool_version,
+        "tool_range": _serialize_range(summary.tool_range) if summary.tool_range else None,
+        "tests_range": _serialize_range(summary.tests_range) if summary.tests_range else None,
+        "tests": [_serialize_range(range) for range in summary.tests],
+        "inputs": [_serialize_element(element) for element in summary.inputs],
+        "outputs": [_serialize_element(element) for element in summary.outputs],
+        "macros": [_serialize_element(element) for element in summary.macros],
+        "imports": summary.imports,
+        "usages": [_serialize_element(element) for element in summary.usages],
+    }
+
+
+def deserialize_summary(data: dict[str, Any]) -> XmlFileSummary:
+    """Rebuilds the summary from the structure created by `serialize_summary`."""
+    stamp_mtime, stamp_size = data["stamp"]
+    return XmlFileSummary(
+        uri=data["uri"],
+        document_type=DocumentType[data["type"]],
+        stamp=(stamp_mtime, stamp_size),
+        tool_id=data["id"],
+        tool_version=data["version"],
+        tool_range=_deserialize_range(data["tool_range"]) if data["tool_range"] else None,
+        tests_range=_deserialize_range(data["tests_range"]) if data["tests_range"] else None,
+        tests=[_deserialize_range(range) for range in data["tests"]],
+        inputs=[_deserialize_element(element) for element in data["inputs"]],
+        outputs=[_deserialize_element(element) for element in data["outputs"]],
+        macros=[_deserialize_element(element) for element in data["macros"]],
+        imports=data["imports"],
+        usages=[_deserialize_element(element) for element in data["usages"]],
+    )
+
+
+def _serialize_range(range: Range) -> list[int]:
+    return [range.start.line, range.start.character, range.end.line, range.end.character]
+
+
+def _deserialize_range(data: list[int]) -> Range:
+    start_line, start_character, end_line, end_character = data
+    return Range(
+        start=Position(line=start_line, character=start_character),
+        end=Position(line=end_line, character=end_character),
+    )
+
+
+def _serialize_element(element: IndexedElement) -> list[Any]:
+    data = [element.name, element.tag, *_serialize_range(element.range)]
+    if element.name_range:
+        data.extend(_serialize_range(element.name_range))
+    return data
+
+
+def _deserialize_element(data: list[Any]) -> IndexedElement:
+    name, tag, *ranges = data
+    name_range = _deserialize_range(ranges[4:]) if len(ranges) > 4 else None
+    return IndexedElement(name, tag, _deserialize_range(ranges[:4]), name_range)
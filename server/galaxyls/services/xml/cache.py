@@ -0,0 +1,147 @@
+"""Caching of parsed XML documents shared by all the language server features."""
+
+from collections.abc import Sequence
+
+from lsprotocol.types import TextDocumentContentChangeEvent
+from pygls.workspace import TextDocument
+
+from galaxyls.memory import (
+    CacheEntries,
+    CacheRegistry,
+    estimate_document_size,
+)
+from galaxyls.services.macros import ExpandedTreeLoader
+from galaxyls.stats import (
+    PARSE,
+    PARSE_INCREMENTAL,
+    measure,
+)
+
+from .document import XmlDocument
+from .parser import XmlDocumentParser
+
+DEFAULT_MAX_CACHED_DOCUMENTS = 32
+
+
+class XmlDocumentCache:
+    """Keeps the syntax trees of the most recently used documents so every
+    request for the same document version shares a single parse.
+
+    Entries are keyed by the document URI and version. Only the latest parsed
+    version of each document is kept and the least recently used documents are
+    discarded when the cache grows over `max_size` entries or over the memory budget of
+    the registry.
+
+    If there is an `expanded_tree_loader` it is used by all the returned documents to expand
+    their macros.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_MAX_CACHED_DOCUMENTS, registry: CacheRegistry | None = None) -> None:
+        self.hits = 0
+        self.misses = 0
+        self._documents: CacheEntries[str, XmlDocument] = CacheEntries(
+            registry or CacheRegistry(), "documents", _estimate_size, max_entries=max_size
+        )
+        self._parser = XmlDocumentParser()
+        self._shared: set[str] = set()
+        """The URIs of the cached documents returned by `get_snapshot`."""
+        self.expanded_tree_loader: ExpandedTreeLoader | None = None
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def __contains__(self, uri: str) -> bool:
+        return uri in self._documents
+
+    def get(self, document: TextDocument) -> XmlDocument:
+        """Returns the parsed XML document for the current version of the given text document.
+
+        The document is parsed only if there is no cached syntax tree for the same URI and version.
+        Documents without version (not opened in the editor) are always parsed and never cached
+        since their contents can change on disk at any time.
+
+        Args:
+            document (TextDocument): The text document to parse.
+
+        Returns:
+            XmlDocument: The syntax tree of the document.
+        """
+        if document.version is None:
+            self.misses += 1
+            return self._parse(document)
+
+        cached = self._documents.peek(document.uri)
+        if cached is not None and cached.version == document.version:
+            self.hits += 1
+            self._documents.get(document.uri)
+            return cached
+
+        self.misses += 1
+        xml_document = self._parse(document)
+        self._store(xml_document)
+        return xml_document
+
+    def get_snapshot(self, document: TextDocument) -> XmlDocument:
+        """Returns the parsed XML document for the current version of the given text document
+        to be used by work running in another thread.
+
+        The cached syntax trees are updated in place by the following changes of their documents,
+        so the returned one is marked as shared and the next change is applied to a copy of it
+        instead. The returned syntax tree is never modified by the cache.
+
+        Args:
+            document (TextDocument): The text document to parse.
+
+        Returns:
+            XmlDocument: The syntax tree of the document.
+        """
+        xml_document = self.get(document)
+        if self._documents.peek(document.uri) is xml_document:
+            self._shared.add(document.uri)
+        return xml_document
+
+    def update(self, document: TextDocument, changes: Sequence[TextDocumentContentChangeEvent]) -> None:
+        """Brings the cached syntax tree of the document up to date with the given content changes.
+
+        The previous syntax tree is updated incrementally and replaced by the resulting one. If the
+        document is not cached nothing is done, it will be parsed the next time it is requested.
+
+        Args:
+            document (TextDocument): The text document with the changes already applied.
+            changes (Sequence[TextDocumentContentChangeEvent]): The content changes applied to the document.
+        """
+        previous = self._documents.peek(document.uri)
+        if previous is None or document.version is None:
+            return
+        with measure(PARSE_INCREMENTAL):
+            if document.uri in self._shared:
+                previous = previous.copy()
+            xml_document = self._parser.parse_incremental(previous, document, changes)
+        xml_document.expanded_tree_loader = self.expanded_tree_loader
+        self._store(xml_document)
+
+    def evict(self, uri: str) -> None:
+        """Removes the cached syntax tree of the document with the given URI if there is one."""
+        self._documents.pop(uri)
+        self._shared.discard(uri)
+
+    def clear(self) -> None:
+        """Removes all the cached documents and resets the statistics."""
+        self._documents.clear()
+        self._shared.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def _parse(self, document: TextDocument) -> XmlDocument:
+        with measure(PARSE):
+            xml_document = self._parser.parse(document)
+        xml_document.expanded_tree_loader = self.expanded_tree_loader
+        return xml_document
+
+    def _store(self, xml_document: XmlDocument) -> None:
+        self._shared.discard(xml_document.document.uri)
+        self._documents.put(xml_document.document.uri, xml_document)
+
+
+def _estimate_size(xml_document: XmlDocument) -> int:
+    return estimate_document_size(xml_document.source)
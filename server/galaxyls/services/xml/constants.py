@@ -1,3 +1,5 @@
+import re
+
 NEW_LINE = "\n"
 
 _EXL = ord("!")
@@ -24,10 +26,12 @@ _QMA = ord("?")
 
 WHITESPACE_CHARS = [_WSP, _TAB, _NWL, _LFD, _CAR]
 QUOTE_CHARS = [_DQO, _SQO]
-COMMENT_END_CHAR_SEQ = [_MIN, _MIN, _RAN]
-COMMENT_START_CHAR_SEQ = [_EXL, _MIN, _MIN]
-CDATA_START_CHAR_SEQ = [_EXL, _OSB, _CVL, _DVL, _AVL, _TVL, _AVL, _OSB]
-CDATA_END_CHAR_SEQ = [_CSB, _CSB, _RAN]
-PI_END_CHAR_SEQ = [_QMA, _RAN]
+WHITESPACE_PATTERN = re.compile(r"[ \t\n\f\r]+")
+NAME_CHARS_PATTERN = re.compile(r"\w+")  # Same as `ch == "_" or ch.isalnum()` for every character
+COMMENT_END_CHAR_SEQ = "-->"
+COMMENT_START_CHAR_SEQ = "!--"
+CDATA_START_CHAR_SEQ = "![CDATA["
+CDATA_END_CHAR_SEQ = "]]>"
+PI_END_CHAR_SEQ = "?>"
 
 UNDEFINED_OFFSET = -1
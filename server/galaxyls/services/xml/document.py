@@ -1,10 +1,13 @@
+from collections.abc import (
+    Iterable,
+    Sequence,
+)
 from typing import (
     Any,
     cast,
 )
 
-from anytree.search import findall  # type: ignore
-from galaxy.util import xml_macros
+from anytree import PreOrderIter  # type: ignore
 from lsprotocol.types import (
     Position,
     Range,
@@ -13,6 +16,15 @@ from lxml import etree
 from pygls.workspace import TextDocument
 
 from galaxyls.constants import DEFAULT_DOCUMENT_RANGE
+from galaxyls.services.macros import (
+    ExpandedTreeLoader,
+    expand_macros,
+    parse_xml_source,
+)
+from galaxyls.stats import (
+    RANGE_INDEX,
+    measure,
+)
 
 from .nodes import (
     XmlContainerNode,
@@ -23,10 +35,7 @@ from .types import (
     DocumentType,
     NodeType,
 )
-from .utils import (
-    convert_document_offset_to_position,
-    convert_document_offsets_to_range,
-)
+from .utils import LineIndex
 
 MACRO_RELATED_TAGS = ["import", "token", "macro", "xml", "expand"]
 
@@ -42,12 +51,18 @@ class XmlDocument(XmlSyntaxNode):
     def __init__(self, document: TextDocument):
         super().__init__()
         self.document: TextDocument = document
+        self.version: int | None = document.version
+        self.source: str = document.source
         self.supported_document_types: dict[str, DocumentType] = {
             "tool": DocumentType.TOOL,
             "macros": DocumentType.MACROS,
         }
         self._xml_tree: etree._ElementTree | None = None
         self._xml_tree_expanded: etree._ElementTree | None = None
+        self._xml_syntax_error: etree.XMLSyntaxError | None = None
+        self.expanded_tree_loader: ExpandedTreeLoader | None = None
+        self._line_index: LineIndex | None = None
+        self._elements_by_name: dict[str, list[XmlElement]] | None = None
 
     @property
     def node_type(self) -> NodeType:
@@ -74,16 +89,12 @@ class XmlDocument(XmlSyntaxNode):
 
     @property
     def uses_macros(self) -> bool:
-        """Indicates if this XML document contains any <expand> element.
+        """Indicates if this XML document contains any macro related element.
 
         Returns:
-            bool: True if the tool contains at least one <expand> elements.
+            bool: True if the tool contains at least one <import>, <token>, <macro>, <xml> or <expand> element.
         """
-        try:
-            found = findall(self.root, filter_=lambda node: node.name in MACRO_RELATED_TAGS, mincount=1)
-            return len(found) > 0
-        except BaseException:
-            return False
+        return any(self.get_elements_with_name(name) for name in MACRO_RELATED_TAGS)
 
     @property
     def document_type(self) -> DocumentType:
@@ -109,15 +120,24 @@ class XmlDocument(XmlSyntaxNode):
 
     @property
     def xml_tree(self) -> etree._ElementTree | None:
-        """Internal XML tree structure."""
-        if self._xml_tree is None:
+        """Internal XML tree structure.
+
+        It is parsed from the document source only once and shared by the syntax check,
+        the schema validation and the linting of the document."""
+        if self._xml_tree is None and self._xml_syntax_error is None:
             try:
-                tree = etree.parse(self.document.path)
-                self._xml_tree = tree
-            except etree.XMLSyntaxError:
-                pass  # Invalid XML document
+                self._xml_tree = parse_xml_source(self.source, self.document.path, remove_comments=False)
+            except etree.XMLSyntaxError as e:
+                self._xml_syntax_error = e
         return self._xml_tree
 
+    @property
+    def xml_syntax_error(self) -> etree.XMLSyntaxError | None:
+        """The error found parsing the document if it is not well-formed XML."""
+        if self.xml_tree is None:
+            return self._xml_syntax_error
+        return None
+
     @property
     def xml_has_syntax_errors(self) -> bool:
         return self.xml_tree is None
@@ -130,8 +150,7 @@ class XmlDocument(XmlSyntaxNode):
         if self._xml_tree_expanded is None:
             if self.uses_macros:
                 try:
-                    expanded_tool_tree, _ = xml_macros.load_with_references(self.document.path)
-                    self._xml_tree_expanded = expanded_tool_tree
+                    self._xml_tree_expanded = self.load_expanded_tree()
                 except etree.XMLSyntaxError:
                     pass  # Invalid XML document
                 except BaseException:
@@ -141,6 +160,64 @@ class XmlDocument(XmlSyntaxNode):
                 self._xml_tree_expanded = self.xml_tree
         return self._xml_tree_expanded
 
+    def load_expanded_tree(self) -> etree._ElementTree:
+        """Loads the XML tree structure of this document after expanding macros.
+
+        The macros are expanded by the `expanded_tree_loader` if there is one, otherwise
+        they are expanded reading the imported macro files from disk.
+
+        Raises:
+            etree.XMLSyntaxError: If the document or any of the imported files is not valid XML.
+
+        Returns:
+            etree._ElementTree: The expanded tree.
+        """
+        xml_tree = self.xml_tree
+        if xml_tree is None:
+            raise cast(etree.XMLSyntaxError, self._xml_syntax_error)
+        load = self.expanded_tree_loader or expand_macros
+        return load(self.document.path, self.source, xml_tree)
+
+    def copy(self) -> "XmlDocument":
+        """Creates a copy of this document with a copy of its syntax tree.
+
+        The line index is shared since it is never changed, while the XML trees and the index of
+        elements by name are built again for the copy when they are needed."""
+        xml_document = XmlDocument(self.document)
+        xml_document.version = self.version
+        xml_document.source = self.source
+        xml_document.expanded_tree_loader = self.expanded_tree_loader
+        xml_document._line_index = self._line_index
+        # The children are not assigned with the setter to keep the paths cached in the copies
+        children = [child.copy() for child in self.children]
+        for child in children:
+            child._parent = xml_document
+        xml_document._children = children or None
+        return xml_document
+
+    @property
+    def line_index(self) -> LineIndex:
+        """Table with the offsets where each line of the parsed source starts.
+
+        It is built the first time it is needed and used for all the offset/position
+        conversions in this document."""
+        if self._line_index is None:
+            with measure(RANGE_INDEX):
+                self._line_index = LineIndex(self.source, self.document.position_codec)
+        return self._line_index
+
+    def get_offset(self, position: Position) -> int:
+        """Converts the given position in client units to a character offset in the document."""
+        return self.line_index.position_to_offset(position)
+
+    def get_position(self, offset: int) -> Position:
+        """Converts the given character offset in the document to a position in client units."""
+        return self.line_index.offset_to_position(offset)
+
+    def get_range(self, start_offset: int, end_offset: int) -> Range:
+        """Converts the given character offsets in the document to a range in client units."""
+        return self.line_index.offsets_to_range(start_offset, end_offset)
+
     def get_node_at(self, offset: int) -> XmlSyntaxNode | None:
         """Gets the syntax node a the given offset."""
         return self.root.find_node_at(offset) if self.root else None
@@ -157,7 +234,7 @@ class XmlDocument(XmlSyntaxNode):
         start_offset, end_offset = element.get_content_offsets()
         if start_offset < 0 or end_offset < 0:
             return None
-        return convert_document_offsets_to_range(self.document, start_offset, end_offset)
+        return self.line_index.offsets_to_range(start_offset, end_offset)
 
     def get_element_name_range(self, element: XmlElement) -> Range | None:
         """Gets the Range positions for the given XML element's name in the document.
@@ -172,7 +249,7 @@ class XmlDocument(XmlSyntaxNode):
         end_offset = element.name_end_offset
         if start_offset < 0 or end_offset < 0:
             return None
-        return convert_document_offsets_to_range(self.document, start_offset, end_offset)
+        return self.line_index.offsets_to_range(start_offset, end_offset)
 
     def get_full_range(self, node: XmlSyntaxNode) -> Range | None:
         """Gets the Range positions for the given XML node in the document.
@@ -185,7 +262,7 @@ class XmlDocument(XmlSyntaxNode):
         """
         if node.start < 0 or node.end < 0:
             return None
-        return convert_document_offsets_to_range(self.document, node.start, node.end)
+        return self.line_index.offsets_to_range(node.start, node.end)
 
     def get_position_before(self, element: XmlElement) -> Position:
         """Return the position in the document before the given element.
@@ -196,7 +273,7 @@ class XmlDocument(XmlSyntaxNode):
         Returns:
             Position: The position just before the element declaration.
         """
-        return convert_document_offset_to_position(self.document, element.start)
+        return self.line_index.offset_to_position(element.start)
 
     def get_element_range(self, element: XmlElement) -> Range:
         """Gets the Range positions for the given XML element in the document.
@@ -207,7 +284,7 @@ class XmlDocument(XmlSyntaxNode):
         Returns:
             Range: The range positions for the entire node.
         """
-        return convert_document_offsets_to_range(self.document, element.start, element.end)
+        return self.line_index.offsets_to_range(element.start, element.end)
 
     def get_position_after(self, element: XmlElement) -> Position:
         """Return the position in the document after the given element.
@@ -219,8 +296,8 @@ class XmlDocument(XmlSyntaxNode):
             Position: The position just after the element declaration.
         """
         if element.is_self_closed:
-            return convert_document_offset_to_position(self.document, element.end)
-        return convert_document_offset_to_position(self.document, element.end_offset)
+            return self.line_index.offset_to_position(element.end)
+        return self.line_index.offset_to_position(element.end_offset)
 
     def get_position_after_last_child(self, element: XmlElement) -> Position:
         """Return the position in the document after the last child of the given element.
@@ -232,11 +309,11 @@ class XmlDocument(XmlSyntaxNode):
             Position: The position just after the last child element declaration.
         """
         if element.is_self_closed:
-            return convert_document_offset_to_position(self.document, element.end)
+            return self.line_index.offset_to_position(element.end)
         if element.elements:
             last = element.elements[-1]
             return self.get_position_after(last)
-        return convert_document_offset_to_position(self.document, element.end_tag_open_offset)
+        return self.line_index.offset_to_position(element.end_tag_open_offset)
 
     def get_position_before_first_child(self, element: XmlElement) -> Position:
         """Return the position in the document before the first child of the given element.
@@ -248,29 +325,57 @@ class XmlDocument(XmlSyntaxNode):
             Position: The position just before the first child element declaration.
         """
         if element.is_self_closed:
-            return convert_document_offset_to_position(self.document, element.end)
-        return convert_document_offset_to_position(self.document, element.end_tag_open_offset)
+            return self.line_index.offset_to_position(element.end)
+        return self.line_index.offset_to_position(element.end_tag_open_offset)
+
+    def index_elements(self, elements: Iterable[XmlElement] | None = None) -> None:
+        """Builds the index used to look up the elements of the document by name.
+
+        The path of every element is also computed, so it is ready for the XSD lookups.
+
+        Args:
+            elements (Optional[Iterable[XmlElement]], optional): All the elements of the document
+            in document order, as they are created by the parser. If None, the elements are
+            collected traversing the syntax tree.
+        """
+        if elements is None:
+            elements = (node for node in PreOrderIter(self) if type(node) is XmlElement)
+        elements_by_name: dict[str, list[XmlElement]] = {}
+        # The elements with the same path share the same tuple
+        paths: dict[tuple[str, ...], tuple[str, ...]] = {}
+        for element in elements:
+            path = element.path
+            element._path = paths.setdefault(path, path)
+            if element.name:
+                elements_by_name.setdefault(element.name, []).append(element)
+        self._elements_by_name = elements_by_name
+
+    def get_elements_with_name(self, name: str) -> Sequence[XmlElement]:
+        """Gets all the elements in the document with the given name in document order.
+
+        The returned sequence is shared, it must not be modified.
+        """
+        if self._elements_by_name is None:
+            self.index_elements()
+        return cast(dict[str, list[XmlElement]], self._elements_by_name).get(name, ())
 
     def find_all_elements_with_name(self, name: str) -> list[XmlElement]:
         """Returns a list with all the elements contained in the document matching the given name."""
-        if self.root:
-            found = findall(self.root, filter_=lambda node: isinstance(node, XmlElement) and node.name == name)
-            return list(found)
-        return []
+        return list(self.get_elements_with_name(name))
 
     def get_text_between_offsets(self, start: int, end: int) -> str:
         """Gets the text content between the start and end offsets."""
-        return self.document.source[start:end]
+        return self.source[start:end]
 
     def get_text_in_range(self, range: Range) -> str:
         """Gets the document text contained in the given range."""
-        start = self.document.offset_at_position(range.start)
-        end = self.document.offset_at_position(range.end)
+        start = self.get_offset(range.start)
+        end = self.get_offset(range.end)
         return self.get_text_between_offsets(start, end)
 
     def get_line_indentation(self, line_number: int) -> str:
         """Gets the string containing the number of spaces at the beginning of the given line in the document."""
-        line_text = self.document.lines[line_number]
+        line_text = self.line_index.get_line_text(line_number)
         indentation = line_text[: len(line_text) - len(line_text.lstrip())]
         return indentation
 
@@ -297,7 +402,8 @@ class XmlDocument(XmlSyntaxNode):
     def get_internal_element_range_or_default(self, element: Any | None) -> Range:
         if element is not None:
             line_number = element.sourceline - 1
-            line_text = self.document.lines[line_number]
+            line_start = self.line_index.get_line_start(line_number)
+            line_text = self.line_index.get_line_text(line_number)
             if isinstance(element, etree._Comment):
                 text = cast(str, element.text)
                 start = line_text.index(f"{text}")
@@ -306,10 +412,7 @@ class XmlDocument(XmlSyntaxNode):
                 # Prepend '<' for searching tag names
                 start = line_text.index(f"<{element.tag}") + 1
                 end = start + len(element.tag)
-            return Range(
-                start=Position(line=line_number, character=start),
-                end=Position(line=line_number, character=end),
-            )
+            return self.get_range(line_start + start, line_start + end)
         return self.get_default_range()
 
     def get_element_range_from_xpath_or_default(self, xpath: str | None) -> Range:
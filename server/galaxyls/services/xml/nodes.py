@@ -2,25 +2,147 @@ from abc import (
     ABC,
     abstractmethod,
 )
+from bisect import bisect_right
+from collections.abc import (
+    Iterable,
+    Sequence,
+)
+from operator import attrgetter
 from typing import (
+    TYPE_CHECKING,
     Optional,
+    TypeVar,
     cast,
 )
 
-from anytree import NodeMixin  # type: ignore
-
 from galaxyls.services.xml.constants import UNDEFINED_OFFSET
 from galaxyls.services.xml.types import NodeType
 
+if TYPE_CHECKING:
+    from galaxyls.services.xml.document import XmlDocument
+
+get_node_start = attrgetter("start")
+
+N = TypeVar("N", bound="XmlSyntaxNode")
+
+
+def shift_offset(value: int, offset: int, delta: int) -> int:
+    """Returns the given offset value moved `delta` positions if it is located at or after `offset`."""
+    if value >= offset:
+        return value + delta
+    return value
+
+
+def find_node_in(nodes: Sequence["XmlSyntaxNode"], offset: int) -> Optional["XmlSyntaxNode"]:
+    """Finds the first node containing the given offset in a list of nodes sorted by start offset.
+
+    Args:
+        nodes (Sequence[XmlSyntaxNode]): The nodes sorted by their start offset, like the children of a node.
+        offset (int): The document offset.
+
+    Returns:
+        Optional[XmlSyntaxNode]: The first node containing the offset or None if there is no such node.
+    """
+    index = bisect_right(nodes, offset, key=get_node_start) - 1
+    found = None
+    # Contiguous nodes can share the boundary offset, the first one takes precedence
+    while index >= 0 and nodes[index].is_at(offset):
+        found = nodes[index]
+        index -= 1
+    return found
 
-class XmlSyntaxNode(ABC, NodeMixin):
-    """Abstract base class that represents a syntax node in the syntax tree."""
+
+class XmlSyntaxNode(ABC):
+    """Abstract base class that represents a syntax node in the syntax tree.
+
+    Big documents contain many thousands of nodes, so all of them use `__slots__`
+    and keep their children in a plain list with a pointer to their parent.
+    """
+
+    __slots__ = ("name", "start", "end", "_closed", "_parent", "_children")
 
     def __init__(self) -> None:
         self.name: str | None = None
         self.start: int = UNDEFINED_OFFSET
         self.end: int = UNDEFINED_OFFSET
         self._closed: bool = False
+        self._parent: XmlSyntaxNode | None = None
+        # Most nodes are leaves, the list is only created when the first child is added
+        self._children: list[XmlSyntaxNode] | None = None
+
+    @property
+    def parent(self) -> Optional["XmlSyntaxNode"]:
+        """The parent node or None if this is the root of the tree."""
+        return self._parent
+
+    @parent.setter
+    def parent(self, value: Optional["XmlSyntaxNode"]) -> None:
+        if value is self._parent:
+            return
+        if self._parent is not None:
+            self._parent._remove_child(self)
+        self._parent = value
+        if value is not None:
+            value._add_child(self)
+        self._invalidate_path()
+
+    @property
+    def children(self) -> Sequence["XmlSyntaxNode"]:
+        """The child nodes sorted by their position in the document."""
+        return self._children if self._children is not None else ()
+
+    @children.setter
+    def children(self, children: Iterable["XmlSyntaxNode"]) -> None:
+        new_children = list(children)
+        for child in self.children:
+            child._parent = None
+            child._invalidate_path()
+        for child in new_children:
+            if child._parent is not None:
+                child._parent._remove_child(child)
+            child._parent = self
+            child._invalidate_path()
+        self._children = new_children or None
+
+    def _add_child(self, child: "XmlSyntaxNode") -> None:
+        if self._children is None:
+            self._children = [child]
+        else:
+            self._children.append(child)
+
+    def _remove_child(self, child: "XmlSyntaxNode") -> None:
+        if self._children is not None:
+            self._children.remove(child)
+
+    @property
+    def ancestors(self) -> tuple["XmlSyntaxNode", ...]:
+        """All the nodes from the root of the tree to the parent of this node."""
+        ancestors = []
+        node = self._parent
+        while node is not None:
+            ancestors.append(node)
+            node = node._parent
+        ancestors.reverse()
+        return tuple(ancestors)
+
+    @property
+    def depth(self) -> int:
+        """The number of ancestors of this node. The root of the tree has depth 0."""
+        depth = 0
+        node = self._parent
+        while node is not None:
+            depth += 1
+            node = node._parent
+        return depth
+
+    def is_descendant_of(self, node: "XmlSyntaxNode") -> bool:
+        """Indicates if the given node is one of the ancestors of this node."""
+        ancestor = self._parent
+        while ancestor is not None:
+            if ancestor is node:
+                return True
+            ancestor = ancestor._parent
+        return False
 
     @property
     def is_closed(self) -> bool:
@@ -47,13 +169,20 @@ class XmlSyntaxNode(ABC, NodeMixin):
         """The type of this node."""
         return NodeType.UNKNOWN
 
+    @property
+    def path(self) -> tuple[str, ...]:
+        """The names of the ancestor elements including the actual element.
+
+        Only elements store their path, any other node has the same path as its parent."""
+        return self._parent.path if self._parent is not None else ()
+
     @property
     def stack(self) -> list[str]:
         """The list of names of the ancestor elements including the actual element."""
-        stack = [element.name for element in self.ancestors if element.name and type(element) is XmlElement]
-        if self.is_element and self.name:
-            stack.append(self.name)
-        return stack
+        return list(self.path)
+
+    def _invalidate_path(self) -> None:
+        """Discards the path cached in this node and its descendants after being moved in the tree."""
 
     def is_at(self, offset: int) -> bool:
         """Indicates if the offset is within this node definition."""
@@ -76,22 +205,23 @@ class XmlSyntaxNode(ABC, NodeMixin):
         return None
 
     def find_node_at(self, offset: int) -> "XmlSyntaxNode":
-        """Finds the syntax node at the given document offset."""
-        try:
-            child = cast(XmlSyntaxNode, next(child for child in self.children if child.is_at(offset)))
+        """Finds the syntax node at the given document offset.
+
+        The children are sorted by offset so the child containing the offset is found
+        with a binary search at every level of the tree."""
+        child = find_node_in(self.children, offset)
+        if child is not None:
             return child.find_node_at(offset)
-        except StopIteration:
-            if self.is_at(offset):
-                return self.find_attr_node_at(offset)
-            return self
+        if self.is_at(offset):
+            return self.find_attr_node_at(offset)
+        return self
 
     def find_attr_node_at(self, offset: int) -> "XmlSyntaxNode":
         """Finds the attribute node at the given document offset."""
         if self.has_attributes:
-            attr_nodes = self.get_attribute_nodes()
-            for attr in attr_nodes:
-                if attr.is_at(offset):
-                    return attr
+            attr = find_node_in(self.get_attribute_nodes(), offset)
+            if attr is not None:
+                return attr
         return self
 
     def find_element_at(self, offset: int) -> Optional["XmlElement"]:
@@ -124,10 +254,47 @@ class XmlSyntaxNode(ABC, NodeMixin):
             return self.start, self.start + len(self.name)
         return self.start, self.end
 
+    def shift_offsets(self, offset: int, delta: int) -> None:
+        """Moves all the offsets of this node located at or after the given `offset` by `delta` positions.
+
+        Used to keep the syntax tree in sync with the document after an edit without parsing it again.
+
+        Args:
+            offset (int): The offset in the document from where the positions must be moved.
+            delta (int): The number of positions to move. Negative values move the offsets backwards.
+        """
+        self.start = shift_offset(self.start, offset, delta)
+        self.end = shift_offset(self.end, offset, delta)
+
+    def copy(self: N) -> N:
+        """Creates a copy of this node and all its descendants, without parent.
+
+        Copying a syntax tree is much faster than parsing the document again, so it is used to
+        keep a version of the tree unchanged while the original is updated in place."""
+        node = object.__new__(type(self))
+        node.name = self.name
+        node.start = self.start
+        node.end = self.end
+        node._closed = self._closed
+        node._parent = None
+        node._children = None
+        self._copy_fields_to(node)
+        if self._children is not None:
+            children = [child.copy() for child in self._children]
+            for child in children:
+                child._parent = node
+            node._children = children
+        return node
+
+    def _copy_fields_to(self: N, node: N) -> None:
+        """Copies the fields of the subclass to a new node of the same type. The children are copied after it."""
+
 
 class XmlContainerNode(XmlSyntaxNode):
     """Represents a node that can have content."""
 
+    __slots__ = ()
+
     @abstractmethod
     def get_content_offsets(self) -> tuple[int, int]:
         return NotImplemented
@@ -141,6 +308,8 @@ class XmlContainerNode(XmlSyntaxNode):
 class XmlContent(XmlContainerNode):
     """Represents some content inside a XML document."""
 
+    __slots__ = ()
+
     def __init__(self, start: int, end: int) -> None:
         super().__init__()
         self.start = start
@@ -162,14 +331,14 @@ class XmlContent(XmlContainerNode):
 class XmlAttribute(XmlSyntaxNode):
     """Represents an attribute of a XML element."""
 
+    __slots__ = ("key", "has_delimiter", "value")
+
     def __init__(self, name: str, start: int, end: int, owner: "XmlElement"):
         super().__init__()
         self.name = name
         self.start = start
         self.end = end
-        self.owner = owner
         self.key = XmlAttributeKey(name, start, end, self)
-        self.key.parent = self
         self.has_delimiter: bool = False
         self.value: XmlAttributeValue | None = None
         self.parent = owner
@@ -177,6 +346,33 @@ class XmlAttribute(XmlSyntaxNode):
     def __repr__(self) -> str:
         return f"XmlAttribute[{self.name}={self.get_value()}]"
 
+    def _copy_fields_to(self, node: "XmlAttribute") -> None:
+        node.has_delimiter = self.has_delimiter
+        node.key = self.key.copy()
+        node.key._parent = node
+        node.value = None
+        if self.value is not None:
+            node.value = self.value.copy()
+            node.value._parent = node
+
+    @property
+    def owner(self) -> "XmlElement":
+        """The element where this attribute is defined."""
+        return cast(XmlElement, self._parent)
+
+    @property
+    def children(self) -> Sequence[XmlSyntaxNode]:
+        """The key and the value (if there is one) of this attribute.
+
+        They are not stored in a list to save memory since they are the only possible children."""
+        if self.value is None:
+            return (self.key,)
+        return (self.key, self.value)
+
+    @children.setter
+    def children(self, children: Iterable[XmlSyntaxNode]) -> None:
+        raise AttributeError("The children of an attribute can not be replaced")
+
     @property
     def node_type(self) -> NodeType:
         """The type of this node."""
@@ -196,7 +392,7 @@ class XmlAttribute(XmlSyntaxNode):
 
     def get_attribute_nodes(self) -> list["XmlAttribute"]:
         """Gets the lists of attributes of this node if it has any."""
-        return cast(list[XmlAttribute], self.children)
+        return cast(list[XmlAttribute], list(self.children))
 
     def get_attribute_name(self) -> str | None:
         """Gets the name of this attribute (if it is an attribute node)."""
@@ -206,12 +402,19 @@ class XmlAttribute(XmlSyntaxNode):
 class XmlAttributeKey(XmlSyntaxNode):
     """Represents the key (name) of a XML attribute."""
 
+    __slots__ = ()
+
     def __init__(self, name: str, start: int, end: int, owner: XmlAttribute):
         super().__init__()
         self.name = name
         self.start = start
         self.end = end
-        self.owner = owner
+        self._parent = owner
+
+    @property
+    def owner(self) -> XmlAttribute:
+        """The attribute this key belongs to."""
+        return cast(XmlAttribute, self._parent)
 
     @property
     def node_type(self) -> NodeType:
@@ -237,13 +440,22 @@ class XmlAttributeKey(XmlSyntaxNode):
 class XmlAttributeValue(XmlContainerNode):
     """Represents the value of a XML attribute."""
 
+    __slots__ = ("quoted",)
+
     def __init__(self, value: str | None, start: int, end: int, owner: XmlAttribute):
         super().__init__()
         self.quoted = value
         self.start = start
         self.end = end
-        self.owner = owner
-        self.parent = owner
+        self._parent = owner
+
+    @property
+    def owner(self) -> XmlAttribute:
+        """The attribute this value belongs to."""
+        return cast(XmlAttribute, self._parent)
+
+    def _copy_fields_to(self, node: "XmlAttributeValue") -> None:
+        node.quoted = self.quoted
 
     def update(self, value: str | None, start: int, end: int) -> None:
         self.quoted = value
@@ -276,6 +488,16 @@ class XmlAttributeValue(XmlContainerNode):
 class XmlElement(XmlContainerNode):
     """Represents a XML element in the document syntax tree."""
 
+    __slots__ = (
+        "start_tag_open_offset",
+        "start_tag_close_offset",
+        "end_tag_open_offset",
+        "end_tag_close_offset",
+        "is_self_closed",
+        "attributes",
+        "_path",
+    )
+
     def __init__(self, start: int = UNDEFINED_OFFSET, end: int = UNDEFINED_OFFSET):
         super().__init__()
         self.name: str | None = None
@@ -287,16 +509,49 @@ class XmlElement(XmlContainerNode):
         self.end_tag_close_offset: int = UNDEFINED_OFFSET
         self.is_self_closed: bool = False
         self.attributes: dict[str, XmlAttribute] = {}
+        self._path: tuple[str, ...] | None = None
 
     def __repr__(self) -> str:
         attribute_pairs = [f"{key}={value.get_value()}" for key, value in self.attributes.items()]
         return f"XmlElement[{self.name}]-Attrs[{','.join(attribute_pairs)}]"
 
+    def copy(self) -> "XmlElement":
+        element = super().copy()
+        copies = {id(child): copy for child, copy in zip(self.children, element.children)}
+        element.attributes = {name: cast(XmlAttribute, copies[id(attr)]) for name, attr in self.attributes.items()}
+        return element
+
+    def _copy_fields_to(self, node: "XmlElement") -> None:
+        node.start_tag_open_offset = self.start_tag_open_offset
+        node.start_tag_close_offset = self.start_tag_close_offset
+        node.end_tag_open_offset = self.end_tag_open_offset
+        node.end_tag_close_offset = self.end_tag_close_offset
+        node.is_self_closed = self.is_self_closed
+        node._path = self._path
+
     @property
     def node_type(self) -> NodeType:
         """The type of this node."""
         return NodeType.ELEMENT
 
+    @property
+    def path(self) -> tuple[str, ...]:
+        """The names of the ancestor elements including this element.
+
+        It is computed from the path of the parent the first time it is needed and
+        cached until the element is moved to another place in the tree."""
+        if self._path is None:
+            parent_path = self._parent.path if self._parent is not None else ()
+            self._path = (*parent_path, self.name) if self.name else parent_path
+        return self._path
+
+    def _invalidate_path(self) -> None:
+        # When the path is not cached, it is not cached in any descendant either
+        if self._path is not None:
+            self._path = None
+            for child in self.children:
+                child._invalidate_path()
+
     @property
     def has_attributes(self) -> bool:
         """Indicates if this node has any attributes defined."""
@@ -415,17 +670,37 @@ class XmlElement(XmlContainerNode):
             start = end = -1
         return start, end
 
+    def shift_offsets(self, offset: int, delta: int) -> None:
+        super().shift_offsets(offset, delta)
+        self.start_tag_open_offset = shift_offset(self.start_tag_open_offset, offset, delta)
+        self.start_tag_close_offset = shift_offset(self.start_tag_close_offset, offset, delta)
+        self.end_tag_open_offset = shift_offset(self.end_tag_open_offset, offset, delta)
+        self.end_tag_close_offset = shift_offset(self.end_tag_close_offset, offset, delta)
+
     def get_children_with_name(self, name: str) -> list["XmlElement"]:
         children = [child for child in self.children if child.name == name]
-        return list(children)
+        return cast(list[XmlElement], children)
 
     def get_recursive_descendants_with_name(self, name: str) -> list["XmlElement"]:
-        descendants = []
+        """Gets all the elements under this element with the given name in document order.
+
+        If the element belongs to a document, the elements are taken from the document's index by name.
+        """
+        root: XmlSyntaxNode = self
+        while root._parent is not None:
+            root = root._parent
+        if root.node_type == NodeType.DOCUMENT:
+            xml_document = cast("XmlDocument", root)
+            return [element for element in xml_document.get_elements_with_name(name) if element.is_descendant_of(self)]
+        return self._get_recursive_descendants_with_name(name)
+
+    def _get_recursive_descendants_with_name(self, name: str) -> list["XmlElement"]:
+        descendants: list[XmlElement] = []
         for child in self.children:
             if child.name == name:
-                descendants.append(child)
+                descendants.append(cast(XmlElement, child))
             if isinstance(child, XmlElement):
-                descendants.extend(child.get_recursive_descendants_with_name(name))
+                descendants.extend(child._get_recursive_descendants_with_name(name))
         return descendants
 
     def get_cdata_section(self) -> Optional["XmlCDATASection"]:
@@ -436,6 +711,8 @@ class XmlElement(XmlContainerNode):
 class XmlCDATASection(XmlContainerNode):
     """Represents a CDATA section in a XML document."""
 
+    __slots__ = ("start_content", "end_content")
+
     def __init__(self, start: int, end: int):
         super().__init__()
         self.start = start
@@ -451,10 +728,21 @@ class XmlCDATASection(XmlContainerNode):
     def get_content_offsets(self) -> tuple[int, int]:
         return self.start_content, self.end_content
 
+    def shift_offsets(self, offset: int, delta: int) -> None:
+        super().shift_offsets(offset, delta)
+        self.start_content = shift_offset(self.start_content, offset, delta)
+        self.end_content = shift_offset(self.end_content, offset, delta)
+
+    def _copy_fields_to(self, node: "XmlCDATASection") -> None:
+        node.start_content = self.start_content
+        node.end_content = self.end_content
+
 
 class XmlComment(XmlSyntaxNode):
     """Represents a comment section in a XML document."""
 
+    __slots__ = ("start_content", "end_content")
+
     def __init__(self, start: int, end: int):
         super().__init__()
         self.start = start
@@ -467,10 +755,21 @@ class XmlComment(XmlSyntaxNode):
         """The type of this node."""
         return NodeType.COMMENT
 
+    def shift_offsets(self, offset: int, delta: int) -> None:
+        super().shift_offsets(offset, delta)
+        self.start_content = shift_offset(self.start_content, offset, delta)
+        self.end_content = shift_offset(self.end_content, offset, delta)
+
+    def _copy_fields_to(self, node: "XmlComment") -> None:
+        node.start_content = self.start_content
+        node.end_content = self.end_content
+
 
 class XmlProcessingInstruction(XmlSyntaxNode):
     """Represents a processing instruction (like the prolog) in a XML document."""
 
+    __slots__ = ("start_content", "end_content")
+
     def __init__(self, start: int, end: int):
         super().__init__()
         self.start = start
@@ -482,3 +781,12 @@ class XmlProcessingInstruction(XmlSyntaxNode):
     def node_type(self) -> NodeType:
         """The type of this node."""
         return NodeType.PROCESSING_INSTRUCTION
+
+    def shift_offsets(self, offset: int, delta: int) -> None:
+        super().shift_offsets(offset, delta)
+        self.start_content = shift_offset(self.start_content, offset, delta)
+        self.end_content = shift_offset(self.end_content, offset, delta)
+
+    def _copy_fields_to(self, node: "XmlProcessingInstruction") -> None:
+        node.start_content = self.start_content
+        node.end_content = self.end_content
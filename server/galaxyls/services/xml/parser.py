@@ -4,14 +4,35 @@ https://github.com/eclipse/lemminx/tree/master/org.eclipse.lemminx/src/main/java
 Only the minimum subset of the XML dialect used by Galaxy tool wrappers is supported.
 """
 
+import sys
+from collections.abc import Sequence
 from typing import cast
 
+from anytree import PreOrderIter  # type: ignore
+from lsprotocol.types import (
+    TextDocumentContentChangeEvent,
+    TextDocumentContentChangePartial,
+)
 from pygls.workspace import TextDocument
 
+from .constants import UNDEFINED_OFFSET
 from .document import XmlDocument
-from .nodes import XmlAttribute, XmlCDATASection, XmlComment, XmlContent, XmlElement, XmlProcessingInstruction, XmlSyntaxNode
+from .nodes import (
+    XmlAttribute,
+    XmlAttributeKey,
+    XmlAttributeValue,
+    XmlCDATASection,
+    XmlComment,
+    XmlContent,
+    XmlElement,
+    XmlProcessingInstruction,
+    XmlSyntaxNode,
+)
 from .scanner import XmlScanner
-from .types import TokenType
+from .types import (
+    ScannerState,
+    TokenType,
+)
 
 
 class XmlDocumentParser:
@@ -24,32 +45,116 @@ class XmlDocumentParser:
         """Parses the given text document and returns the resulting syntax tree as
         a XmlDocument.
 
-        This method is a bit too complex, but, since it is a Python translation
-        from the Java Eclipse/Lemminx parser, it could be easier to maintain it this way.
-
         Args:
             document (TextDocument): The XML text document.
 
         Returns:
             XmlDocument: The resulting syntax tree.
         """
-        text = document.source
+        xml_document = XmlDocument(document)
+        text = xml_document.source
         text_length = len(text)
         scanner = XmlScanner(text)
+        elements: list[XmlElement] = []
+        current = self._parse_nodes(scanner, xml_document, text_length, elements=elements)
+
+        while current.parent:
+            current.end = text_length
+            current = current.parent
+
+        xml_document.index_elements(elements)
+        return xml_document
+
+    def parse_incremental(
+        self, previous: XmlDocument, document: TextDocument, changes: Sequence[TextDocumentContentChangeEvent]
+    ) -> XmlDocument:
+        """Updates the syntax tree of a previous version of the document with the given content changes
+        and returns the resulting syntax tree for the current version of the document.
+
+        Only the content of the smallest element enclosing each change is scanned again, the offsets
+        of the nodes after the change are moved accordingly. When a change can not be applied
+        incrementally (it alters the structure outside the enclosing element, touches a tag
+        declaration, replaces the whole document, etc.) the document is fully parsed instead.
+
+        The nodes of the `previous` syntax tree are reused, so the previous XmlDocument must
+        not be used anymore after calling this method. The index of elements by name of the
+        resulting document is built again the first time it is used, while its line index is
+        the one of the previous document updated with the changes.
+
+        Args:
+            previous (XmlDocument): The syntax tree of the document before applying the changes.
+            document (TextDocument): The text document with the changes already applied.
+            changes (Sequence[TextDocumentContentChangeEvent]): The content changes in the same
+            order they were applied to the document.
+
+        Returns:
+            XmlDocument: The resulting syntax tree.
+        """
+        if not changes:
+            return self.parse(document)
+        text = previous.source
+        line_index = previous.line_index
+        last_change = changes[-1]
+        for change in changes:
+            if not isinstance(change, TextDocumentContentChangePartial):
+                return self.parse(document)
+            start = line_index.position_to_offset(change.range.start)
+            end = line_index.position_to_offset(change.range.end)
+            delta = len(change.text) - (end - start)
+            if change is last_change:
+                # The source of the document is the result of the last change, it is only checked
+                # around the change to not compare the whole text
+                new_text = document.source
+                if len(new_text) != len(text) + delta or not new_text.startswith(change.text, start):
+                    # The changes were not applied to the previous version of the document
+                    return self.parse(document)
+            else:
+                new_text = text[:start] + change.text + text[end:]
+            if not self._reparse_enclosing_element(previous, new_text, start, end, delta):
+                return self.parse(document)
+            line_index = line_index.apply_change(new_text, start, end, change.text)
+            text = new_text
+
         xml_document = XmlDocument(document)
-        current: XmlSyntaxNode = xml_document
+        xml_document.children = previous.children
+        xml_document._line_index = line_index
+        previous.children = ()
+        return xml_document
+
+    def _parse_nodes(
+        self,
+        scanner: XmlScanner,
+        root: XmlSyntaxNode,
+        text_length: int,
+        stop_offset: int | None = None,
+        elements: list[XmlElement] | None = None,
+    ) -> XmlSyntaxNode:
+        """Builds the syntax tree under the given root node with the tokens found by the scanner.
+
+        The scan stops at the end of the text or at the first token starting at or after `stop_offset`.
+        Every element created is also appended, in document order, to the `elements` list if given.
+
+        This method is a bit too complex, but, since it is a Python translation
+        from the Java Eclipse/Lemminx parser, it could be easier to maintain it this way.
+
+        Returns:
+            XmlSyntaxNode: The last node that was still open when the scan finished.
+        """
+        current: XmlSyntaxNode = root
+        if elements is None:
+            elements = []
         attr: XmlAttribute | None = None
         pending_attribute: str | None = None
         last_closed = current
         end_tag_open_offset = -1
         previous_token_was_end_tag_open = False
         token = scanner.scan()
-        while token != TokenType.EOS:
+        while token != TokenType.EOS and (stop_offset is None or scanner.get_token_offset() < stop_offset):
             if previous_token_was_end_tag_open:
                 previous_token_was_end_tag_open = False
                 if token != TokenType.EndTag:
                     # The expected token is not an EndTag, create a fake end tag element
-                    self._create_fake_end_tag(end_tag_open_offset, current)
+                    elements.append(self._create_fake_end_tag(end_tag_open_offset, current))
 
             if token == TokenType.StartTagOpen:
                 if not current.is_closed and current.parent:
@@ -63,11 +168,13 @@ class XmlDocumentParser:
                 child = XmlElement(scanner.get_token_offset(), scanner.get_token_end())
                 child.start_tag_open_offset = scanner.get_token_offset()
                 child.parent = current
+                elements.append(child)
                 current = child
 
             elif token == TokenType.StartTag:
                 element = cast(XmlElement, current)
-                element.name = scanner.get_token_text()
+                # Names are repeated many times in a document so they are interned to share the same string
+                element.name = sys.intern(scanner.get_token_text())
                 current.end = scanner.get_token_end()
 
             elif token == TokenType.StartTagClose:
@@ -89,7 +196,7 @@ class XmlDocumentParser:
                 while not (current.is_element and cast(XmlElement, current).is_same_tag(close_tag)) and current.parent:
                     current.end = end_tag_open_offset
                     current = current.parent
-                if current != xml_document:
+                if current != root:
                     current._closed = True
                     if current.is_element:
                         cast(XmlElement, current).end_tag_open_offset = end_tag_open_offset
@@ -100,6 +207,7 @@ class XmlDocumentParser:
                     element.end_tag_open_offset = end_tag_open_offset
                     element.name = close_tag
                     element.parent = node
+                    elements.append(element)
                     current = element
 
             elif token == TokenType.StartTagSelfClose:
@@ -119,7 +227,7 @@ class XmlDocumentParser:
                     current = current.parent
 
             elif token == TokenType.AttributeName:
-                pending_attribute = scanner.get_token_text()
+                pending_attribute = sys.intern(scanner.get_token_text())
                 element = cast(XmlElement, current)
                 attr = XmlAttribute(
                     pending_attribute,
@@ -205,16 +313,109 @@ class XmlDocumentParser:
             previous_token_was_end_tag_open = False
             if token != TokenType.EndTag:
                 # The expected token is not an EndTag, create a fake end tag element
-                self._create_fake_end_tag(end_tag_open_offset, current)
+                elements.append(self._create_fake_end_tag(end_tag_open_offset, current))
 
-        while current.parent:
-            current.end = text_length
-            current = current.parent
+        return current
 
-        return xml_document
+    def _reparse_enclosing_element(self, xml_document: XmlDocument, text: str, start: int, end: int, delta: int) -> bool:
+        """Replaces the content of the smallest element enclosing the changed range [start, end) of the previous
+        text with the nodes resulting from scanning the same content in the new `text`.
 
-    def _create_fake_end_tag(self, end_tag_open_offset, current):
+        Returns:
+            bool: True if the syntax tree was updated or False if the change can not be applied incrementally.
+        """
+        element = self._find_enclosing_element(xml_document, start, end)
+        if element is None:
+            return False
+        content_start, content_end = element.get_content_offsets()
+        new_content_end = content_end + delta
+        fragment = XmlElement(content_start, new_content_end)
+        scanner = XmlScanner(text, content_start, ScannerState.WithinContent)
+        try:
+            current = self._parse_nodes(scanner, fragment, len(text), new_content_end)
+        except Exception:
+            return False
+        if (
+            current is not fragment
+            or fragment.is_closed
+            or scanner.token_type != TokenType.EndTagOpen
+            or scanner.get_token_offset() != new_content_end
+            or not self._is_complete_fragment(fragment)
+        ):
+            return False
+
+        attributes = [child for child in element.children if type(child) is XmlAttribute]
+        element.children = attributes + list(fragment.children)
+        self._shift_following_nodes(element, end, delta)
+        return True
+
+    def _shift_following_nodes(self, node: XmlSyntaxNode, offset: int, delta: int) -> None:
+        """Moves the offsets at or after `offset` of the given node, of its ancestors and of all their
+        siblings ending after it, with all their descendants.
+
+        The descendants of the node and the siblings ending before `offset` are not visited, so the
+        nodes of the document before the change and inside the re-parsed element are left alone.
+        """
+        current: XmlSyntaxNode | None = node
+        while current is not None:
+            current.shift_offsets(offset, delta)
+            parent = current.parent
+            if parent is not None:
+                for sibling in parent.children:
+                    if sibling is not current and sibling.end >= offset:
+                        self._shift_subtree(sibling, offset, delta)
+            current = parent
+
+    def _shift_subtree(self, node: XmlSyntaxNode, offset: int, delta: int) -> None:
+        pending = [node]
+        while pending:
+            node = pending.pop()
+            node.shift_offsets(offset, delta)
+            pending.extend(node.children)
+
+    def _find_enclosing_element(self, xml_document: XmlDocument, start: int, end: int) -> XmlElement | None:
+        """Finds the deepest, properly closed, element whose content fully contains the range [start, end)."""
+        result: XmlElement | None = None
+        candidates = [child for child in xml_document.children if type(child) is XmlElement]
+        while candidates:
+            match = next((element for element in candidates if self._contains_range(element, start, end)), None)
+            if match is None:
+                break
+            result = match
+            candidates = match.elements
+        return result
+
+    def _contains_range(self, element: XmlElement, start: int, end: int) -> bool:
+        if not self._is_complete_element(element):
+            return False
+        content_start, content_end = element.get_content_offsets()
+        return content_start <= start and end <= content_end
+
+    def _is_complete_element(self, element: XmlElement) -> bool:
+        return (
+            element.is_closed
+            and not element.is_self_closed
+            and element.name is not None
+            and element.start_tag_open_offset != UNDEFINED_OFFSET
+            and element.start_tag_close_offset != UNDEFINED_OFFSET
+            and element.end_tag_open_offset != UNDEFINED_OFFSET
+            and element.end_tag_close_offset != UNDEFINED_OFFSET
+        )
+
+    def _is_complete_fragment(self, fragment: XmlElement) -> bool:
+        """Checks that all the nodes in a re-parsed fragment are closed and well-formed."""
+        for node in PreOrderIter(fragment):
+            if node is fragment or type(node) in (XmlAttribute, XmlAttributeKey, XmlAttributeValue):
+                continue
+            if not node.is_closed:
+                return False
+            if type(node) is XmlElement and not (node.is_self_closed or self._is_complete_element(node)):
+                return False
+        return True
+
+    def _create_fake_end_tag(self, end_tag_open_offset, current) -> XmlElement:
         # The expected token is not an EndTag, create a fake end tag element
         element = XmlElement(end_tag_open_offset, end_tag_open_offset + 2)
         element.end_tag_open_offset = end_tag_open_offset
         element.parent = current
+        return element
@@ -17,6 +17,7 @@ from .constants import (
     CDATA_START_CHAR_SEQ,
     COMMENT_END_CHAR_SEQ,
     COMMENT_START_CHAR_SEQ,
+    NAME_CHARS_PATTERN,
     PI_END_CHAR_SEQ,
     QUOTE_CHARS,
 )
@@ -236,11 +237,11 @@ class XmlScanner:
         if not self._is_valid_start_name_character(chr(first)):
             return False
         self.stream.advance(1)
-        self.stream.advance_while_char(self._is_valid_name_character)
+        self.stream.advance_while_match(NAME_CHARS_PATTERN)
         return True
 
     def _has_next_attribute_name(self) -> bool:
-        return self.stream.advance_while_char(self._is_valid_name_character) > 0
+        return self.stream.advance_while_match(NAME_CHARS_PATTERN) > 0
 
     def _has_next_attribute_value(self) -> bool:
         first = self.stream.peek_char()
@@ -251,8 +252,5 @@ class XmlScanner:
             return True
         return False
 
-    def _is_valid_name_character(self, ch: str) -> bool:
-        return ord(ch) == _UDS or ch.isalnum()
-
     def _is_valid_start_name_character(self, ch: str) -> bool:
         return ord(ch) == _UDS or ch.isalpha()  # No numbers allowed as first character
@@ -4,72 +4,170 @@ https://github.com/eclipse/lemminx/tree/master/org.eclipse.lemminx/src/main/java
 Only the minimum subset of the XML dialect used by Galaxy tool wrappers is supported.
 """
 
-from collections.abc import Callable
+import re
+from bisect import bisect_right
 
 from lsprotocol.types import (
     Position,
+    PositionEncodingKind,
     Range,
 )
-from pygls.workspace import TextDocument
+from pygls.workspace import PositionCodec
 
 from .constants import (
     _LAN,
     NEW_LINE,
-    WHITESPACE_CHARS,
+    WHITESPACE_PATTERN,
 )
 
+_LAN_CHAR = chr(_LAN)
 
-def convert_document_offset_to_line(document: TextDocument, offset: int) -> int:
-    """Converts the given offset in the document to the corresponding line.
 
-    Args:
-        document (Document): The source document.
-        offset (int): The character offset inside the document.
+class LineIndex:
+    """Table with the offsets where each line of a text starts.
 
-    Returns:
-        int: The resulting document line.
+    It is built once per text and allows to convert between character offsets and
+    line/character based positions using a binary search instead of scanning the text.
+    The character of the positions is expressed in the code units negotiated with the
+    client (UTF-16 by default) as required by the LSP specification.
     """
-    line = max(document.source.count(NEW_LINE, 0, offset), 0)
-    return line
-
-
-def convert_document_offset_to_position(document: TextDocument, offset: int) -> Position:
-    """Converts the given offset in the document to a line/character based Position.
-
-    Args:
-        document (Document): The source document.
-        offset (int): The character offset inside the document.
-
-    Returns:
-        Position: The resulting Position with line and character offset.
-    """
-    line = convert_document_offset_to_line(document, offset)
-    line_offset = max(document.source.rfind(NEW_LINE, 0, offset), 0)
-    character = offset - line_offset
-    if line > 0:
-        character -= 1
-    return Position(line=line, character=character)
 
+    def __init__(self, source: str, position_codec: PositionCodec | None = None) -> None:
+        self._source = source
+        self._position_codec = position_codec or PositionCodec()
+        self._is_ascii = source.isascii() or self._position_codec.encoding == PositionEncodingKind.Utf32
+        self._line_starts = [0]
+        start = source.find(NEW_LINE)
+        while start >= 0:
+            self._line_starts.append(start + 1)
+            start = source.find(NEW_LINE, start + 1)
+
+    def apply_change(self, source: str, start: int, end: int, text: str) -> "LineIndex":
+        """Gets the line index of `source`, the text resulting from replacing the range [start, end)
+        of this text with `text`.
+
+        Only the inserted text is scanned, the lines after the change are moved by the difference
+        in length. This index is not modified, so it can still be used for the previous text.
+        """
+        start_line = self.offset_to_line(start)
+        end_line = self.offset_to_line(end)
+        delta = len(text) - (end - start)
+        line_starts = self._line_starts[: start_line + 1]
+        line_break = text.find(NEW_LINE)
+        while line_break >= 0:
+            line_starts.append(start + line_break + 1)
+            line_break = text.find(NEW_LINE, line_break + 1)
+        line_starts.extend([line_start + delta for line_start in self._line_starts[end_line + 1 :]])
+        line_index = LineIndex.__new__(LineIndex)
+        line_index._source = source
+        line_index._position_codec = self._position_codec
+        line_index._is_ascii = self._is_ascii and (
+            text.isascii() or self._position_codec.encoding == PositionEncodingKind.Utf32
+        )
+        line_index._line_starts = line_starts
+        return line_index
+
+    @property
+    def line_count(self) -> int:
+        """The number of lines in the text."""
+        return len(self._line_starts)
+
+    def get_line_start(self, line: int) -> int:
+        """Gets the offset of the first character of the given line.
+
+        Lines beyond the last one start at the end of the text."""
+        if line < 0:
+            return 0
+        if line >= len(self._line_starts):
+            return len(self._source)
+        return self._line_starts[line]
+
+    def get_line_end(self, line: int) -> int:
+        """Gets the offset of the end of the given line, excluding the line break."""
+        if line + 1 < len(self._line_starts):
+            return self._line_starts[line + 1] - 1
+        return len(self._source)
+
+    def get_line_text(self, line: int) -> str:
+        """Gets the text of the given line including the line break."""
+        if line + 1 < len(self._line_starts):
+            return self._source[self.get_line_start(line) : self._line_starts[line + 1]]
+        return self._source[self.get_line_start(line) :]
+
+    def offset_to_line(self, offset: int) -> int:
+        """Converts the given character offset to the line containing it.
+
+        Args:
+            offset (int): The character offset inside the text.
+
+        Returns:
+            int: The resulting line.
+        """
+        return max(bisect_right(self._line_starts, offset) - 1, 0)
+
+    def offset_to_position(self, offset: int) -> Position:
+        """Converts the given character offset to a line/character based Position.
+
+        Args:
+            offset (int): The character offset inside the text.
+
+        Returns:
+            Position: The resulting Position with line and character offset in client units.
+        """
+        line = self.offset_to_line(offset)
+        line_start = self._line_starts[line]
+        character = offset - line_start
+        if not self._is_ascii and character > 0:
+            prefix = self._source[line_start:offset]
+            if not prefix.isascii():
+                character = self._position_codec.client_num_units(prefix) + max(character - len(prefix), 0)
+        return Position(line=line, character=character)
+
+    def offsets_to_range(self, start_offset: int, end_offset: int) -> Range:
+        """Converts the given start and end offsets to a position Range based on line numbers.
+
+        Args:
+            start_offset (int): The start offset of the range
+            end_offset (int): The end offset of the range
+
+        Returns:
+            Range: The resulting Range with the correct line number and character offset
+        """
+        return Range(start=self.offset_to_position(start_offset), end=self.offset_to_position(end_offset))
+
+    def position_to_offset(self, position: Position) -> int:
+        """Converts the given line/character based Position to a character offset.
+
+        Positions beyond the end of a line are moved to the end of the line and
+        positions beyond the last line are moved to the end of the text.
+
+        Args:
+            position (Position): The position with the character offset in client units.
+
+        Returns:
+            int: The resulting character offset inside the text.
+        """
+        if position.line >= len(self._line_starts):
+            return len(self._source)
+        line = max(position.line, 0)
+        line_start = self._line_starts[line]
+        line_end = self.get_line_end(line)
+        if self._is_ascii:
+            return min(line_start + max(position.character, 0), line_end)
+        offset = line_start
+        units = 0
+        while offset < line_end and units < position.character:
+            units += self._position_codec.client_num_units(self._source[offset])
+            offset += 1
+        return offset
 
-def convert_document_offsets_to_range(document: TextDocument, start_offset: int, end_offset: int) -> Range:
-    """Converts the given start and end offset positions in the document to a
-    position Range based on line numbers.
 
-    Args:
-        start_offset (int): The start offset of the range
-        end_offset (int): The end offset of the range
+class MultiLineStream:
+    """Represents a multi-line stream of characters.
 
-    Returns:
-        Range: The resulting Range with the correct line number and character offset
+    The stream jumps directly to the next interesting position using `str.find` and
+    precompiled regular expressions instead of moving one character at a time.
     """
-    return Range(
-        start=convert_document_offset_to_position(document, start_offset),
-        end=convert_document_offset_to_position(document, end_offset),
-    )
-
-
-class MultiLineStream:
-    """Represents a multi-line stream of characters."""
 
     def __init__(self, source: str, position: int = 0) -> None:
         self._source = source
@@ -110,78 +208,70 @@ class MultiLineStream:
             return True
         return False
 
-    def advance_if_chars(self, ch: list[int]) -> bool:
+    def advance_if_chars(self, ch: str) -> bool:
         """If the next characters in the stream matches the given sequence of characters, the stream advances
-        the length of the sequence."""
-        ch_length = len(ch)
-        if self._position + ch_length > self._len:
-            return False
-        i = 0
-        for i in range(ch_length):
-            if self._source[self._position + i] != chr(ch[i]):
-                return False
-        self.advance(i)
-        return True
+        the length of the sequence minus one, leaving the stream at its last character."""
+        if self._source.startswith(ch, self._position):
+            self._position += len(ch) - 1
+            return True
+        return False
 
     def advance_until_char(self, ch: int) -> bool:
         """Advances the stream until it founds a character matching the given."""
-        while self._position < self._len:
-            if ord(self._source[self._position]) == ch:
-                return True
-            self.advance(1)
-        return False
-
-    def advance_until_chars(self, ch: list[int]) -> bool:
-        """Advances the stream until it founds a list of character matching the given."""
-        ch_length = len(ch)
-        while self._position + ch_length <= self._len:
-            i = 0
-            while i < ch_length and self._source[self._position + i] == chr(ch[i]):
-                i += 1
-            if i == ch_length:
-                return True
-            self.advance(i or 1)
-        self.go_to_end()
-        return False
+        found = self._source.find(chr(ch), self._position)
+        if found < 0:
+            self._position = max(self._position, self._len)
+            return False
+        self._position = found
+        return True
 
-    def advance_while_char_in(self, list: list[int]) -> int:
-        """Advances the stream if the characters are like any of the characters in the given list."""
-        pos_now = self._position
-        while self._position < self._len and ord(self._source[self._position]) in list:
-            self._position += 1
-        return self._position - pos_now
+    def advance_until_chars(self, ch: str) -> bool:
+        """Advances the stream until it founds the given sequence of characters."""
+        found = self._source.find(ch, self._position)
+        if found < 0:
+            self.go_to_end()
+            return False
+        self._position = found
+        return True
 
     def advance_until_char_or_new_tag(self, ch: int) -> bool:
         """Advances the stream until it finds the given character or the '<' (new tag character)."""
-        while self._position < self._len:
-            if self.peek_char() in [ch, _LAN]:
-                return True
-            self.advance(1)
+        new_tag = self._source.find(_LAN_CHAR, self._position)
+        end = new_tag if new_tag >= 0 else self._len
+        found = self._source.find(chr(ch), self._position, end)
+        if found >= 0:
+            self._position = found
+            return True
+        if new_tag >= 0:
+            self._position = new_tag
+            return True
+        self._position = max(self._position, self._len)
         return False
 
-    def advance_until_chars_or_new_tag(self, ch: list[int]) -> bool:
+    def advance_until_chars_or_new_tag(self, ch: str) -> bool:
         """Advances the stream until it finds the given sequence of characters or the '<' (new tag character)."""
-        ch_length = len(ch)
-        while self._position + ch_length <= self._len:
-            i = 0
-            if self.peek_char() == _LAN:
-                return True
-            while i < ch_length and self._source[self._position + i] == chr(ch[i]):
-                i += 1
-            if i == ch_length:
-                return True
-            self.advance(i or 1)
+        # Only the positions where the whole sequence would still fit are considered
+        last_start = self._len - len(ch) + 1
+        new_tag = self._source.find(_LAN_CHAR, self._position, last_start)
+        end = new_tag + len(ch) - 1 if new_tag >= 0 else self._len
+        found = self._source.find(ch, self._position, end)
+        if found >= 0:
+            self._position = found
+            return True
+        if new_tag >= 0:
+            self._position = new_tag
+            return True
         self.go_to_end()
         return False
 
-    def advance_while_char(self, predicate: Callable[[str], bool]) -> int:
-        """Advances the stream while the given condition is True."""
-        pos_now = self._position
-        while self._position < self._len and predicate(self._source[self._position]):
-            self._position += 1
-        return self._position - pos_now
+    def advance_while_match(self, pattern: re.Pattern[str]) -> int:
+        """Advances the stream past the text matching the given pattern at the current position."""
+        match = pattern.match(self._source, self._position)
+        if match is None:
+            return 0
+        self._position = match.end()
+        return self._position - match.start()
 
     def skip_whitespace(self) -> bool:
         """Advances the stream while any kind of white space character is found."""
-        n = self.advance_while_char_in(WHITESPACE_CHARS)
-        return n > 0
+        return self.advance_while_match(WHITESPACE_PATTERN) > 0
@@ -11,6 +11,7 @@ MAX_RECURSION_DEPTH = 25
 
 # Schema namespace
 XS_NAMESPACE = "{http://www.w3.org/2001/XMLSchema}"
+XS_NAMESPACES = {"xs": "http://www.w3.org/2001/XMLSchema"}
 
 # XSD elements
 XS_ATTRIBUTE = f"{XS_NAMESPACE}attribute"
@@ -64,6 +64,7 @@ class GalaxyToolXsdParser:
             self._build_tree_recursive(self._root, self._tree)
             if self._tree is None:
                 self._tree = self._build_empty_tree()
+            self._tree.build_index()
         return self._tree
 
     def _build_empty_tree(self) -> XsdTree:
@@ -2,7 +2,9 @@
 information from the XSD schema.
 """
 
+from pathlib import Path
 
+from anytree import PreOrderIter  # type: ignore
 from lsprotocol.types import (
     Diagnostic,
     MarkupContent,
@@ -10,6 +12,11 @@ from lsprotocol.types import (
 )
 from lxml import etree
 
+from galaxyls.memory import (
+    COMPILED_SCHEMA_SIZE,
+    XSD_NODE_SIZE,
+    estimate_tree_size,
+)
 from galaxyls.services.context import XmlContext
 from galaxyls.services.xml.document import XmlDocument
 from galaxyls.services.xsd.constants import (
@@ -17,8 +24,19 @@ from galaxyls.services.xsd.constants import (
     TOOL_XSD_FILE,
 )
 from galaxyls.services.xsd.parser import GalaxyToolXsdParser
-from galaxyls.services.xsd.types import XsdBase
+from galaxyls.services.xsd.snapshot import (
+    XsdTreeSnapshotStore,
+    get_snapshot_key,
+)
+from galaxyls.services.xsd.types import (
+    XsdBase,
+    XsdTree,
+)
 from galaxyls.services.xsd.validation import GalaxyToolSchemaValidationService
+from galaxyls.stats import (
+    XSD_VALIDATE,
+    measure,
+)
 
 NO_DOC_MARKUP = MarkupContent(kind=MarkupKind.Markdown, value=MSG_NO_DOCUMENTATION_AVAILABLE)
 
@@ -30,18 +48,70 @@ class GalaxyToolXsdService:
     the XSD schema and validate XML files against it.
     """
 
-    def __init__(self) -> None:
-        """Initializes the validator by loading the XSD."""
-        self.xsd_doc: etree._ElementTree = etree.parse(str(TOOL_XSD_FILE))
-        self.xsd_schema = etree.XMLSchema(self.xsd_doc)
-        self.xsd_parser = GalaxyToolXsdParser(self.xsd_doc.getroot())
-        self.validator = GalaxyToolSchemaValidationService(self.xsd_schema)
+    def __init__(self, snapshot_dir: Path | None = None) -> None:
+        """Initializes the service by loading the XSD tree.
+
+        Args:
+            snapshot_dir (Optional[Path]): Directory where the built XSD tree is persisted between
+            sessions. If it is not provided the tree is always built from the schema.
+        """
+        self._xsd_doc: etree._ElementTree | None = None
+        self._xsd_schema: etree.XMLSchema | None = None
+        self._xsd_parser: GalaxyToolXsdParser | None = None
+        self._validator: GalaxyToolSchemaValidationService | None = None
+        self._snapshot_store = XsdTreeSnapshotStore(snapshot_dir) if snapshot_dir else None
+        self.xsd_tree: XsdTree = self._load_tree()
+        self._xsd_tree_size: int | None = None
+        self._xsd_doc_size: int | None = None
+
+    @property
+    def xsd_doc(self) -> etree._ElementTree:
+        """The parsed XSD schema document."""
+        if self._xsd_doc is None:
+            self._xsd_doc = etree.parse(str(TOOL_XSD_FILE))
+        return self._xsd_doc
+
+    @property
+    def xsd_schema(self) -> etree.XMLSchema:
+        """The compiled XSD schema. It is compiled the first time it is needed."""
+        if self._xsd_schema is None:
+            self._xsd_schema = etree.XMLSchema(self.xsd_doc)
+        return self._xsd_schema
+
+    @property
+    def xsd_parser(self) -> GalaxyToolXsdParser:
+        """The parser that builds the XSD tree from the schema document."""
+        if self._xsd_parser is None:
+            self._xsd_parser = GalaxyToolXsdParser(self.xsd_doc.getroot())
+        return self._xsd_parser
+
+    @property
+    def validator(self) -> GalaxyToolSchemaValidationService:
+        """The schema validation service. It is created on the first validation."""
+        if self._validator is None:
+            self._validator = GalaxyToolSchemaValidationService(self.xsd_schema)
+        return self._validator
+
+    def get_estimated_size(self) -> int:
+        """Estimates the memory used by the XSD tree and by the schema document and the compiled
+        schema if they were loaded. The estimations are computed only once."""
+        if self._xsd_tree_size is None:
+            self._xsd_tree_size = XSD_NODE_SIZE * sum(1 for _ in PreOrderIter(self.xsd_tree.root))
+        size = self._xsd_tree_size
+        if self._xsd_doc is not None:
+            if self._xsd_doc_size is None:
+                self._xsd_doc_size = estimate_tree_size(self._xsd_doc)
+            size += self._xsd_doc_size
+        if self._xsd_schema is not None:
+            size += COMPILED_SCHEMA_SIZE
+        return size
 
     def validate_document(self, xml_document: XmlDocument) -> list[Diagnostic]:
         """Validates the Galaxy tool xml using the XSD schema and returns a list
         of diagnostics if there are any problems.
         """
-        return self.validator.validate_document(xml_document)
+        with measure(XSD_VALIDATE):
+            return self.validator.validate_document(xml_document)
 
     def get_documentation_for(self, context: XmlContext) -> MarkupContent:
         """Gets the documentation annotated in the XSD about the
@@ -56,3 +126,14 @@ class GalaxyToolXsdService:
             if element:
                 return element.get_doc()
         return NO_DOC_MARKUP
+
+    def _load_tree(self) -> XsdTree:
+        """Loads the XSD tree from the persisted snapshot if it is up to date or builds it from the schema."""
+        if self._snapshot_store is None:
+            return self.xsd_parser.get_tree()
+        key = get_snapshot_key(TOOL_XSD_FILE)
+        tree = self._snapshot_store.load(key)
+        if tree is None:
+            tree = self.xsd_parser.get_tree()
+            self._snapshot_store.save(key, tree)
+        return tree
@@ -0,0 +1,199 @@
+"""Persistence of the XSD tree between server sessions.
+
+Building the `XsdTree` from the Galaxy XSD schema is slow, so the resulting tree is
+stored in a compact JSON snapshot the first time it is built and loaded from it on
+the next starts. Snapshots are keyed by the hash of the schema file and the version
+of the language server, so they are rebuilt whenever any of them changes.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Any
+
+from anytree import PreOrderIter  # type: ignore
+
+from galaxyls.version import GLS_VERSION
+
+from .types import (
+    XsdAttribute,
+    XsdNode,
+    XsdTree,
+)
+
+logger = logging.getLogger(__name__)
+
+# Must be increased every time the structure of the snapshot changes
+SNAPSHOT_FORMAT_VERSION = 1
+SNAPSHOT_FILE_PREFIX = "xsd-tree-"
+
+
+def get_snapshot_key(xsd_file: Path) -> str:
+    """Gets the key identifying the snapshots of the tree built from the given XSD file."""
+    digest = hashlib.sha256(xsd_file.read_bytes())
+    digest.update(f"{GLS_VERSION}:{SNAPSHOT_FORMAT_VERSION}".encode())
+    return digest.hexdigest()[:32]
+
+
+class XsdTreeSnapshotStore:
+    """Stores and loads XSD tree snapshots in the given directory."""
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+
+    def get_path(self, key: str) -> Path:
+        """Gets the path of the snapshot file for the given key."""
+        return self.directory / f"{SNAPSHOT_FILE_PREFIX}{key}.json"
+
+    def load(self, key: str) -> XsdTree | None:
+        """Loads the tree stored with the given key.
+
+        Args:
+            key (str): The key of the snapshot.
+
+        Returns:
+            Optional[XsdTree]: The tree or None if there is no valid snapshot for that key.
+        """
+        path = self.get_path(key)
+        try:
+            with open(path, encoding="utf-8") as snapshot_file:
+                data = json.load(snapshot_file)
+            if data.get("key") != key:
+                return None
+            return deserialize_tree(data)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, IndexError, TypeError):
+            logger.warning("Ignoring invalid XSD tree snapshot %s", path, exc_info=True)
+            return None
+
+    def save(self, key: str, tree: XsdTree) -> None:
+        """Stores the tree with the given key replacing any previous snapshot.
+
+        Errors writing the snapshot are logged and ignored, the tree will be built again on the next start.
+
+        Args:
+            key (str): The key of the snapshot.
+            tree (XsdTree): The tree to store.
+        """
+        data = serialize_tree(tree)
+        data["key"] = key
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                "w", encoding="utf-8", dir=self.directory, suffix=".tmp", delete=False
+            ) as snapshot_file:
+                json.dump(data, snapshot_file, separators=(",", ":"))
+            os.replace(snapshot_file.name, self.get_path(key))
+            self._remove_stale_snapshots(key)
+        except OSError:
+            logger.warning("Unable to store the XSD tree snapshot in %s", self.directory, exc_info=True)
+
+    def _remove_stale_snapshots(self, key: str) -> None:
+        current = self.get_path(key)
+        for path in self.directory.glob(f"{SNAPSHOT_FILE_PREFIX}*.json"):
+            if path != current:
+                path.unlink(missing_ok=True)
+
+
+def serialize_tree(tree: XsdTree) -> dict[str, Any]:
+    """Converts the tree into a JSON serializable structure.
+
+    All the strings and attributes are stored once in a table and referenced by index
+    since the same names, docs and attributes are repeated many times across the tree.
+
+    Args:
+        tree (XsdTree): The tree to convert.
+
+    Returns:
+        Dict[str, Any]: The serializable representation of the tree.
+    """
+    strings: dict[str, int] = {}
+
+    def ref(value: str | None) -> int:
+        if value is None:
+            return -1
+        return strings.setdefault(value, len(strings))
+
+    def docs_refs(item: XsdNode | XsdAttribute) -> list[int]:
+        return [ref_value for lang, doc in item.get_all_docs().items() for ref_value in (ref(lang), ref(doc))]
+
+    attributes: dict[tuple, int] = {}
+
+    def attribute_ref(attribute: XsdAttribute) -> int:
+        key = (
+            ref(attribute.name),
+            ref(attribute.type_name),
+            int(attribute.is_required),
+            tuple(ref(value) for value in attribute.enumeration),
+            tuple(docs_refs(attribute)),
+        )
+        return attributes.setdefault(key, len(attributes))
+
+    node_ids = {id(node): index for index, node in enumerate(PreOrderIter(tree.root))}
+    nodes = [
+        [
+            node_ids[id(node.parent)] if node.parent is not None else -1,
+            ref(node.name),
+            node.min_occurs,
+            node.max_occurs,
+            docs_refs(node),
+            [attribute_ref(attribute) for attribute in node.attributes.values()],
+        ]
+        for node in PreOrderIter(tree.root)
+    ]
+    return {
+        "format": SNAPSHOT_FORMAT_VERSION,
+        "strings": list(strings),
+        "attributes": list(attributes),
+        "nodes": nodes,
+    }
+
+
+def deserialize_tree(data: dict[str, Any]) -> XsdTree:
+    """Rebuilds the tree from the structure created by `serialize_tree`.
+
+    The nodes in the resulting tree are not linked to the XSD schema elements, their
+    documentation is restored from the snapshot instead.
+
+    Args:
+        data (Dict[str, Any]): The serializable representation of the tree.
+
+    Returns:
+        XsdTree: The rebuilt tree.
+    """
+    if data["format"] != SNAPSHOT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported XSD tree snapshot format: {data['format']}")
+    strings: list[str] = data["strings"]
+
+    def deref(index: int) -> str | None:
+        return strings[index] if index >= 0 else None
+
+    def restore_docs(refs: list[int]) -> dict[str, str]:
+        return {strings[refs[i]]: strings[refs[i + 1]] for i in range(0, len(refs), 2)}
+
+    # Attributes are read-only so the same instance is shared by all the nodes using it
+    attributes: list[XsdAttribute] = []
+    for name_index, type_index, is_required, enumeration, docs in data["attributes"]:
+        attribute = XsdAttribute(strings[name_index], None, deref(type_index), bool(is_required))
+        attribute.enumeration = [strings[value] for value in enumeration]
+        attribute.docs = restore_docs(docs)
+        attributes.append(attribute)
+
+    nodes: list[XsdNode] = []
+    for parent_index, name_index, min_occurs, max_occurs, docs, attribute_indexes in data["nodes"]:
+        parent = nodes[parent_index] if parent_index >= 0 else None
+        node = XsdNode(strings[name_index], None, parent)
+        node.min_occurs = min_occurs
+        node.max_occurs = max_occurs
+        node.docs = restore_docs(docs)
+        for attribute_index in attribute_indexes:
+            attribute = attributes[attribute_index]
+            node.attributes[attribute.name] = attribute
+        nodes.append(node)
+    tree = XsdTree(nodes[0])
+    tree.build_index()
+    return tree
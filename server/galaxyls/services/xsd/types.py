@@ -1,5 +1,6 @@
 """Type definitions for XSD processing."""
 
+from collections.abc import Sequence
 from typing import (
     Any,
     cast,
@@ -7,10 +8,8 @@ from typing import (
 
 from anytree import (  # type: ignore
     NodeMixin,
+    PreOrderIter,
     RenderTree,
-    Resolver,
-    ResolverError,
-    findall,
 )
 from lsprotocol.types import (
     MarkupContent,
@@ -18,7 +17,10 @@ from lsprotocol.types import (
 )
 from lxml import etree
 
-from .constants import MSG_NO_DOCUMENTATION_AVAILABLE
+from .constants import (
+    MSG_NO_DOCUMENTATION_AVAILABLE,
+    XS_NAMESPACES,
+)
 
 
 class XsdBase:
@@ -33,6 +35,10 @@ class XsdBase:
         self.name: str = name
         self.xsd_element: etree._Element | None = element
         self.xsd_type: etree._Element | None = None
+        # Documentation by language when it was already extracted from the schema
+        self.docs: dict[str, str] | None = None
+        # Rendered documentation by language, built the first time it is requested
+        self._rendered_docs: dict[str, MarkupContent] = {}
 
     def __repr__(self) -> str:
         return self.name
@@ -42,7 +48,8 @@ class XsdBase:
         from the XSD schema.
 
         If there is no documentation in the schema for the element,
-        a message indicating this will be returned instead.
+        a message indicating this will be returned instead. The documentation
+        is only rendered the first time it is requested for each language.
 
         Args:
             lang (str, optional): The language code of the documentation
@@ -52,10 +59,31 @@ class XsdBase:
             [str]: The documentation text or a message indicating
             there is no documentation.
         """
-        doc = self._get_doc_text_of_element(self.xsd_element, lang) or self._get_doc_text_of_element(self.xsd_type, lang)
-        if doc:
-            return MarkupContent(kind=MarkupKind.Markdown, value=doc)
-        return MarkupContent(kind=MarkupKind.Markdown, value=MSG_NO_DOCUMENTATION_AVAILABLE)
+        rendered = self._rendered_docs.get(lang)
+        if rendered is None:
+            doc = self.get_doc_text(lang)
+            rendered = MarkupContent(kind=MarkupKind.Markdown, value=doc or MSG_NO_DOCUMENTATION_AVAILABLE)
+            self._rendered_docs[lang] = rendered
+        return rendered
+
+    def get_doc_text(self, lang: str = "en") -> str:
+        """Gets the raw documentation text associated with this element or an empty string."""
+        if self.docs is not None:
+            return self.docs.get(lang, "")
+        return self._get_doc_text_of_element(self.xsd_element, lang) or self._get_doc_text_of_element(self.xsd_type, lang)
+
+    def get_all_docs(self) -> dict[str, str]:
+        """Gets the documentation texts associated with this element indexed by language."""
+        if self.docs is not None:
+            return self.docs
+        languages: set[str] = set()
+        for element in (self.xsd_element, self.xsd_type):
+            if element is not None:
+                languages.update(
+                    cast(list[str], element.xpath("./xs:annotation/xs:documentation/@xml:lang", namespaces=XS_NAMESPACES))
+                )
+        docs = {lang: self.get_doc_text(lang) for lang in sorted(languages)}
+        return {lang: doc for lang, doc in docs.items() if doc}
 
     def _get_doc_text_of_element(self, element: Any | None, lang: str = "en") -> str:
         try:
@@ -124,34 +152,80 @@ class XsdNode(XsdBase, NodeMixin):
 class XsdTree:
     """Represents a tree structure containing the important
     XSD information for all the elements and attributes.
+
+    The nodes are indexed by their stack of tag names and by their name the first
+    time they are looked up (or when `build_index` is called) so every lookup is a
+    dictionary access. The tree must not be modified after the index is built.
     """
 
     def __init__(self, root: XsdNode):
         self.root: XsdNode = root
-        self.node_resolver = Resolver("name")
         self.expand_element = self._build_expand_element()
+        self._nodes_by_stack: dict[tuple[str, ...], XsdNode] | None = None
+        self._nodes_by_name: dict[str, XsdNode] | None = None
+
+    def build_index(self) -> None:
+        """Indexes all the nodes in the tree by their stack of tag names and by name.
 
-    def find_node_by_stack(self, node_stack: list[str]) -> XsdNode | None:
+        When several sibling nodes share the same name, only the first one is reachable
+        by stack. When several nodes in the tree share the same name, the first one in
+        pre-order is returned by name.
+        """
+        nodes_by_stack: dict[tuple[str, ...], XsdNode] = {}
+        pending: list[tuple[tuple[str, ...], XsdNode]] = [((self.root.name,), self.root)]
+        while pending:
+            stack, node = pending.pop()
+            nodes_by_stack[stack] = node
+            for child in node.children:
+                child_stack = (*stack, child.name)
+                if child_stack not in nodes_by_stack:
+                    nodes_by_stack[child_stack] = child
+                    pending.append((child_stack, child))
+
+        nodes_by_name: dict[str, XsdNode] = {}
+        for node in PreOrderIter(self.root):
+            nodes_by_name.setdefault(node.name, node)
+
+        self._nodes_by_stack = nodes_by_stack
+        self._nodes_by_name = nodes_by_name
+
+    def find_node_by_stack(self, node_stack: Sequence[str]) -> XsdNode | None:
         """Finds the node definition in the tree that matches the given stack of tags.
 
         Args:
-            node_stack (List[str]): The stack of tag names composing a tree branch.
-            Like: ['root', 'node', 'subnode', 'leaf']
+            node_stack (Sequence[str]): The stack of tag names composing a tree branch.
+            Like: ['root', 'node', 'subnode', 'leaf']. If the first tag is not
+            the root, the stack is considered relative to the root.
 
         Returns:
             Optional[XsdNode]: The node definition matching the leaf in the path or
             None if the node could not be found.
         """
-        result_node = None
-        if node_stack:
-            try:
-                path = self._get_path_from_stack(node_stack)
-                if path.endswith(self.expand_element.name):
-                    return self.expand_element
-                result_node = self.node_resolver.get(self.root, path)
-            except ResolverError as e:
-                print(e)
-        return result_node
+        if not node_stack:
+            return None
+        if node_stack[-1] == self.expand_element.name:
+            return self.expand_element
+        if self._nodes_by_stack is None:
+            self.build_index()
+        assert self._nodes_by_stack is not None
+        key = tuple(node_stack) if node_stack[0] == self.root.name else (self.root.name, *node_stack)
+        return self._nodes_by_stack.get(key)
+
+    def find_node_by_name(self, name: str) -> XsdNode | None:
+        """Finds the first node definition in the tree with the given tag name.
+
+        Args:
+            name (str): The name of the tag.
+
+        Returns:
+            Optional[XsdNode]: The node definition or None if there is no node with that name.
+        """
+        if name == self.expand_element.name:
+            return self.expand_element
+        if self._nodes_by_name is None:
+            self.build_index()
+        assert self._nodes_by_name is not None
+        return self._nodes_by_name.get(name)
 
     def render(self) -> str:
         """Gets an ascii representation of this tree.
@@ -161,11 +235,6 @@ class XsdTree:
         """
         return self.root.render()
 
-    def _get_path_from_stack(self, node_stack: list[str]) -> str:
-        if node_stack[0] == self.root.name:
-            node_stack[0] = "."
-        return "/".join(node_stack)
-
     def _build_expand_element(self) -> XsdNode:
         """Creates a XsdNode representing the <expand> element and it's attributes.
         The <expand> element is a special element that is not defined in the XSD schema but allows to use macros in the tool.
@@ -178,15 +247,3 @@ class XsdTree:
         attr = XsdAttribute(attr_name, None, type_name=None, is_required=True)
         expand_node.attributes[attr_name] = attr
         return expand_node
-
-    def find_node_by_name(self, name: str) -> XsdNode | None:
-        if name == self.expand_element.name:
-            return self.expand_element
-
-        result = findall(
-            self.root,
-            filter_=lambda node: node.name == name,
-        )
-        if len(result) > 0:
-            return cast(XsdNode, result[0])
-        return None
@@ -61,11 +61,10 @@ class GalaxyToolSchemaValidationService:
         Returns:
             List[Diagnostic]: The list containing the syntax error found or an empty list.
         """
-        try:
-            etree.fromstring(xml_document.document.source)
-            return []
-        except etree.XMLSyntaxError as e:
-            return self._build_diagnostics_from_syntax_error(e)
+        syntax_error = xml_document.xml_syntax_error
+        if syntax_error is not None:
+            return self._build_diagnostics_from_syntax_error(syntax_error)
+        return []
 
     def _validate_expanded(self, xml_document: XmlDocument) -> list[Diagnostic]:
         """Validates the document after loading all the macros referenced and expands them.
@@ -0,0 +1,219 @@
+"""Latency statistics of the language server operations.
+
+The time spent in every LSP request, notification and command handler is recorded together
+with the time of the main steps they depend on (parsing, XSD matching, macros loading, linting...)
+so slow operations reported by users can be diagnosed from the statistics of the running server.
+
+The durations are kept in memory in histograms with logarithmic buckets, so the memory used does
+not depend on the number of operations and the percentiles have a relative error of about 10%.
+"""
+
+import functools
+import inspect
+import math
+import threading
+import time
+from collections.abc import Callable
+from types import TracebackType
+from typing import (
+    Any,
+    TypeVar,
+    cast,
+)
+
+import attrs
+
+from galaxyls.profiling import add_method_wrapper
+
+MIN_BUCKET_DURATION = 0.00001
+"""The upper bound in seconds of the first bucket of the histograms."""
+BUCKET_GROWTH = 2**0.25
+BUCKETS_COUNT = 96
+"""Enough buckets to cover durations from 10 microseconds to several minutes."""
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+DIAGNOSTICS = "diagnostics"
+PARSE = "parse"
+PARSE_INCREMENTAL = "parse.incremental"
+XSD_MATCH = "xsd.match"
+XSD_VALIDATE = "xsd.validate"
+MACROS_LOAD = "macros.load"
+MACROS_EXPAND = "macros.expand"
+LINT = "lint"
+RANGE_INDEX = "range.index"
+
+
+@attrs.define
+class LatencySummary:
+    """The statistics of the durations recorded for an operation, all in milliseconds."""
+
+    name: str
+    count: int
+    mean: float
+    p50: float
+    p90: float
+    p99: float
+    max: float
+
+
+class LatencyHistogram:
+    """Histogram of the durations of an operation."""
+
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * BUCKETS_COUNT
+
+    def add(self, duration: float) -> None:
+        """Adds the given duration in seconds to the histogram."""
+        self.count += 1
+        self.total += duration
+        if duration > self.max:
+            self.max = duration
+        self.buckets[get_bucket_index(duration)] += 1
+
+    def percentile(self, percentile: float) -> float:
+        """Gets an estimation of the given percentile (between 0 and 100) of the durations in seconds.
+
+        The estimation is the upper bound of the bucket containing the percentile, but never more
+        than the maximum duration recorded."""
+        if self.count == 0:
+            return 0.0
+        rank = max(1, math.ceil(self.count * percentile / 100))
+        accumulated = 0
+        for index, bucket_count in enumerate(self.buckets):
+            accumulated += bucket_count
+            if accumulated >= rank:
+                return min(get_bucket_upper_bound(index), self.max)
+        return self.max
+
+
+def get_bucket_index(duration: float) -> int:
+    """Gets the index of the histogram bucket for the given duration in seconds."""
+    if duration <= MIN_BUCKET_DURATION:
+        return 0
+    index = math.ceil(math.log(duration / MIN_BUCKET_DURATION, BUCKET_GROWTH))
+    return min(index, BUCKETS_COUNT - 1)
+
+
+def get_bucket_upper_bound(index: int) -> float:
+    """Gets the maximum duration in seconds of the histogram bucket with the given index."""
+    if index == BUCKETS_COUNT - 1:
+        return math.inf
+    return MIN_BUCKET_DURATION * BUCKET_GROWTH**index
+
+
+class LatencyMeasure:
+    """Context manager recording the time spent inside it."""
+
+    __slots__ = ("stats", "name", "start")
+
+    def __init__(self, stats: "LatencyStats", name: str) -> None:
+        self.stats = stats
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self) -> "LatencyMeasure":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.stats.record(self.name, time.perf_counter() - self.start)
+
+
+class LatencyStats:
+    """Keeps the histograms of the durations of every operation by name. It is thread safe."""
+
+    def __init__(self) -> None:
+        self._histograms: dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, duration: float) -> None:
+        """Records the duration in seconds of an execution of the operation with the given name."""
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = LatencyHistogram()
+            histogram.add(duration)
+
+    def measure(self, name: str) -> LatencyMeasure:
+        """Gets a context manager recording the time spent inside it as an execution of the given operation."""
+        return LatencyMeasure(self, name)
+
+    def get_summaries(self) -> list[LatencySummary]:
+        """Gets the statistics of all the operations recorded so far sorted by name."""
+        with self._lock:
+            return [
+                LatencySummary(
+                    name=name,
+                    count=histogram.count,
+                    mean=to_milliseconds(histogram.total / histogram.count),
+                    p50=to_milliseconds(histogram.percentile(50)),
+                    p90=to_milliseconds(histogram.percentile(90)),
+                    p99=to_milliseconds(histogram.percentile(99)),
+                    max=to_milliseconds(histogram.max),
+                )
+                for name, histogram in sorted(self._histograms.items())
+            ]
+
+    def format_summaries(self) -> str:
+        """Gets the statistics of all the operations as a table."""
+        lines = [f"{'operation':<40} {'count':>8} {'mean':>10} {'p50':>10} {'p90':>10} {'p99':>10} {'max':>10}"]
+        for summary in self.get_summaries():
+            lines.append(
+                f"{summary.name:<40} {summary.count:>8} {summary.mean:>10.3f} {summary.p50:>10.3f}"
+                f" {summary.p90:>10.3f} {summary.p99:>10.3f} {summary.max:>10.3f}"
+            )
+        return "\n".join(lines)
+
+    def reset(self) -> None:
+        """Discards all the recorded durations."""
+        with self._lock:
+            self._histograms.clear()
+
+
+def to_milliseconds(duration: float) -> float:
+    return round(duration * 1000, 3)
+
+
+latency_stats = LatencyStats()
+"""The statistics of the operations of this server process."""
+
+
+def measure(name: str) -> LatencyMeasure:
+    """Gets a context manager recording the time spent inside it in the server latency statistics."""
+    return latency_stats.measure(name)
+
+
+def timed(name: str, function: F) -> F:
+    """Wraps the function, either synchronous or asynchronous, to record the latency of every call.
+
+    The wrapper keeps the signature and annotations of the function, so it can be registered
+    as a language server handler instead of the function. The samples of the profiler taken
+    during the calls are tagged with the name."""
+    if inspect.iscoroutinefunction(function):
+
+        @functools.wraps(function)
+        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+            with measure(name):
+                return await function(*args, **kwargs)
+
+        add_method_wrapper(async_wrapper)
+        return cast(F, async_wrapper)
+
+    @functools.wraps(function)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        with measure(name):
+            return function(*args, **kwargs)
+
+    add_method_wrapper(wrapper)
+    return cast(F, wrapper)
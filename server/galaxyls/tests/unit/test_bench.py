@@ -0,0 +1,128 @@
+from pathlib import Path
+
+import pytest
+from lxml import etree
+
+from galaxyls.bench.corpus import (
+    CorpusOptions,
+    build_conditional_depths_corpus,
+    build_corpus,
+)
+from galaxyls.bench.runner import (
+    WORKSPACE,
+    BenchmarkComparison,
+    BenchmarkResult,
+    DepthScaling,
+    ToolBenchmark,
+    compare_results,
+    get_depth_scaling,
+    get_regressions,
+)
+from galaxyls.services.language import GalaxyToolLanguageService
+from galaxyls.services.tools.workspace import INDEX_FILE_PREFIX
+
+SMALL_CORPUS = CorpusOptions(params=10, conditional_depth=2, max_conditional_depth=3, command_lines=20, macro_files=2)
+
+
+def create_result(document: str, operation: str, median: float) -> BenchmarkResult:
+    return BenchmarkResult(document, operation, runs=1, min=median, median=median, mean=median, max=median)
+
+
+class TestBenchmarkCorpusClass:
+    def test_build_corpus_returns_well_formed_generated_and_hand_written_files(self) -> None:
+        corpus = build_corpus(SMALL_CORPUS)
+
+        for corpus_file in corpus:
+            etree.fromstring(corpus_file.source.encode())
+        tools = [corpus_file.path for corpus_file in corpus if corpus_file.is_tool]
+        assert tools[:4] == [
+            "synthetic/params.xml",
+            "synthetic/conditionals.xml",
+            "synthetic/command.xml",
+            "synthetic/macros.xml",
+        ]
+        assert "synthetic/wrappers/bwa/bwa_mem.xml" in tools
+        assert "synthetic/wrappers/bwa/bwa_macros.xml" not in tools
+
+    def test_build_corpus_generates_requested_sizes(self) -> None:
+        corpus = build_corpus(SMALL_CORPUS, wrappers_dir=None)
+        sources = {corpus_file.path: corpus_file.source for corpus_file in corpus}
+
+        assert len(corpus) == 4 + SMALL_CORPUS.macro_files
+        assert sources["synthetic/params.xml"].count("<param ") == SMALL_CORPUS.params
+        assert sources["synthetic/conditionals.xml"].count("<conditional ") == SMALL_CORPUS.conditional_depth
+        assert sources["synthetic/macros.xml"].count("<import>") == SMALL_CORPUS.macro_files
+
+
+class TestToolBenchmarkClass:
+    def test_run_measures_all_operations_of_every_tool(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        cache_dir = tmp_path / "cache"
+        monkeypatch.setenv("GALAXYLS_CACHE_DIR", str(cache_dir))
+        corpus = build_corpus(SMALL_CORPUS, wrappers_dir=None)
+        benchmark = ToolBenchmark(GalaxyToolLanguageService(), repeat=2)
+
+        results = benchmark.run(corpus, tmp_path / "workspace")
+
+        assert (results[0].document, results[0].operation) == (WORKSPACE, "index")
+        params_operations = [result.operation for result in results if result.document == "synthetic/params.xml"]
+        assert params_operations == [
+            "parse",
+            "completion.node",
+            "completion.attribute",
+            "hover",
+            "diagnostics",
+            "symbols.document",
+            "symbols.workspace",
+            "formatting",
+            "tests.generate",
+        ]
+        assert all(result.runs == 2 and 0 <= result.min <= result.median <= result.max for result in results)
+        assert not list(cache_dir.glob(f"{INDEX_FILE_PREFIX}*"))
+
+    def test_run_conditional_depths_measures_diagnostics_of_every_depth(self, tmp_path: Path) -> None:
+        corpus = build_conditional_depths_corpus(SMALL_CORPUS.max_conditional_depth)
+        benchmark = ToolBenchmark(GalaxyToolLanguageService(), repeat=1)
+
+        results = benchmark.run_conditional_depths(corpus, tmp_path)
+
+        assert [(result.document, result.operation) for result in results] == [
+            ("synthetic/depths/conditionals_1.xml", "diagnostics"),
+            ("synthetic/depths/conditionals_2.xml", "diagnostics"),
+            ("synthetic/depths/conditionals_3.xml", "diagnostics"),
+        ]
+
+
+class TestBenchmarkComparisonClass:
+    def test_compare_results_pairs_same_operations(self) -> None:
+        baseline = [create_result("tool.xml", "parse", 2.0), create_result("tool.xml", "hover", 1.0)]
+        current = [create_result("tool.xml", "parse", 3.0), create_result("other.xml", "parse", 1.0)]
+
+        comparisons = compare_results(baseline, current)
+
+        assert comparisons == [BenchmarkComparison("tool.xml", "parse", 2.0, 3.0)]
+        assert comparisons[0].ratio == 1.5
+
+    def test_get_depth_scaling_returns_growth_over_previous_depth(self) -> None:
+        results = [create_result(f"conditionals_{depth}.xml", "diagnostics", median) for depth, median in ((1, 2.0), (2, 5.0))]
+
+        scaling = get_depth_scaling(results)
+
+        assert scaling == [DepthScaling(depth=1, median=2.0, growth=1.0), DepthScaling(depth=2, median=5.0, growth=2.5)]
+
+    @pytest.mark.parametrize(
+        "baseline, current, expected",
+        [
+            (2.0, 2.4, False),
+            (2.0, 3.0, True),
+            (0.01, 0.05, False),
+            (2.0, 1.0, False),
+        ],
+    )
+    def test_get_regressions_ignores_small_changes_and_fast_operations(
+        self, baseline: float, current: float, expected: bool
+    ) -> None:
+        comparison = BenchmarkComparison("tool.xml", "parse", baseline, current)
+
+        regressions = get_regressions([comparison], threshold=0.25, min_duration=0.1)
+
+        assert (regressions == [comparison]) == expected
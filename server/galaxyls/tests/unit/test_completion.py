@@ -3,6 +3,10 @@ from typing import (
 )
 
 import pytest
+from lsprotocol.types import (
+    CompletionItem,
+    MarkupContent,
+)
 from pytest_mock import MockerFixture
 
 from galaxyls.services.completion import (
@@ -217,6 +221,48 @@ class TestXmlCompletionServiceClass:
 
         assert len(actual.items) == 2
 
+    def test_node_completion_items_are_resolved_with_documentation(
+        self,
+        fake_tree: XsdTree,
+        fake_context_on_root_node,
+        fake_definitions_provider: DocumentDefinitionsProvider,
+    ) -> None:
+        fake_tree.root.children[0].docs = {"en": "Child documentation"}
+        service = XmlCompletionService(fake_tree, fake_definitions_provider)
+
+        items = service.get_node_completion(fake_context_on_root_node).items
+
+        assert [item.documentation for item in items] == [None, None]
+        resolved = service.resolve_completion_item(items[0])
+        assert isinstance(resolved.documentation, MarkupContent)
+        assert resolved.documentation.value == "Child documentation"
+        assert service.resolve_completion_item(items[1]).documentation
+
+    def test_attribute_completion_items_are_resolved_with_documentation(
+        self,
+        fake_tree: XsdTree,
+        fake_context_on_root_node,
+        fake_definitions_provider: DocumentDefinitionsProvider,
+    ) -> None:
+        fake_tree.root.attributes["attr"].docs = {"en": "Attribute documentation"}
+        service = XmlCompletionService(fake_tree, fake_definitions_provider)
+
+        items = service.get_attribute_completion(fake_context_on_root_node).items
+
+        assert [item.documentation for item in items] == [None]
+        resolved = service.resolve_completion_item(items[0])
+        assert isinstance(resolved.documentation, MarkupContent)
+        assert resolved.documentation.value == "Attribute documentation"
+
+    def test_resolve_completion_item_without_data_returns_same_item(
+        self, fake_tree: XsdTree, fake_definitions_provider: DocumentDefinitionsProvider
+    ) -> None:
+        service = XmlCompletionService(fake_tree, fake_definitions_provider)
+        item = CompletionItem(label="other")
+
+        assert service.resolve_completion_item(item) is item
+        assert item.documentation is None
+
     @pytest.mark.parametrize(
         "line_with_mark, trigger, expected",
         [
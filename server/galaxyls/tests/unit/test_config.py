@@ -23,7 +23,7 @@ class TestGalaxyToolsConfigurationClass:
 
     def test_init_configuration_from_dict(self):
         config_dict = {
-            "server": {"silentInstall": False},
+            "server": {"silentInstall": False, "memoryBudget": 64},
             "completion": {"mode": "disabled", "autoCloseTags": True},
             "planemo": {
                 "enabled": True,
@@ -36,6 +36,7 @@ class TestGalaxyToolsConfigurationClass:
         config = convert_to(config_dict, GalaxyToolsConfiguration)
 
         assert config.server.silent_install is False
+        assert config.server.memory_budget == 64
         assert config.completion.mode == CompletionMode.DISABLED
         assert config.completion.auto_close_tags is True
         assert config.planemo.enabled is True
@@ -0,0 +1,242 @@
+from pathlib import Path
+
+import pytest
+from galaxy.util import xml_macros
+from lsprotocol.types import TextDocumentItem
+from lxml import etree
+from pygls.workspace import Workspace
+from pytest_mock import MockerFixture
+
+from ...services import macros as macros_module
+from ...services.macros import (
+    ExpandedToolTreeCache,
+    load_with_references,
+    parse_xml_source,
+)
+from ...services.tools.macros import MacroDefinitionsProvider
+from ...services.xml.document import XmlDocument
+from .utils import TestUtils
+
+MACROS_SOURCE = '<macros><token name="@VERSION@">1.0</token><xml name="inputs"><param/></xml></macros>'
+TOOL_SOURCE = '<tool><macros><import>macros.xml</import></macros><expand macro="inputs"/></tool>'
+
+
+@pytest.fixture()
+def macros_file(tmp_path: Path) -> Path:
+    path = tmp_path / "macros.xml"
+    path.write_text(MACROS_SOURCE)
+    return path
+
+
+@pytest.fixture()
+def workspace(tmp_path: Path) -> Workspace:
+    return Workspace(tmp_path.as_uri())
+
+
+def get_tool_xml_document(tmp_path: Path, name: str = "tool.xml") -> XmlDocument:
+    return TestUtils.from_source_to_xml_document(TOOL_SOURCE, uri=(tmp_path / name).as_uri())
+
+
+class TestMacroFilesIndexClass:
+    def test_macros_file_is_parsed_once_for_all_tools(
+        self, workspace: Workspace, macros_file: Path, tmp_path: Path, mocker: MockerFixture
+    ) -> None:
+        provider = MacroDefinitionsProvider(workspace)
+        load = mocker.spy(provider, "_load_macros_document")
+
+        first = provider.load_macro_definitions(get_tool_xml_document(tmp_path, "tool1.xml"))
+        second = provider.load_macro_definitions(get_tool_xml_document(tmp_path, "tool2.xml"))
+
+        assert load.call_count == 1
+        assert first.get_token_definition("VERSION")
+        assert second.get_macro_definition("inputs")
+        assert macros_file.as_uri() in provider.macro_files_index
+
+    def test_macros_file_is_parsed_again_when_changed_on_disk(
+        self, workspace: Workspace, macros_file: Path, tmp_path: Path
+    ) -> None:
+        provider = MacroDefinitionsProvider(workspace)
+        provider.load_macro_definitions(get_tool_xml_document(tmp_path))
+
+        TestUtils.write_file(macros_file, MACROS_SOURCE.replace("@VERSION@", "@TOOL_VERSION@"))
+        definitions = provider.load_macro_definitions(get_tool_xml_document(tmp_path))
+
+        assert definitions.get_token_definition("TOOL_VERSION")
+        assert definitions.get_token_definition("VERSION") is None
+
+    def test_macros_file_is_parsed_again_when_invalidated(
+        self, workspace: Workspace, macros_file: Path, tmp_path: Path, mocker: MockerFixture
+    ) -> None:
+        provider = MacroDefinitionsProvider(workspace)
+        load = mocker.spy(provider, "_load_macros_document")
+        provider.load_macro_definitions(get_tool_xml_document(tmp_path))
+
+        provider.macro_files_index.invalidate(macros_file.as_uri())
+        provider.load_macro_definitions(get_tool_xml_document(tmp_path))
+
+        assert load.call_count == 2
+
+    def test_open_macros_file_uses_editor_contents(self, workspace: Workspace, macros_file: Path, tmp_path: Path) -> None:
+        provider = MacroDefinitionsProvider(workspace)
+        provider.load_macro_definitions(get_tool_xml_document(tmp_path))
+
+        workspace.put_text_document(
+            TextDocumentItem(
+                uri=macros_file.as_uri(),
+                language_id="xml",
+                version=1,
+                text=MACROS_SOURCE.replace("@VERSION@", "@OPEN_VERSION@"),
+            )
+        )
+        definitions = provider.load_macro_definitions(get_tool_xml_document(tmp_path))
+
+        assert definitions.get_token_definition("OPEN_VERSION")
+
+
+def get_expanded_tree(cache: ExpandedToolTreeCache, tool_path: str, tool_source: str) -> etree._ElementTree:
+    return cache.get(tool_path, tool_source, parse_xml_source(tool_source, tool_path, remove_comments=False))
+
+
+def get_expanded_param_names(tree: etree._ElementTree) -> list[str | None]:
+    return [param.get("name") for param in tree.getroot().iter("param")]
+
+
+class TestExpandedToolTreeCacheClass:
+    EXPANDED_TOOL_SOURCE = '<tool><macros><import>macros.xml</import></macros><expand macro="inputs"/></tool>'
+    MACROS_SOURCE = '<macros><import>nested.xml</import><xml name="inputs"><param name="@NAME@"/></xml></macros>'
+    NESTED_MACROS_SOURCE = '<macros><token name="@NAME@">input</token></macros>'
+
+    @pytest.fixture()
+    def tool_path(self, tmp_path: Path) -> str:
+        (tmp_path / "macros.xml").write_text(self.MACROS_SOURCE)
+        (tmp_path / "nested.xml").write_text(self.NESTED_MACROS_SOURCE)
+        return str(tmp_path / "tool.xml")
+
+    def test_get_expands_macros_from_all_imported_files(self, workspace: Workspace, tool_path: str) -> None:
+        cache = ExpandedToolTreeCache(workspace)
+
+        tree = get_expanded_tree(cache, tool_path, self.EXPANDED_TOOL_SOURCE)
+
+        assert get_expanded_param_names(tree) == ["input"]
+
+    def test_get_reuses_tree_while_dependencies_are_unchanged(
+        self, workspace: Workspace, tool_path: str, mocker: MockerFixture
+    ) -> None:
+        cache = ExpandedToolTreeCache(workspace)
+        load = mocker.spy(macros_module, "load_with_references")
+
+        first = get_expanded_tree(cache, tool_path, self.EXPANDED_TOOL_SOURCE)
+        second = get_expanded_tree(cache, tool_path, self.EXPANDED_TOOL_SOURCE)
+
+        assert first is second
+        assert load.call_count == 1
+        assert cache.hits == 1
+
+    def test_get_expands_again_when_tool_changes(self, workspace: Workspace, tool_path: str) -> None:
+        cache = ExpandedToolTreeCache(workspace)
+        get_expanded_tree(cache, tool_path, self.EXPANDED_TOOL_SOURCE)
+
+        tree = get_expanded_tree(
+            cache, tool_path, self.EXPANDED_TOOL_SOURCE.replace("<expand", '<param name="other"/><expand')
+        )
+
+        assert get_expanded_param_names(tree) == ["other", "input"]
+
+    def test_get_expands_again_when_nested_macros_file_changes_on_disk(
+        self, workspace: Workspace, tool_path: str, tmp_path: Path
+    ) -> None:
+        cache = ExpandedToolTreeCache(workspace)
+        get_expanded_tree(cache, tool_path, self.EXPANDED_TOOL_SOURCE)
+
+        (tmp_path / "nested.xml").write_text(self.NESTED_MACROS_SOURCE.replace(">input<", ">changed<"))
+        tree = get_expanded_tree(cache, tool_path, self.EXPANDED_TOOL_SOURCE)
+
+        assert get_expanded_param_names(tree) == ["changed"]
+
+    def test_get_uses_unsaved_contents_of_open_macros_file(self, workspace: Workspace, tool_path: str, tmp_path: Path) -> None:
+        cache = ExpandedToolTreeCache(workspace)
+        get_expanded_tree(cache, tool_path, self.EXPANDED_TOOL_SOURCE)
+
+        workspace.put_text_document(
+            TextDocumentItem(
+                uri=(tmp_path / "nested.xml").as_uri(),
+                language_id="xml",
+                version=1,
+                text=self.NESTED_MACROS_SOURCE.replace(">input<", ">unsaved<"),
+            )
+        )
+        tree = get_expanded_tree(cache, tool_path, self.EXPANDED_TOOL_SOURCE)
+
+        assert get_expanded_param_names(tree) == ["unsaved"]
+
+    def test_invalidate_discards_tools_depending_on_file(self, workspace: Workspace, tool_path: str, tmp_path: Path) -> None:
+        cache = ExpandedToolTreeCache(workspace)
+        get_expanded_tree(cache, tool_path, self.EXPANDED_TOOL_SOURCE)
+        other_tool_path = str(tmp_path / "other.xml")
+        get_expanded_tree(cache, other_tool_path, "<tool/>")
+
+        cache.invalidate((tmp_path / "nested.xml").as_uri())
+
+        assert tool_path not in cache
+        assert other_tool_path in cache
+
+    def test_get_raises_syntax_error_in_imported_file(self, workspace: Workspace, tool_path: str, tmp_path: Path) -> None:
+        cache = ExpandedToolTreeCache(workspace)
+        (tmp_path / "nested.xml").write_text("<macros>")
+
+        with pytest.raises(etree.XMLSyntaxError) as error:
+            get_expanded_tree(cache, tool_path, self.EXPANDED_TOOL_SOURCE)
+
+        assert error.value.filename == str(tmp_path / "nested.xml")
+
+
+class TestLoadWithReferencesClass:
+    TOOL_SOURCE = """<tool id="tool" name="Tool @WRAPPER_VERSION@" version="@TOOL_VERSION@">
+    <!-- A comment -->
+    <macros>
+        <import>macros.xml</import>
+        <token name="@WRAPPER_VERSION@">@TOOL_VERSION@+galaxy0</token>
+        <xml name="options" tokens="label">
+            <param name="option" type="text" label="@LABEL@"/>
+            <yield/>
+        </xml>
+    </macros>
+    <expand macro="requirements"/>
+    <command>tool --version @TOOL_VERSION@</command>
+    <inputs>
+        <expand macro="options" label="Option">
+            <param name="extra" type="integer" value="1"/>
+        </expand>
+        <expand macro="nested_inputs"/>
+    </inputs>
+</tool>
+"""
+    MACROS_SOURCE = """<macros>
+    <import>nested.xml</import>
+    <token name="@TOOL_VERSION@">1.0</token>
+    <xml name="requirements">
+        <requirements>
+            <requirement type="package" version="@TOOL_VERSION@">tool</requirement>
+        </requirements>
+    </xml>
+    <template name="template">#set $value = 1</template>
+</macros>
+"""
+    NESTED_MACROS_SOURCE = """<macros>
+    <xml name="nested_inputs">
+        <param name="nested" type="data" format="@FORMATS@"/>
+    </xml>
+    <token name="@FORMATS@">tabular,txt</token>
+</macros>
+"""
+
+    def test_returns_same_result_as_galaxy(self, tmp_path: Path) -> None:
+        TestUtils.write_file(tmp_path / "macros.xml", self.MACROS_SOURCE)
+        TestUtils.write_file(tmp_path / "nested.xml", self.NESTED_MACROS_SOURCE)
+        tool_path = str(TestUtils.write_file(tmp_path / "tool.xml", self.TOOL_SOURCE))
+        expected_tree, expected_paths = xml_macros.load_with_references(tool_path)
+
+        tree, macro_paths = load_with_references(tool_path, parse_xml_source(self.TOOL_SOURCE, tool_path))
+
+        assert etree.tostring(tree) == etree.tostring(expected_tree)
+        assert macro_paths == expected_paths
@@ -0,0 +1,121 @@
+from lxml import etree
+
+from ...memory import (
+    ATTRIBUTE_SIZE,
+    ELEMENT_SIZE,
+    CacheEntries,
+    CacheRegistry,
+    CacheUsage,
+    estimate_document_size,
+    estimate_tree_size,
+)
+
+
+def create_cache(registry: CacheRegistry, name: str, max_entries: int | None = None) -> CacheEntries[str, str]:
+    return CacheEntries(registry, name, len, max_entries=max_entries)
+
+
+class TestCacheEntriesClass:
+    def test_put_discards_least_recently_used_entries_over_max_entries(self) -> None:
+        cache = create_cache(CacheRegistry(), "documents", max_entries=2)
+        cache.put("a", "1")
+        cache.put("b", "22")
+        cache.get("a")
+
+        cache.put("c", "333")
+
+        assert [key for key, _ in cache.items()] == ["a", "c"]
+        assert cache.size == 4
+
+    def test_put_replaces_entry_of_same_key(self) -> None:
+        cache = create_cache(CacheRegistry(), "documents")
+        cache.put("a", "1")
+
+        cache.put("a", "22")
+
+        assert cache.peek("a") == "22"
+        assert (len(cache), cache.size) == (1, 2)
+
+    def test_pop_removes_entry_and_its_size(self) -> None:
+        cache = create_cache(CacheRegistry(), "documents")
+        cache.put("a", "1")
+        cache.put("b", "22")
+
+        assert cache.pop("b") == "22"
+        assert cache.pop("b") is None
+        assert "b" not in cache
+        assert cache.size == 1
+
+
+class TestCacheRegistryClass:
+    def test_trim_discards_least_recently_used_entries_of_all_caches(self) -> None:
+        registry = CacheRegistry(budget=10)
+        documents = create_cache(registry, "documents")
+        trees = create_cache(registry, "trees")
+        documents.put("a", "1111")
+        trees.put("b", "2222")
+        documents.get("a")
+
+        documents.put("c", "3333")
+
+        assert "a" in documents
+        assert "b" not in trees
+        assert "c" in documents
+        assert trees.evictions == 1
+        assert registry.get_total_size() == 8
+
+    def test_trim_keeps_last_stored_entry_over_budget(self) -> None:
+        registry = CacheRegistry(budget=4)
+        documents = create_cache(registry, "documents")
+        documents.put("a", "1")
+
+        documents.put("b", "22222")
+
+        assert [key for key, _ in documents.items()] == ["b"]
+
+    def test_pinned_size_is_counted_but_never_discarded(self) -> None:
+        registry = CacheRegistry()
+        documents = create_cache(registry, "documents")
+        registry.register_pinned("xsd", lambda: 8)
+        documents.put("a", "11")
+        documents.put("b", "22")
+
+        registry.budget = 10
+
+        assert "a" not in documents
+        assert "b" in documents
+        assert registry.get_usage().caches == [
+            CacheUsage(name="xsd", entries=1, size=8, evictions=0, evictable=False),
+            CacheUsage(name="documents", entries=1, size=2, evictions=1),
+        ]
+
+    def test_budget_zero_does_not_limit_caches(self) -> None:
+        registry = CacheRegistry(budget=0)
+        documents = create_cache(registry, "documents")
+
+        for key in "abcdef":
+            documents.put(key, "1111")
+
+        assert len(documents) == 6
+        assert registry.get_usage().total == 24
+
+    def test_register_replaces_cache_with_same_name(self) -> None:
+        registry = CacheRegistry()
+        create_cache(registry, "documents").put("a", "1111")
+
+        create_cache(registry, "documents")
+
+        assert registry.get_total_size() == 0
+
+
+def test_estimate_tree_size_counts_elements_attributes_and_text() -> None:
+    tree = etree.ElementTree(etree.fromstring('<tool id="a" name="b"><command>echo</command>\n</tool>'))
+
+    assert estimate_tree_size(tree) == 2 * ELEMENT_SIZE + 2 * ATTRIBUTE_SIZE + len("echo") + len("\n")
+
+
+def test_estimate_document_size_grows_with_elements_and_attributes() -> None:
+    element = estimate_document_size("<tool></tool>")
+    attribute = estimate_document_size('<tool id="a"></tool>')
+
+    assert 0 < element < attribute < estimate_document_size('<tool id="a"><inputs/></tool>')
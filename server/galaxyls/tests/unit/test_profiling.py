@@ -0,0 +1,131 @@
+import asyncio
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+from galaxyls.profiling import (
+    SamplingProfiler,
+    add_method_wrapper,
+)
+from galaxyls.stats import timed
+
+
+def busy_loop(started: threading.Event, stop: threading.Event) -> None:
+    started.set()
+    while not stop.is_set():
+        pass
+
+
+def busy_handler(name: str, started: threading.Event, stop: threading.Event) -> None:
+    busy_loop(started, stop)
+
+
+add_method_wrapper(busy_handler)
+
+
+def run_async_handlers(started: threading.Event, stop: threading.Event) -> None:
+    async def busy() -> None:
+        await asyncio.sleep(0)
+        busy_loop(started, stop)
+
+    async def wait() -> None:
+        while not stop.is_set():
+            await asyncio.sleep(0.001)
+
+    async def run() -> None:
+        # The busy handler starts first and resumes after the other one is suspended
+        await asyncio.gather(timed("textDocument/completion", busy)(), timed("textDocument/hover", wait)())
+
+    asyncio.run(run())
+
+
+@contextmanager
+def busy_thread(name: str, method: str | None = None) -> Iterator[None]:
+    started = threading.Event()
+    stop = threading.Event()
+    if method:
+        thread = threading.Thread(target=busy_handler, args=(method, started, stop), name=name)
+    else:
+        thread = threading.Thread(target=busy_loop, args=(started, stop), name=name)
+    thread.start()
+    started.wait()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+class TestSamplingProfilerClass:
+    def test_sample_tags_stacks_with_the_active_method(self) -> None:
+        profiler = SamplingProfiler()
+
+        with busy_thread("worker", "textDocument/hover"):
+            profiler.sample()
+
+        stacks = [line for line in profiler.get_folded_stacks() if line.startswith("textDocument/hover;")]
+        assert len(stacks) == 1
+        frames, count = stacks[0].rsplit(" ", 1)
+        assert count == "1"
+        assert (
+            "busy_handler (galaxyls/tests/unit/test_profiling.py:21);busy_loop (galaxyls/tests/unit/test_profiling.py:15)"
+            in frames
+        )
+
+    def test_sample_tags_stacks_with_the_running_asynchronous_handler(self) -> None:
+        profiler = SamplingProfiler()
+        started = threading.Event()
+        stop = threading.Event()
+        thread = threading.Thread(target=run_async_handlers, args=(started, stop), name="event-loop")
+        thread.start()
+        started.wait()
+
+        profiler.sample()
+        stop.set()
+        thread.join()
+
+        stacks = [line for line in profiler.get_folded_stacks() if "busy_loop" in line]
+        assert len(stacks) == 1
+        assert stacks[0].startswith("textDocument/completion;")
+
+    def test_sample_tags_stacks_without_method_with_the_thread_name(self) -> None:
+        profiler = SamplingProfiler()
+
+        with busy_thread("galaxyls-worker"):
+            profiler.sample()
+            profiler.sample()
+
+        stacks = [line for line in profiler.get_folded_stacks() if line.startswith("[galaxyls-worker];")]
+        assert len(stacks) == 1
+        assert stacks[0].endswith(" 2")
+        assert profiler.samples == 2
+
+    def test_sample_discards_idle_threads(self) -> None:
+        profiler = SamplingProfiler()
+        stop = threading.Event()
+        thread = threading.Thread(target=stop.wait, name="idle")
+        thread.start()
+
+        profiler.sample()
+        stop.set()
+        thread.join()
+
+        assert not [line for line in profiler.get_folded_stacks() if line.startswith("[idle];")]
+
+    def test_start_samples_until_stopped_and_writes_stacks(self, tmp_path: Path) -> None:
+        profiler = SamplingProfiler(interval=0.001)
+        path = tmp_path / "profile.folded"
+
+        with busy_thread("worker", "textDocument/completion"):
+            profiler.start()
+            time.sleep(0.05)
+            profiler.stop()
+        profiler.write(path)
+
+        assert not profiler.is_running
+        assert profiler.samples > 0
+        lines = path.read_text().splitlines()
+        assert any(line.startswith("textDocument/completion;") for line in lines)
+        assert sum(int(line.rsplit(" ", 1)[1]) for line in lines) >= profiler.samples
@@ -0,0 +1,234 @@
+from pathlib import Path
+
+import pytest
+from lsprotocol.types import (
+    Position,
+    TextDocumentItem,
+)
+from pygls.workspace import Workspace
+from pytest_mock import MockerFixture
+
+from ...services.references import (
+    MacroReferencesProvider,
+    get_macro_reference_at,
+)
+from ...services.tools.workspace import (
+    StaleIndexError,
+    WorkspaceToolIndex,
+    index_file,
+)
+from ...services.xml.cache import XmlDocumentCache
+from .utils import TestUtils
+
+MACROS_SOURCE = """<macros>
+    <token name="@TOOL_VERSION@">1.0</token>
+    <xml name="inputs">
+        <param name="input" type="data"/>
+    </xml>
+</macros>
+"""
+TOOL_SOURCE = """<tool id="tool" name="Tool" version="@TOOL_VERSION@">
+    <macros>
+        <import>macros.xml</import>
+    </macros>
+    <expand macro="inputs"/>
+    <command>echo @TOOL_VERSION@</command>
+</tool>
+"""
+
+
+@pytest.fixture()
+def workspace_dir(tmp_path: Path) -> Path:
+    TestUtils.write_file(tmp_path / "macros.xml", MACROS_SOURCE)
+    TestUtils.write_file(tmp_path / "first" / "tool.xml", TOOL_SOURCE)
+    TestUtils.write_file(tmp_path / "second" / "tool.xml", TOOL_SOURCE.replace('<expand macro="inputs"/>', ""))
+    return tmp_path
+
+
+@pytest.fixture()
+def references_provider(workspace_dir: Path) -> MacroReferencesProvider:
+    workspace_index = WorkspaceToolIndex(Workspace(workspace_dir.as_uri()))
+    workspace_index.build()
+    return MacroReferencesProvider(workspace_index, XmlDocumentCache().get)
+
+
+def get_locations(
+    provider: MacroReferencesProvider, source: str, position: Position, include_declaration: bool = False
+) -> list[tuple[str, int, int]]:
+    xml_document = TestUtils.from_source_to_xml_document(source)
+    locations = provider.get_references(xml_document, position, include_declaration)
+    assert locations is not None
+    return [
+        (Path(location.uri).parent.name, location.range.start.line, location.range.start.character) for location in locations
+    ]
+
+
+class TestGetMacroReferenceAtClass:
+    @pytest.mark.parametrize(
+        "source, position, expected",
+        [
+            (TOOL_SOURCE, Position(line=5, character=20), ("token", "@TOOL_VERSION@")),
+            (TOOL_SOURCE, Position(line=0, character=47), ("token", "@TOOL_VERSION@")),
+            (TOOL_SOURCE, Position(line=4, character=20), ("macro", "inputs")),
+            (MACROS_SOURCE, Position(line=2, character=16), ("macro", "inputs")),
+            (MACROS_SOURCE, Position(line=1, character=20), ("token", "@TOOL_VERSION@")),
+            (TOOL_SOURCE, Position(line=5, character=8), None),
+        ],
+    )
+    def test_get_macro_reference_at(self, source: str, position: Position, expected: tuple[str, str] | None) -> None:
+        xml_document = TestUtils.from_source_to_xml_document(source)
+
+        assert get_macro_reference_at(xml_document, position) == expected
+
+
+class TestMacroReferencesProviderClass:
+    def test_get_references_returns_token_usages_in_workspace(self, references_provider: MacroReferencesProvider) -> None:
+        locations = get_locations(references_provider, TOOL_SOURCE, Position(line=5, character=20))
+
+        assert locations == [("first", 0, 37), ("first", 5, 18), ("second", 0, 37), ("second", 5, 18)]
+
+    def test_get_references_returns_macro_usages_and_declaration(
+        self, references_provider: MacroReferencesProvider, workspace_dir: Path
+    ) -> None:
+        locations = get_locations(references_provider, TOOL_SOURCE, Position(line=4, character=20), include_declaration=True)
+
+        assert locations == [("first", 4, 19), (workspace_dir.name, 2, 4)]
+
+    def test_get_references_returns_none_outside_macros(self, references_provider: MacroReferencesProvider) -> None:
+        xml_document = TestUtils.from_source_to_xml_document(TOOL_SOURCE)
+
+        assert references_provider.get_references(xml_document, Position(line=5, character=6), False) is None
+
+    def test_get_references_updates_changed_files(
+        self, references_provider: MacroReferencesProvider, workspace_dir: Path
+    ) -> None:
+        get_locations(references_provider, TOOL_SOURCE, Position(line=4, character=20))
+        tool_path = TestUtils.write_file(workspace_dir / "second" / "tool.xml", TOOL_SOURCE)
+
+        references_provider.workspace_index.invalidate(tool_path.as_uri())
+        locations = get_locations(references_provider, TOOL_SOURCE, Position(line=4, character=20))
+
+        assert locations == [("first", 4, 19), ("second", 4, 19)]
+
+    def test_get_references_uses_contents_of_open_documents(
+        self, references_provider: MacroReferencesProvider, workspace_dir: Path
+    ) -> None:
+        references_provider.workspace_index.workspace.put_text_document(
+            TextDocumentItem(
+                uri=(workspace_dir / "first" / "tool.xml").as_uri(),
+                language_id="xml",
+                version=1,
+                text=TOOL_SOURCE.replace("<expand", '<param name="other"/>\n    <expand'),
+            )
+        )
+
+        locations = get_locations(references_provider, TOOL_SOURCE, Position(line=4, character=20))
+
+        assert locations == [("first", 5, 19)]
+
+
+def get_edits(
+    provider: MacroReferencesProvider, source: str, position: Position, new_name: str
+) -> list[tuple[str, int, int, str]]:
+    xml_document = TestUtils.from_source_to_xml_document(source)
+    workspace_edit = provider.rename(xml_document, position, new_name)
+    assert workspace_edit and workspace_edit.changes
+    return [
+        (Path(uri).parent.name, edit.range.start.line, edit.range.start.character, edit.new_text)
+        for uri, edits in workspace_edit.changes.items()
+        for edit in edits
+    ]
+
+
+class TestMacroRenameClass:
+    def test_prepare_rename_returns_token_name_without_delimiters(self, references_provider: MacroReferencesProvider) -> None:
+        xml_document = TestUtils.from_source_to_xml_document(TOOL_SOURCE)
+
+        result = references_provider.prepare_rename(xml_document, Position(line=5, character=20))
+
+        assert result
+        assert result.placeholder == "TOOL_VERSION"
+        assert (result.range.start.character, result.range.end.character) == (19, 31)
+
+    def test_prepare_rename_returns_none_for_undeclared_macro(self, references_provider: MacroReferencesProvider) -> None:
+        xml_document = TestUtils.from_source_to_xml_document(TOOL_SOURCE.replace('macro="inputs"', 'macro="unknown"'))
+
+        assert references_provider.prepare_rename(xml_document, Position(line=4, character=20)) is None
+
+    def test_rename_token_edits_declaration_and_usages(
+        self, references_provider: MacroReferencesProvider, workspace_dir: Path
+    ) -> None:
+        edits = get_edits(references_provider, TOOL_SOURCE, Position(line=5, character=20), "@VERSION@")
+
+        assert edits == [
+            ("first", 0, 38, "VERSION"),
+            ("first", 5, 19, "VERSION"),
+            (workspace_dir.name, 1, 18, "VERSION"),
+            ("second", 0, 38, "VERSION"),
+            ("second", 5, 19, "VERSION"),
+        ]
+
+    def test_rename_macro_edits_declaration_and_usages(
+        self, references_provider: MacroReferencesProvider, workspace_dir: Path
+    ) -> None:
+        edits = get_edits(references_provider, MACROS_SOURCE, Position(line=2, character=16), "main_inputs")
+
+        assert edits == [("first", 4, 19, "main_inputs"), (workspace_dir.name, 2, 15, "main_inputs")]
+
+    def test_renamed_files_contain_new_name(self, references_provider: MacroReferencesProvider, workspace_dir: Path) -> None:
+        xml_document = TestUtils.from_source_to_xml_document(TOOL_SOURCE)
+        workspace_edit = references_provider.rename(xml_document, Position(line=4, character=20), "main_inputs")
+        assert workspace_edit and workspace_edit.changes
+        for uri, edits in workspace_edit.changes.items():
+            document = references_provider.workspace_index.workspace.get_text_document(uri)
+            lines = list(document.lines)
+            for edit in reversed(edits):
+                line = lines[edit.range.start.line]
+                lines[edit.range.start.line] = (
+                    line[: edit.range.start.character] + edit.new_text + line[edit.range.end.character :]
+                )
+            TestUtils.write_file(Path(document.path), "".join(lines))
+
+        for path in (workspace_dir / "macros.xml", workspace_dir / "first" / "tool.xml"):
+            summary = index_file(str(path))
+            assert summary
+            assert {element.name for element in summary.usages + summary.macros} >= {"main_inputs"}
+            assert "inputs" not in {element.name for element in summary.usages + summary.macros}
+
+    def test_rename_indexes_again_files_changed_on_disk(
+        self, references_provider: MacroReferencesProvider, workspace_dir: Path
+    ) -> None:
+        TestUtils.write_file(
+            workspace_dir / "first" / "tool.xml", TOOL_SOURCE.replace("<expand", '<param name="other"/>\n    <expand')
+        )
+
+        edits = get_edits(references_provider, MACROS_SOURCE, Position(line=2, character=16), "main_inputs")
+
+        assert edits == [("first", 5, 19, "main_inputs"), (workspace_dir.name, 2, 15, "main_inputs")]
+
+    def test_rename_raises_error_when_files_keep_changing(
+        self, references_provider: MacroReferencesProvider, workspace_dir: Path, mocker: MockerFixture
+    ) -> None:
+        tool_uri = (workspace_dir / "first" / "tool.xml").as_uri()
+        mocker.patch.object(references_provider.workspace_index, "find_changed", return_value=[tool_uri])
+        xml_document = TestUtils.from_source_to_xml_document(MACROS_SOURCE)
+
+        with pytest.raises(StaleIndexError):
+            references_provider.rename(xml_document, Position(line=2, character=16), "main_inputs")
+
+    @pytest.mark.parametrize(
+        "position, new_name",
+        [
+            (Position(line=5, character=20), "NEW VERSION"),
+            (Position(line=5, character=20), "@@"),
+            (Position(line=4, character=20), 'new"name'),
+            (Position(line=4, character=20), ""),
+        ],
+    )
+    def test_rename_raises_error_for_invalid_name(
+        self, references_provider: MacroReferencesProvider, position: Position, new_name: str
+    ) -> None:
+        xml_document = TestUtils.from_source_to_xml_document(TOOL_SOURCE)
+
+        with pytest.raises(ValueError):
+            references_provider.rename(xml_document, position, new_name)
@@ -0,0 +1,175 @@
+import io
+import json
+from pathlib import Path
+from typing import Any
+
+from pygls.lsp.server import LanguageServer
+
+from galaxyls.replay.player import (
+    PUBLISH_DIAGNOSTICS,
+    SessionMetrics,
+    SessionPlayer,
+    get_queueing_delays,
+)
+from galaxyls.replay.session import (
+    CLIENT,
+    PROTOCOL_ATTRIBUTES,
+    SERVER,
+    RecordedMessage,
+    SessionRecorder,
+    read_session,
+)
+from galaxyls.server import GalaxyToolsLanguageServer
+from galaxyls.stats import LatencySummary
+
+URI = "file:///tool.xml"
+
+
+class FakeWriter:
+    def __init__(self) -> None:
+        self.data: list[bytes] = []
+
+    def write(self, data: bytes) -> None:
+        self.data.append(data)
+
+    def close(self) -> None:
+        pass
+
+
+def client(time: float, message: dict[str, Any]) -> RecordedMessage:
+    return RecordedMessage(time, CLIENT, {"jsonrpc": "2.0", **message})
+
+
+def server(time: float, message: dict[str, Any]) -> RecordedMessage:
+    return RecordedMessage(time, SERVER, {"jsonrpc": "2.0", **message})
+
+
+def did_change(time: float, version: int) -> RecordedMessage:
+    params = {"textDocument": {"uri": URI, "version": version}, "contentChanges": [{"text": "<tool/>"}]}
+    return client(time, {"method": "textDocument/didChange", "params": params})
+
+
+def publish_diagnostics(time: float, version: int, diagnostics: list[Any]) -> RecordedMessage:
+    return server(
+        time, {"method": PUBLISH_DIAGNOSTICS, "params": {"uri": URI, "version": version, "diagnostics": diagnostics}}
+    )
+
+
+def create_summary(name: str, mean: float) -> LatencySummary:
+    return LatencySummary(name=name, count=1, mean=mean, p50=mean, p90=mean, p99=mean, max=mean)
+
+
+class TestSessionRecorderClass:
+    def test_recorder_writes_received_and_sent_messages(self, tmp_path: Path) -> None:
+        language_server = LanguageServer("test", "v1")
+        language_server.protocol.set_writer(FakeWriter())
+        file = io.StringIO()
+        SessionRecorder(file).attach(language_server.protocol)
+        request = {"jsonrpc": "2.0", "id": 1, "method": "shutdown"}
+
+        language_server.protocol.handle_message(
+            json.loads(json.dumps(request), object_hook=language_server.protocol.structure_message)
+        )
+        session_path = tmp_path / "session.jsonl"
+        session_path.write_text(file.getvalue())
+        session = read_session(session_path)
+
+        assert [(recorded.sender, recorded.message) for recorded in session] == [
+            (CLIENT, request),
+            (SERVER, {"jsonrpc": "2.0", "id": 1, "result": None}),
+        ]
+        assert session[0].is_request
+        assert session[1].is_response
+        assert 0 <= session[0].time <= session[1].time
+
+    def test_server_protocol_has_the_attributes_replaced_by_the_recorder(self) -> None:
+        # Most of them are private to pygls, so they may disappear in any new version
+        protocol = GalaxyToolsLanguageServer().protocol
+
+        assert [name for name in PROTOCOL_ATTRIBUTES if not hasattr(protocol, name)] == []
+
+    def test_close_stops_recording_messages(self) -> None:
+        language_server = LanguageServer("test", "v1")
+        language_server.protocol.set_writer(FakeWriter())
+        file = io.StringIO()
+        recorder = SessionRecorder(file)
+        recorder.attach(language_server.protocol)
+
+        recorder.close()
+        language_server.protocol.handle_message(
+            json.loads(
+                '{"jsonrpc": "2.0", "id": 1, "method": "shutdown"}', object_hook=language_server.protocol.structure_message
+            )
+        )
+
+        assert file.closed
+
+
+class TestSessionMetricsClass:
+    def test_from_session_returns_latencies_of_requests_and_diagnostics(self) -> None:
+        session = [
+            client(1.0, {"id": 1, "method": "textDocument/hover", "params": {}}),
+            client(1.5, {"id": 2, "method": "textDocument/hover", "params": {}}),
+            server(1.25, {"id": 1, "result": None}),
+            server(1.75, {"id": 2, "result": None}),
+            did_change(2.0, 2),
+            publish_diagnostics(2.5, 2, []),
+        ]
+
+        metrics = SessionMetrics.from_session(session)
+
+        assert [(summary.name, summary.count, summary.mean) for summary in metrics.latencies.get_summaries()] == [
+            ("textDocument/hover", 2, 250.0),
+            (PUBLISH_DIAGNOSTICS, 1, 500.0),
+        ]
+
+    def test_from_session_returns_diagnostics_churn(self) -> None:
+        error = {"message": "error"}
+        session = [
+            did_change(1.0, 2),
+            publish_diagnostics(1.1, 2, [error]),
+            did_change(1.2, 3),
+            did_change(1.3, 4),
+            publish_diagnostics(1.4, 3, [error]),
+            publish_diagnostics(1.5, 4, []),
+        ]
+
+        metrics = SessionMetrics.from_session(session)
+
+        assert (metrics.churn.publishes, metrics.churn.changed, metrics.churn.stale) == (3, 2, 1)
+
+
+class TestSessionPlayerClass:
+    def test_server_requests_are_answered_with_recorded_responses(self) -> None:
+        session = [
+            server(1.0, {"id": "a", "method": "workspace/configuration", "params": {}}),
+            client(1.1, {"id": "a", "result": [{"completion": {"mode": "auto"}}]}),
+            server(2.0, {"id": "b", "method": "workspace/configuration", "params": {}}),
+            client(2.1, {"id": "b", "result": [None]}),
+        ]
+
+        player = SessionPlayer(session)
+
+        assert list(player._client_responses["workspace/configuration"]) == [[{"completion": {"mode": "auto"}}], [None]]
+
+    def test_initialize_uses_given_workspace(self) -> None:
+        initialize: dict[str, Any] = {
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "initialize",
+            "params": {"rootUri": "file:///old", "workspaceFolders": [{"uri": "file:///old", "name": "old"}]},
+        }
+        player = SessionPlayer([], root_uri="file:///new/workspace")
+
+        message = player._prepare_message(initialize)
+
+        assert message["params"]["rootUri"] == "file:///new/workspace"
+        assert message["params"]["workspaceFolders"] == [{"uri": "file:///new/workspace", "name": "workspace"}]
+        assert initialize["params"]["rootUri"] == "file:///old"
+
+
+def test_get_queueing_delays_returns_time_outside_handlers() -> None:
+    requests = [create_summary("textDocument/hover", 12.0), create_summary(PUBLISH_DIAGNOSTICS, 500.0)]
+    server = [create_summary("textDocument/hover", 2.0), create_summary("textDocument/completion", 1.0)]
+
+    assert get_queueing_delays(requests, server) == {"textDocument/hover": 10.0}
@@ -0,0 +1,73 @@
+import asyncio
+
+from lsprotocol.types import (
+    Diagnostic,
+    Position,
+    Range,
+)
+
+from ...services.scheduler import DiagnosticsScheduler
+
+TEST_URI = "file://fake_doc.xml"
+
+
+def build_diagnostic(message: str) -> Diagnostic:
+    return Diagnostic(range=Range(start=Position(line=0, character=0), end=Position(line=0, character=0)), message=message)
+
+
+class TestDiagnosticsSchedulerClass:
+    def test_schedule_publishes_computed_diagnostics(self) -> None:
+        published: list[list[Diagnostic]] = []
+
+        async def run() -> None:
+            scheduler = DiagnosticsScheduler()
+            await scheduler.schedule(TEST_URI, lambda: [build_diagnostic("error")], published.append)
+            assert not scheduler.is_pending(TEST_URI)
+
+        asyncio.run(run())
+
+        assert len(published) == 1
+        assert published[0][0].message == "error"
+
+    def test_schedule_only_publishes_latest_run(self) -> None:
+        published: list[list[Diagnostic]] = []
+
+        async def run() -> None:
+            scheduler = DiagnosticsScheduler()
+            first = scheduler.schedule(TEST_URI, lambda: [build_diagnostic("first")], published.append, delay=0.05)
+            second = scheduler.schedule(TEST_URI, lambda: [build_diagnostic("second")], published.append, delay=0.05)
+            await asyncio.gather(first, second, return_exceptions=True)
+            assert first.cancelled()
+
+        asyncio.run(run())
+
+        assert len(published) == 1
+        assert published[0][0].message == "second"
+
+    def test_cancel_prevents_publishing(self) -> None:
+        published: list[list[Diagnostic]] = []
+
+        async def run() -> None:
+            scheduler = DiagnosticsScheduler()
+            task = scheduler.schedule(TEST_URI, lambda: [build_diagnostic("error")], published.append, delay=0.05)
+            scheduler.cancel(TEST_URI)
+            await asyncio.gather(task, return_exceptions=True)
+
+        asyncio.run(run())
+
+        assert published == []
+
+    def test_schedule_reports_errors(self) -> None:
+        errors: list[Exception] = []
+
+        def compute() -> list[Diagnostic]:
+            raise ValueError("Invalid")
+
+        async def run() -> None:
+            scheduler = DiagnosticsScheduler()
+            await scheduler.schedule(TEST_URI, compute, lambda _: None, on_error=errors.append)
+
+        asyncio.run(run())
+
+        assert len(errors) == 1
+        assert str(errors[0]) == "Invalid"
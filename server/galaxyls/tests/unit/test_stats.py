@@ -0,0 +1,104 @@
+import asyncio
+import inspect
+
+import pytest
+
+from ...stats import (
+    BUCKETS_COUNT,
+    LatencyHistogram,
+    LatencyStats,
+    get_bucket_index,
+    get_bucket_upper_bound,
+    latency_stats,
+    timed,
+)
+
+
+class TestLatencyHistogramClass:
+    def test_percentiles_are_within_bucket_error(self) -> None:
+        histogram = LatencyHistogram()
+        for index in range(1, 101):
+            histogram.add(index / 1000)
+
+        assert histogram.count == 100
+        assert histogram.percentile(50) == pytest.approx(0.05, rel=0.2)
+        assert histogram.percentile(90) == pytest.approx(0.09, rel=0.2)
+        assert histogram.percentile(99) == pytest.approx(0.099, rel=0.2)
+        assert histogram.percentile(100) == 0.1
+
+    def test_percentile_of_empty_histogram_is_zero(self) -> None:
+        assert LatencyHistogram().percentile(50) == 0.0
+
+    @pytest.mark.parametrize("duration", [0.0, 0.00001, 0.0003, 0.2, 15.0, 1e6])
+    def test_bucket_contains_duration(self, duration: float) -> None:
+        index = get_bucket_index(duration)
+
+        assert 0 <= index < BUCKETS_COUNT
+        assert duration <= get_bucket_upper_bound(index)
+        assert index == 0 or duration > get_bucket_upper_bound(index - 1)
+
+
+class TestLatencyStatsClass:
+    def test_get_summaries_returns_milliseconds_sorted_by_name(self) -> None:
+        stats = LatencyStats()
+        stats.record("parse", 0.002)
+        stats.record("lint", 0.004)
+        stats.record("lint", 0.006)
+
+        summaries = stats.get_summaries()
+
+        assert [(summary.name, summary.count) for summary in summaries] == [("lint", 2), ("parse", 1)]
+        assert summaries[0].mean == 5.0
+        assert summaries[0].max == 6.0
+        assert summaries[1].p99 == 2.0
+
+    def test_measure_records_time_spent_inside(self) -> None:
+        stats = LatencyStats()
+
+        with stats.measure("test"):
+            pass
+
+        assert [summary.name for summary in stats.get_summaries()] == ["test"]
+        assert "test" in stats.format_summaries()
+
+    def test_measure_records_time_when_raising(self) -> None:
+        stats = LatencyStats()
+
+        with pytest.raises(ValueError), stats.measure("test"):
+            raise ValueError()
+
+        assert stats.get_summaries()[0].count == 1
+
+    def test_reset_discards_recorded_durations(self) -> None:
+        stats = LatencyStats()
+        stats.record("test", 0.1)
+
+        stats.reset()
+
+        assert stats.get_summaries() == []
+
+
+class TestTimedClass:
+    def setup_method(self) -> None:
+        latency_stats.reset()
+
+    def test_timed_function_keeps_signature_and_records_calls(self) -> None:
+        def handler(value: int, other: str = "x") -> str:
+            return f"{value}{other}"
+
+        wrapper = timed("handler", handler)
+
+        assert wrapper(1, other="y") == "1y"
+        assert inspect.signature(wrapper) == inspect.signature(handler)
+        assert [(summary.name, summary.count) for summary in latency_stats.get_summaries()] == [("handler", 1)]
+
+    def test_timed_coroutine_function_stays_asynchronous(self) -> None:
+        async def handler(value: int) -> int:
+            await asyncio.sleep(0)
+            return value * 2
+
+        wrapper = timed("handler", handler)
+
+        assert inspect.iscoroutinefunction(wrapper)
+        assert asyncio.run(wrapper(2)) == 4
+        assert latency_stats.get_summaries()[0].count == 1
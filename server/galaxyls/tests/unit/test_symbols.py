@@ -1,4 +1,18 @@
-from galaxyls.services.symbols import DocumentSymbolsProvider
+from pathlib import Path
+
+import pytest
+from lsprotocol.types import (
+    Location,
+    SymbolKind,
+)
+from pygls.workspace import Workspace
+
+from galaxyls.services.symbols import (
+    DocumentSymbolsProvider,
+    WorkspaceSymbolsProvider,
+    get_match_rank,
+)
+from galaxyls.services.tools.workspace import WorkspaceToolIndex
 from galaxyls.tests.unit.utils import TestUtils
 
 FIELD_SYMBOL_KIND = 8  # SymbolKind.Field
@@ -42,3 +56,118 @@ def test_get_element_symbol_detail():
     assert len(symbols) == 1
     element_symbol = symbols[0]
     assert element_symbol.detail == "TEST"
+
+
+TOOL_SOURCE = """<tool id="bwa_mem" name="BWA" version="1.0">
+    <macros>
+        <import>macros.xml</import>
+    </macros>
+    <inputs>
+        <param name="reference" type="data"/>
+        <param argument="--min-seed-length" type="integer"/>
+    </inputs>
+    <outputs>
+        <data name="bam_output" format="bam"/>
+    </outputs>
+</tool>
+"""
+MACROS_SOURCE = '<macros><xml name="requirements"/><token name="@TOOL_VERSION@">1</token></macros>'
+
+
+@pytest.fixture()
+def workspace_dir(tmp_path: Path) -> Path:
+    TestUtils.write_file(tmp_path / "bwa" / "bwa.xml", TOOL_SOURCE)
+    TestUtils.write_file(tmp_path / "bwa" / "macros.xml", MACROS_SOURCE)
+    return tmp_path
+
+
+@pytest.fixture()
+def symbols_provider(workspace_dir: Path) -> WorkspaceSymbolsProvider:
+    workspace_index = WorkspaceToolIndex(Workspace(workspace_dir.as_uri()))
+    workspace_index.build()
+    return WorkspaceSymbolsProvider(workspace_index)
+
+
+class TestWorkspaceSymbolsProviderClass:
+    def test_get_workspace_symbols_returns_all_symbols_for_empty_query(
+        self, symbols_provider: WorkspaceSymbolsProvider
+    ) -> None:
+        symbols = symbols_provider.get_workspace_symbols("")
+
+        assert sorted((symbol.name, symbol.kind, symbol.container_name) for symbol in symbols) == [
+            ("@TOOL_VERSION@", SymbolKind.Constant, "macros.xml"),
+            ("bam_output", SymbolKind.Property, "bwa_mem"),
+            ("bwa_mem", SymbolKind.Class, "bwa.xml"),
+            ("min_seed_length", SymbolKind.Field, "bwa_mem"),
+            ("reference", SymbolKind.Field, "bwa_mem"),
+            ("requirements", SymbolKind.Function, "macros.xml"),
+        ]
+
+    def test_get_workspace_symbols_returns_symbol_location(
+        self, symbols_provider: WorkspaceSymbolsProvider, workspace_dir: Path
+    ) -> None:
+        symbols = symbols_provider.get_workspace_symbols("reference")
+
+        assert len(symbols) == 1
+        location = symbols[0].location
+        assert isinstance(location, Location)
+        assert location.uri == (workspace_dir / "bwa" / "bwa.xml").as_uri()
+        assert location.range.start.line == 5
+
+    @pytest.mark.parametrize(
+        "query, expected",
+        [
+            ("bam", ["bam_output"]),
+            ("bm", ["bwa_mem", "bam_output"]),
+            ("MEM", ["bwa_mem"]),
+            ("version", ["@TOOL_VERSION@"]),
+            ("req", ["requirements"]),
+            ("mslen", ["min_seed_length"]),
+            ("missing", []),
+        ],
+    )
+    def test_get_workspace_symbols_matches_query(
+        self, symbols_provider: WorkspaceSymbolsProvider, query: str, expected: list[str]
+    ) -> None:
+        symbols = symbols_provider.get_workspace_symbols(query)
+
+        assert [symbol.name for symbol in symbols] == expected
+
+    def test_get_workspace_symbols_limits_results(self, symbols_provider: WorkspaceSymbolsProvider) -> None:
+        assert len(symbols_provider.get_workspace_symbols("", limit=2)) == 2
+
+    def test_get_workspace_symbols_updates_changed_files(
+        self, symbols_provider: WorkspaceSymbolsProvider, workspace_dir: Path
+    ) -> None:
+        symbols_provider.get_workspace_symbols("")
+        tool_path = TestUtils.write_file(workspace_dir / "bwa" / "bwa.xml", TOOL_SOURCE.replace("reference", "genome"))
+
+        symbols_provider.workspace_index.invalidate(tool_path.as_uri())
+
+        assert symbols_provider.get_workspace_symbols("reference") == []
+        assert [symbol.name for symbol in symbols_provider.get_workspace_symbols("genome")] == ["genome"]
+
+    def test_get_workspace_symbols_removes_deleted_files(
+        self, symbols_provider: WorkspaceSymbolsProvider, workspace_dir: Path
+    ) -> None:
+        symbols_provider.get_workspace_symbols("")
+        macros_path = workspace_dir / "bwa" / "macros.xml"
+        macros_path.unlink()
+
+        symbols_provider.workspace_index.invalidate(macros_path.as_uri())
+
+        assert symbols_provider.get_workspace_symbols("requirements") == []
+
+
+@pytest.mark.parametrize(
+    "query, name, expected",
+    [
+        ("input", "input", 0),
+        ("in", "input_file", 1),
+        ("file", "input_file", 2),
+        ("ifl", "input_file", 3),
+        ("fi_in", "input_file", None),
+    ],
+)
+def test_get_match_rank(query: str, name: str, expected: int | None) -> None:
+    assert get_match_rank(query, name) == expected
@@ -4,6 +4,7 @@ from lsprotocol.types import (
     Range,
 )
 
+from galaxyls.services.tools.constants import BOOLEAN_OPTIONS
 from galaxyls.services.tools.document import GalaxyToolXmlDocument
 from galaxyls.services.tools.generators.command import GalaxyToolCommandSnippetGenerator
 from galaxyls.services.tools.generators.tests import GalaxyToolTestSnippetGenerator, GalaxyToolTestUpdater
@@ -52,6 +53,15 @@ class TestGalaxyToolXmlDocumentClass:
         assert actual
         assert actual.name == "tests"
 
+    def test_find_element_ignores_elements_below_max_level(self) -> None:
+        document = TestUtils.to_document("<tool><section><tests/></section><other><tests/></other></tool>")
+        tool = GalaxyToolXmlDocument(document)
+
+        assert tool.find_element("tests") is None
+        actual = tool.find_element("tests", maxlevel=4)
+        assert actual
+        assert actual.start == 15
+
     def test_get_element_content_range_of_unknown_element_returns_none(self) -> None:
         document = TestUtils.to_document("<tool><tests></tests></tool>")
         tool = GalaxyToolXmlDocument(document)
@@ -233,6 +243,23 @@ class TestGalaxyToolTestSnippetGeneratorClass:
 
         assert "<tests>" not in result.snippet
 
+    def test_build_snippet_lists_the_default_option_of_every_boolean_first(self) -> None:
+        document = TestUtils.to_document(
+            """<tool><inputs>
+            <param name="a" type="boolean" checked="false"/>
+            <param name="b" type="boolean" checked="true"/>
+            </inputs></tool>"""
+        )
+        tool = GalaxyToolXmlDocument(document)
+        generator = GalaxyToolTestSnippetGenerator(tool)
+        boolean_options = list(BOOLEAN_OPTIONS)
+
+        actual_snippet, _ = generator._build_snippet()
+
+        assert '<param name="a" value="${2|false,true,True,False,yes,no,1,0|}"/>' in actual_snippet
+        assert '<param name="b" value="${3|true,false,True,False,yes,no,1,0|}"/>' in actual_snippet
+        assert BOOLEAN_OPTIONS == boolean_options
+
 
 class TestGalaxyToolCommandSnippetGeneratorClass:
     @pytest.mark.parametrize(
@@ -1,9 +1,13 @@
 import pytest
 from lxml import etree
+from pytest_mock import MockerFixture
 
 from galaxyls.services.validation import DocumentValidator
 
+from ...services.tools.linting import GalaxyToolLinter
+from ...services.xml import document as document_module
 from ...services.xsd.constants import TOOL_XSD_FILE
+from ...services.xsd.validation import GalaxyToolSchemaValidationService
 from .utils import TestUtils
 
 
@@ -98,3 +102,47 @@ class TestDocumentValidatorClass:
         actual = validator.get_document_root_tag(document)
 
         assert actual == expected
+
+
+class TestGalaxyToolSchemaValidationServiceClass:
+    UNSAVED_TOOL_URI = "file:///not/saved/tool.xml"
+
+    def test_validate_document_reports_syntax_error_in_unsaved_document(self, xsd_schema: etree.XMLSchema) -> None:
+        xml_document = TestUtils.from_source_to_xml_document('<tool id="test">\n<description>', uri=self.UNSAVED_TOOL_URI)
+        service = GalaxyToolSchemaValidationService(xsd_schema)
+
+        diagnostics = service.validate_document(xml_document)
+
+        assert len(diagnostics) == 1
+        assert diagnostics[0].range.start.line == 1
+
+    def test_validate_document_reports_schema_errors_in_unsaved_document(self, xsd_schema: etree.XMLSchema) -> None:
+        xml_document = TestUtils.from_source_to_xml_document('<tool id="test">\n<unknown/></tool>', uri=self.UNSAVED_TOOL_URI)
+        service = GalaxyToolSchemaValidationService(xsd_schema)
+
+        diagnostics = service.validate_document(xml_document)
+
+        unknown_element_errors = [diagnostic for diagnostic in diagnostics if "unknown" in diagnostic.message]
+        assert len(unknown_element_errors) == 1
+        assert unknown_element_errors[0].range.start.line == 1
+
+    @pytest.mark.parametrize(
+        "source",
+        [
+            '<tool id="test" name="test" version="1"><command>x</command><inputs/><outputs/><help>h</help></tool>',
+            (
+                '<tool id="test" name="test" version="1"><macros><xml name="inputs"><inputs/></xml></macros>'
+                '<command>x</command><expand macro="inputs"/><outputs/><help>h</help></tool>'
+            ),
+        ],
+    )
+    def test_validation_and_linting_parse_document_once(
+        self, xsd_schema: etree.XMLSchema, source: str, mocker: MockerFixture
+    ) -> None:
+        xml_document = TestUtils.from_source_to_xml_document(source, uri=self.UNSAVED_TOOL_URI)
+        parse = mocker.spy(document_module, "parse_xml_source")
+
+        GalaxyToolSchemaValidationService(xsd_schema).validate_document(xml_document)
+        GalaxyToolLinter().lint_document(xml_document)
+
+        assert parse.call_count == 1
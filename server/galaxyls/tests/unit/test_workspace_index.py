@@ -0,0 +1,307 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from lsprotocol.types import TextDocumentItem
+from pygls.workspace import Workspace
+from pytest_mock import MockerFixture
+
+from ...services.tools import workspace as workspace_module
+from ...services.tools.testing import ToolTestsDiscoveryService
+from ...services.tools.workspace import (
+    INDEX_FILE_PREFIX,
+    WorkspaceToolIndex,
+    deserialize_summary,
+    index_file,
+    prune_stored_indexes,
+    serialize_summary,
+)
+from ...services.xml.types import DocumentType
+from .utils import TestUtils
+
+TOOL_SOURCE = """<tool id="test_tool" name="Test" version="1.0">
+    <macros>
+        <import>macros.xml</import>
+        <token name="@SUFFIX@">x</token>
+    </macros>
+    <inputs>
+        <param name="input" type="data"/>
+        <section name="advanced">
+            <param argument="--min-length" type="integer"/>
+        </section>
+    </inputs>
+    <outputs>
+        <data name="output" format="txt"/>
+    </outputs>
+    <tests>
+        <test/>
+        <test>
+        </test>
+    </tests>
+</tool>
+"""
+MACROS_SOURCE = '<macros><xml name="requirements"/><token name="@VERSION@">1</token></macros>'
+SERVER_LAUNCHER_SOURCE = """import sys
+
+from galaxyls.__main__ import main
+from galaxyls.services.tools.workspace import create_indexing_executor
+
+
+def get_loaded_modules(_):
+    return sorted(name for name in sys.modules if name.startswith("galaxyls."))
+
+
+if __name__ == "__main__":
+    with create_indexing_executor(1) as executor:
+        print("\\n".join(next(executor.map(get_loaded_modules, [None]))))
+"""
+
+
+@pytest.fixture()
+def workspace_dir(tmp_path: Path) -> Path:
+    root = tmp_path / "workspace"
+    TestUtils.write_file(root / "tool" / "tool.xml", TOOL_SOURCE)
+    TestUtils.write_file(root / "tool" / "macros.xml", MACROS_SOURCE)
+    TestUtils.write_file(root / "tool" / "test-data" / "data.xml", "<data/>")
+    TestUtils.write_file(root / ".hidden" / "tool.xml", TOOL_SOURCE)
+    return root
+
+
+@pytest.fixture()
+def workspace_index(workspace_dir: Path, tmp_path: Path) -> WorkspaceToolIndex:
+    return WorkspaceToolIndex(Workspace(workspace_dir.as_uri()), storage_dir=tmp_path / "cache")
+
+
+class TestIndexFileClass:
+    def test_index_file_returns_tool_summary(self, workspace_dir: Path) -> None:
+        summary = index_file(str(workspace_dir / "tool" / "tool.xml"))
+
+        assert summary
+        assert summary.document_type == DocumentType.TOOL
+        assert summary.tool_id == "test_tool"
+        assert summary.tool_version == "1.0"
+        assert summary.tool_range and summary.tool_range.start.line == 0
+        assert summary.tests_range
+        assert [range.start.line for range in summary.tests] == [15, 16]
+        assert [(element.name, element.tag) for element in summary.inputs] == [("input", "param"), ("min_length", "param")]
+        assert [(element.name, element.tag) for element in summary.outputs] == [("output", "data")]
+        assert [(element.name, element.tag) for element in summary.macros] == [("@SUFFIX@", "token")]
+        assert summary.imports == ["macros.xml"]
+        assert summary.usages == []
+
+    def test_index_file_returns_macro_usages(self, tmp_path: Path) -> None:
+        source = (
+            '<tool><macros><token name="@A@">@B@</token></macros>\n<expand macro="inputs"/><command>@A@ x@y</command></tool>'
+        )
+        path = TestUtils.write_file(tmp_path / "tool.xml", source)
+
+        summary = index_file(str(path))
+
+        assert summary
+        assert [
+            (element.name, element.tag, element.range.start.line, element.range.start.character) for element in summary.usages
+        ] == [
+            ("@B@", "token", 0, 32),
+            ("inputs", "expand", 1, 15),
+            ("@A@", "token", 1, 33),
+        ]
+
+    def test_index_file_returns_macros_summary(self, workspace_dir: Path) -> None:
+        summary = index_file(str(workspace_dir / "tool" / "macros.xml"))
+
+        assert summary
+        assert summary.document_type == DocumentType.MACROS
+        assert [(element.name, element.tag) for element in summary.macros] == [
+            ("requirements", "xml"),
+            ("@VERSION@", "token"),
+        ]
+
+    def test_index_file_ignores_other_xml_files(self, workspace_dir: Path) -> None:
+        assert index_file(str(workspace_dir / "tool" / "test-data" / "data.xml")) is None
+
+    def test_deserialize_returns_same_summary(self, workspace_dir: Path) -> None:
+        summary = index_file(str(workspace_dir / "tool" / "tool.xml"))
+        assert summary
+
+        assert deserialize_summary(serialize_summary(summary)) == summary
+
+
+class TestWorkspaceToolIndexClass:
+    def test_build_indexes_tools_and_macros_in_workspace(
+        self, workspace_index: WorkspaceToolIndex, workspace_dir: Path
+    ) -> None:
+        workspace_index.build()
+
+        assert workspace_index.is_ready
+        assert [summary.uri for summary in workspace_index.get_summaries()] == [
+            (workspace_dir / "tool" / "macros.xml").as_uri(),
+            (workspace_dir / "tool" / "tool.xml").as_uri(),
+        ]
+        assert [summary.tool_id for summary in workspace_index.get_tool_summaries()] == ["test_tool"]
+
+    def test_build_reuses_stored_summaries_of_unmodified_files(
+        self, workspace_index: WorkspaceToolIndex, workspace_dir: Path, mocker: MockerFixture
+    ) -> None:
+        workspace_index.build()
+        TestUtils.write_file(workspace_dir / "tool" / "macros.xml", MACROS_SOURCE.replace("requirements", "citations"))
+        index_file = mocker.spy(workspace_module, "index_file")
+
+        other = WorkspaceToolIndex(workspace_index.workspace, storage_dir=workspace_index.storage_dir)
+        other.build()
+
+        assert other.get_summaries()[1] == workspace_index.get_summaries()[1]
+        assert [call.args[0] for call in index_file.call_args_list] == [str(workspace_dir / "tool" / "macros.xml")]
+        assert other.get_summaries()[0].macros[0].name == "citations"
+
+    def test_invalidated_file_is_indexed_again_when_modified(
+        self, workspace_index: WorkspaceToolIndex, workspace_dir: Path
+    ) -> None:
+        workspace_index.build()
+        tool_path = TestUtils.write_file(workspace_dir / "tool" / "tool.xml", TOOL_SOURCE.replace("test_tool", "other_tool"))
+
+        workspace_index.invalidate(tool_path.as_uri())
+        summary = workspace_index.get(tool_path.as_uri())
+
+        assert summary
+        assert summary.tool_id == "other_tool"
+
+    def test_invalidated_file_is_removed_when_deleted(self, workspace_index: WorkspaceToolIndex, workspace_dir: Path) -> None:
+        workspace_index.build()
+        tool_path = workspace_dir / "tool" / "tool.xml"
+        tool_path.unlink()
+
+        workspace_index.invalidate(tool_path.as_uri())
+
+        assert workspace_index.get(tool_path.as_uri()) is None
+        assert tool_path.as_uri() not in workspace_index
+
+    def test_created_file_is_indexed_when_invalidated(self, workspace_index: WorkspaceToolIndex, workspace_dir: Path) -> None:
+        workspace_index.build()
+        new_tool = TestUtils.write_file(workspace_dir / "new" / "new.xml", TOOL_SOURCE.replace("test_tool", "new_tool"))
+
+        workspace_index.invalidate(new_tool.as_uri())
+
+        assert [summary.tool_id for summary in workspace_index.get_tool_summaries()] == ["new_tool", "test_tool"]
+
+    def test_changed_files_are_found_without_being_invalidated(
+        self, workspace_index: WorkspaceToolIndex, workspace_dir: Path
+    ) -> None:
+        workspace_index.build()
+        tool_path = TestUtils.write_file(workspace_dir / "tool" / "tool.xml", TOOL_SOURCE.replace("test_tool", "changed_tool"))
+        data_path = workspace_dir / "tool" / "test-data" / "data.xml"
+        data_path.unlink()
+
+        changed = workspace_index.find_changed()
+        workspace_index.invalidate_changed()
+
+        assert sorted(changed) == [data_path.as_uri(), tool_path.as_uri()]
+        assert [summary.tool_id for summary in workspace_index.get_tool_summaries()] == ["changed_tool"]
+        assert workspace_index.find_changed() == []
+
+    def test_find_changed_only_checks_given_files(self, workspace_index: WorkspaceToolIndex, workspace_dir: Path) -> None:
+        workspace_index.build()
+        tool_path = TestUtils.write_file(workspace_dir / "tool" / "tool.xml", TOOL_SOURCE.replace("test_tool", "changed_tool"))
+        macros_uri = (workspace_dir / "tool" / "macros.xml").as_uri()
+
+        assert workspace_index.find_changed([macros_uri, "file:///unknown.xml"]) == []
+        assert workspace_index.find_changed([macros_uri, tool_path.as_uri()]) == [tool_path.as_uri()]
+
+    def test_refreshed_index_is_stored_once_after_delay(
+        self, workspace_index: WorkspaceToolIndex, workspace_dir: Path, mocker: MockerFixture
+    ) -> None:
+        workspace_index.build()
+        save = mocker.patch.object(workspace_index, "_save")
+        workspace_index.save_delay = 60
+        for name in ["first", "second"]:
+            tool_path = TestUtils.write_file(workspace_dir / name / "tool.xml", TOOL_SOURCE.replace("test_tool", name))
+            workspace_index.invalidate(tool_path.as_uri())
+            workspace_index.refresh()
+
+        timer = workspace_index._save_timer
+        assert timer is not None
+        assert save.call_count == 0
+        timer.cancel()
+        timer.function()
+
+        assert save.call_count == 1
+        assert workspace_index._save_timer is None
+
+    def test_build_in_worker_processes_returns_same_summaries(
+        self, workspace_index: WorkspaceToolIndex, workspace_dir: Path, tmp_path: Path
+    ) -> None:
+        workspace_index.build()
+        parallel_index = WorkspaceToolIndex(workspace_index.workspace, storage_dir=tmp_path / "other", max_workers=2)
+        parallel_index.parallel_threshold = 0
+        progress: list[tuple[int, int]] = []
+
+        parallel_index.build(lambda done, total: progress.append((done, total)))
+
+        assert parallel_index.get_summaries() == workspace_index.get_summaries()
+        assert progress == [(1, 3), (2, 3), (3, 3)]
+
+    def test_worker_processes_do_not_import_the_server(self, tmp_path: Path) -> None:
+        # The worker processes import the script that started the server again
+        launcher = tmp_path / "galaxyls_launcher.py"
+        launcher.write_text(SERVER_LAUNCHER_SOURCE)
+        server_dir = Path(workspace_module.__file__).parents[3]
+
+        result = subprocess.run(
+            [sys.executable, str(launcher)],
+            capture_output=True,
+            check=True,
+            env={**os.environ, "PYTHONPATH": str(server_dir)},
+            text=True,
+        )
+
+        modules = result.stdout.split()
+        assert "galaxyls.services.tools.workspace" in modules
+        assert "galaxyls.server" not in modules
+        assert "galaxyls.services.language" not in modules
+
+    def test_build_falls_back_to_current_thread_when_worker_processes_fail(
+        self, workspace_index: WorkspaceToolIndex, mocker: MockerFixture
+    ) -> None:
+        mocker.patch.object(workspace_module, "create_indexing_executor", side_effect=OSError)
+        workspace_index.max_workers = 2
+        workspace_index.parallel_threshold = 0
+
+        workspace_index.build()
+
+        assert [summary.tool_id for summary in workspace_index.get_tool_summaries()] == ["test_tool"]
+
+
+class TestToolTestsDiscoveryServiceWithIndexClass:
+    def test_discover_tests_in_workspace_uses_open_documents_and_index(
+        self, workspace_index: WorkspaceToolIndex, workspace_dir: Path
+    ) -> None:
+        workspace_index.build()
+        other_tool = TestUtils.write_file(
+            workspace_dir / "other" / "other.xml", TOOL_SOURCE.replace("test_tool", "other_tool")
+        )
+        workspace_index.invalidate(other_tool.as_uri())
+        workspace = workspace_index.workspace
+        workspace.put_text_document(
+            TextDocumentItem(
+                uri=other_tool.as_uri(),
+                language_id="xml",
+                version=1,
+                text=TOOL_SOURCE.replace("test_tool", "open_tool").replace("<test/>", ""),
+            )
+        )
+        service = ToolTestsDiscoveryService(workspace_index)
+
+        suites = service.discover_tests_in_workspace(workspace)
+
+        assert [(suite.id, len(suite.children or [])) for suite in suites] == [("open_tool", 1), ("test_tool", 2)]
+
+
+def test_prune_stored_indexes_deletes_least_recently_stored_indexes(tmp_path: Path) -> None:
+    paths = [TestUtils.write_file(tmp_path / f"{INDEX_FILE_PREFIX}{key}.json", "{}") for key in "abc"]
+    other = TestUtils.write_file(tmp_path / "xsd-tree.json", "{}")
+    os.utime(paths[1], ns=(0, 0))
+
+    prune_stored_indexes(tmp_path, max_indexes=2)
+
+    assert sorted(tmp_path.iterdir()) == sorted([paths[0], paths[2], other])
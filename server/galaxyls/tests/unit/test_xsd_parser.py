@@ -113,6 +113,53 @@ class TestXsdParserClass:
         assert node
         assert node.name == expected
 
+    @pytest.mark.parametrize(
+        "stack",
+        [
+            ["unknown"],
+            ["testElement", "unknown"],
+            ["testElement", "firstElement", "group_elem1"],
+        ],
+    )
+    def test_tree_find_node_by_stack_returns_none_when_not_found(
+        self, xsd_parser: GalaxyToolXsdParser, stack: list[str]
+    ) -> None:
+        tree = xsd_parser.get_tree()
+
+        node = tree.find_node_by_stack(stack)
+
+        assert node is None
+
+    def test_tree_find_node_by_stack_relative_to_root_returns_expected_node(self, xsd_parser: GalaxyToolXsdParser) -> None:
+        tree = xsd_parser.get_tree()
+
+        node = tree.find_node_by_stack(["thirdElement", "childElement"])
+
+        assert node is tree.root.children[2].children[0]
+
+    @pytest.mark.parametrize(
+        "name, expected_parent",
+        [
+            ("group_elem1", "secondElement"),
+            ("childElement", "thirdElement"),
+            ("unknown", None),
+        ],
+    )
+    def test_tree_find_node_by_name_returns_first_matching_node(
+        self, xsd_parser: GalaxyToolXsdParser, name: str, expected_parent: str | None
+    ) -> None:
+        tree = xsd_parser.get_tree()
+
+        node = tree.find_node_by_name(name)
+
+        if expected_parent is None:
+            assert node is None
+        else:
+            assert node
+            assert node.name == name
+            assert node.parent
+            assert node.parent.name == expected_parent
+
     def test_get_documentation_returns_valid_when_exists(self, xsd_parser: GalaxyToolXsdParser) -> None:
         tree = xsd_parser.get_tree()
 
@@ -134,6 +181,12 @@ class TestXsdParserClass:
 
         assert doc.value == MSG_NO_DOCUMENTATION_AVAILABLE
 
+    def test_get_documentation_is_rendered_once(self, xsd_parser: GalaxyToolXsdParser) -> None:
+        tree = xsd_parser.get_tree()
+
+        assert tree.root.get_doc() is tree.root.get_doc()
+        assert tree.root.get_doc("es") is not tree.root.get_doc()
+
     def test_parser_returns_expected_enumeration_restrictions(self, xsd_parser: GalaxyToolXsdParser) -> None:
         tree = xsd_parser.get_tree()
 
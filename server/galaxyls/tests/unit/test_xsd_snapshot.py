@@ -0,0 +1,104 @@
+import json
+from pathlib import Path
+
+import pytest
+from anytree import PreOrderIter  # type: ignore
+from lxml import etree
+from pytest_mock import MockerFixture
+
+from ...services.language import GalaxyToolLanguageService
+from ...services.xsd.parser import GalaxyToolXsdParser
+from ...services.xsd.service import GalaxyToolXsdService
+from ...services.xsd.snapshot import (
+    XsdTreeSnapshotStore,
+    deserialize_tree,
+    serialize_tree,
+)
+from ...services.xsd.types import XsdTree
+from .sample_data import TEST_XSD
+
+
+@pytest.fixture()
+def xsd_tree() -> XsdTree:
+    return GalaxyToolXsdParser(etree.fromstring(TEST_XSD)).get_tree()
+
+
+def get_tree_summary(tree: XsdTree) -> list:
+    return [
+        (
+            [ancestor.name for ancestor in node.path],
+            node.min_occurs,
+            node.max_occurs,
+            node.get_all_docs(),
+            [
+                (attribute.name, attribute.type_name, attribute.is_required, attribute.enumeration, attribute.get_all_docs())
+                for attribute in node.attributes.values()
+            ],
+        )
+        for node in PreOrderIter(tree.root)
+    ]
+
+
+class TestXsdTreeSnapshotClass:
+    def test_deserialize_returns_same_tree(self, xsd_tree: XsdTree) -> None:
+        data = json.loads(json.dumps(serialize_tree(xsd_tree)))
+
+        restored = deserialize_tree(data)
+
+        assert get_tree_summary(restored) == get_tree_summary(xsd_tree)
+        assert restored.root.get_doc("es").value == xsd_tree.root.get_doc("es").value
+        assert restored.find_node_by_stack(["testElement", "secondElement", "group_elem1"])
+
+    def test_store_load_returns_saved_tree(self, xsd_tree: XsdTree, tmp_path: Path) -> None:
+        store = XsdTreeSnapshotStore(tmp_path)
+
+        store.save("key", xsd_tree)
+        restored = store.load("key")
+
+        assert restored
+        assert get_tree_summary(restored) == get_tree_summary(xsd_tree)
+
+    def test_store_save_removes_stale_snapshots(self, xsd_tree: XsdTree, tmp_path: Path) -> None:
+        store = XsdTreeSnapshotStore(tmp_path)
+        store.save("old", xsd_tree)
+
+        store.save("new", xsd_tree)
+
+        assert store.load("old") is None
+        assert store.load("new")
+
+    def test_store_load_ignores_invalid_snapshot(self, tmp_path: Path) -> None:
+        store = XsdTreeSnapshotStore(tmp_path)
+        store.get_path("key").write_text('{"key": "key", "format": 1}')
+
+        assert store.load("key") is None
+
+
+class TestGalaxyToolXsdServiceSnapshotClass:
+    def test_service_loads_tree_from_snapshot_on_next_start(self, tmp_path: Path, mocker: MockerFixture) -> None:
+        first = GalaxyToolXsdService(snapshot_dir=tmp_path)
+        get_tree = mocker.spy(GalaxyToolXsdParser, "get_tree")
+
+        second = GalaxyToolXsdService(snapshot_dir=tmp_path)
+
+        get_tree.assert_not_called()
+        assert get_tree_summary(second.xsd_tree) == get_tree_summary(first.xsd_tree)
+
+    def test_service_defers_schema_compilation_until_needed(self, tmp_path: Path) -> None:
+        service = GalaxyToolXsdService(snapshot_dir=tmp_path)
+        assert service._xsd_schema is None
+
+        service.xsd_schema
+
+        assert service._xsd_schema is not None
+
+    def test_language_service_only_persists_tree_in_storage_dir(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        cache_dir = tmp_path / "cache"
+        storage_dir = tmp_path / "storage"
+        monkeypatch.setenv("GALAXYLS_CACHE_DIR", str(cache_dir))
+
+        GalaxyToolLanguageService()
+        GalaxyToolLanguageService(storage_dir=storage_dir)
+
+        assert not cache_dir.exists()
+        assert [path.name.startswith("xsd-tree-") for path in storage_dir.iterdir()] == [True]
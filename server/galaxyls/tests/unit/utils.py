@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 from lsprotocol.types import Position
@@ -105,3 +106,23 @@ class TestUtils:
         """
         path = Path(__file__).parent.parent / "files" / filename
         return path.read_text()
+
+    @staticmethod
+    def write_file(path: Path, source: str) -> Path:
+        """Writes the source to the given file, creating its directory if needed.
+
+        The modification time is moved one second forward, so the change is detected even
+        on file systems with a coarse timestamp resolution.
+
+        Args:
+            path (Path): The path of the file.
+            source (str): The new text contents of the file.
+
+        Returns:
+            Path: The path of the file.
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(source)
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        return path
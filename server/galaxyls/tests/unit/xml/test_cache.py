@@ -0,0 +1,126 @@
+from anytree import PreOrderIter  # type: ignore
+from lsprotocol.types import (
+    Position,
+    Range,
+    TextDocumentContentChangePartial,
+)
+from pygls.workspace import TextDocument
+
+from ....memory import (
+    CacheRegistry,
+    estimate_document_size,
+)
+from ....services.xml.cache import XmlDocumentCache
+from ..utils import TestUtils
+
+
+def change(start: tuple[int, int], end: tuple[int, int], text: str) -> TextDocumentContentChangePartial:
+    return TextDocumentContentChangePartial(
+        range=Range(start=Position(line=start[0], character=start[1]), end=Position(line=end[0], character=end[1])),
+        text=text,
+    )
+
+
+def update(
+    cache: XmlDocumentCache, document: TextDocument, content_change: TextDocumentContentChangePartial, version: int
+) -> None:
+    document.apply_change(content_change)
+    document.version = version
+    cache.update(document, [content_change])
+
+
+class TestXmlDocumentCacheClass:
+    def test_get_returns_same_document_for_same_version(self) -> None:
+        cache = XmlDocumentCache()
+        document = TestUtils.to_document("<tool></tool>", version=1)
+
+        first = cache.get(document)
+        second = cache.get(document)
+
+        assert first is second
+        assert cache.hits == 1
+        assert cache.misses == 1
+
+    def test_get_parses_again_when_version_changes(self) -> None:
+        cache = XmlDocumentCache()
+        document = TestUtils.to_document("<tool></tool>", version=1)
+        first = cache.get(document)
+
+        document.version = 2
+        second = cache.get(document)
+
+        assert first is not second
+        assert second.version == 2
+        assert cache.misses == 2
+        assert len(cache) == 1
+
+    def test_get_snapshot_is_not_modified_by_following_changes(self) -> None:
+        cache = XmlDocumentCache()
+        document = TestUtils.to_document("<tool>\n<inputs></inputs>\n</tool>", version=1)
+        snapshot = cache.get_snapshot(document)
+        snapshot_root = snapshot.root
+        snapshot_nodes = [(node, node.start, node.end) for node in PreOrderIter(snapshot)]
+
+        update(cache, document, change((1, 8), (1, 8), "<param/>"), version=2)
+        updated_root = cache.get(document).root
+        update(cache, document, change((1, 0), (1, 0), "<!-- a -->"), version=3)
+
+        assert [(node, node.start, node.end) for node in PreOrderIter(snapshot)] == snapshot_nodes
+        assert snapshot.root is snapshot_root
+        assert updated_root is not snapshot_root
+        assert cache.get(document).root is updated_root
+        element = cache.get(document).find_element_at(document.source.index("<param") + 1)
+        assert element is not None
+        assert element.name == "param"
+
+    def test_get_never_caches_documents_without_version(self) -> None:
+        cache = XmlDocumentCache()
+        document = TextDocument("file://fake_doc.xml", "<tool></tool>")
+
+        cache.get(document)
+        cache.get(document)
+
+        assert cache.misses == 2
+        assert len(cache) == 0
+
+    def test_evict_removes_document(self) -> None:
+        cache = XmlDocumentCache()
+        document = TestUtils.to_document("<tool></tool>", version=1)
+        cache.get(document)
+
+        cache.evict(document.uri)
+
+        assert document.uri not in cache
+
+    def test_least_recently_used_document_is_discarded_when_full(self) -> None:
+        cache = XmlDocumentCache(max_size=2)
+        doc_a = TestUtils.to_document("<tool></tool>", uri="file://a.xml", version=1)
+        doc_b = TestUtils.to_document("<tool></tool>", uri="file://b.xml", version=1)
+        doc_c = TestUtils.to_document("<tool></tool>", uri="file://c.xml", version=1)
+        cache.get(doc_a)
+        cache.get(doc_b)
+        cache.get(doc_a)
+
+        cache.get(doc_c)
+
+        assert doc_a.uri in cache
+        assert doc_b.uri not in cache
+        assert doc_c.uri in cache
+
+    def test_least_recently_used_document_is_discarded_over_memory_budget(self) -> None:
+        source = "<tool><inputs/></tool>"
+        registry = CacheRegistry(budget=2 * estimate_document_size(source))
+        cache = XmlDocumentCache(registry=registry)
+        doc_a = TestUtils.to_document(source, uri="file://a.xml", version=1)
+        doc_b = TestUtils.to_document(source, uri="file://b.xml", version=1)
+        doc_c = TestUtils.to_document(source, uri="file://c.xml", version=1)
+        cache.get(doc_a)
+        cache.get(doc_b)
+        cache.get(doc_a)
+
+        cache.get(doc_c)
+
+        assert doc_a.uri in cache
+        assert doc_b.uri not in cache
+        assert doc_c.uri in cache
+        assert registry.get_usage().caches[0].evictions == 1
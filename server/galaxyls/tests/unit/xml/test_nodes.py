@@ -0,0 +1,160 @@
+import pytest
+
+from ....services.xml.nodes import (
+    XmlAttribute,
+    XmlAttributeValue,
+    XmlContent,
+    XmlElement,
+)
+from ..utils import TestUtils
+
+
+def create_element(name: str, parent: XmlElement | None = None) -> XmlElement:
+    element = XmlElement()
+    element.name = name
+    element.parent = parent
+    return element
+
+
+class TestXmlSyntaxNodeClass:
+    def test_nodes_do_not_have_instance_dict(self) -> None:
+        element = XmlElement()
+        attribute = XmlAttribute("name", 0, 4, element)
+        attribute.set_value('"value"', 5, 12)
+
+        for node in (element, attribute, attribute.key, attribute.value, XmlContent(0, 1)):
+            assert not hasattr(node, "__dict__")
+
+    def test_setting_parent_appends_child(self) -> None:
+        root = create_element("root")
+        first = create_element("first", root)
+        second = create_element("second", root)
+
+        assert root.children == [first, second]
+        assert first.parent is root
+        assert second.parent is root
+
+    def test_setting_new_parent_moves_child(self) -> None:
+        root = create_element("root")
+        first = create_element("first", root)
+        child = create_element("child", root)
+
+        child.parent = first
+
+        assert root.children == [first]
+        assert first.children == [child]
+
+    def test_setting_children_replaces_previous_children(self) -> None:
+        root = create_element("root")
+        old = create_element("old", root)
+        other = create_element("other")
+        new = create_element("new", other)
+
+        root.children = [new]
+
+        assert root.children == [new]
+        assert new.parent is root
+        assert old.parent is None
+        assert len(other.children) == 0
+
+    def test_ancestors_returns_nodes_from_root_to_parent(self) -> None:
+        xml_document = TestUtils.from_source_to_xml_document('<tool><inputs><param name="test"/></inputs></tool>')
+        assert xml_document.root
+        param = xml_document.root.elements[0].elements[0]
+
+        ancestors = param.ancestors
+
+        assert ancestors == (xml_document, xml_document.root, xml_document.root.elements[0])
+        assert param.stack == ["tool", "inputs", "param"]
+
+    @pytest.mark.parametrize("value", [None, '"value"'])
+    def test_attribute_children_are_key_and_value(self, value: str | None) -> None:
+        element = XmlElement()
+        attribute = XmlAttribute("name", 0, 4, element)
+        if value:
+            attribute.set_value(value, 5, 12)
+
+        expected = (attribute.key,) if value is None else (attribute.key, attribute.value)
+        assert attribute.children == expected
+        assert element.children == [attribute]
+        assert all(child.parent is attribute for child in attribute.children)
+        assert attribute.key.owner is attribute
+
+
+class TestXmlSyntaxNodePathClass:
+    def test_parse_shares_path_between_elements_with_same_path(self) -> None:
+        xml_document = TestUtils.from_source_to_xml_document('<tool><inputs><param name="a"/><param/></inputs></tool>')
+        assert xml_document.root
+        first, second = xml_document.root.elements[0].elements
+
+        assert first.path == ("tool", "inputs", "param")
+        assert first.path is second.path
+        assert first.attributes["name"].key.path is first.path
+
+    def test_path_changes_when_element_is_moved(self) -> None:
+        root = create_element("root")
+        first = create_element("first", root)
+        child = create_element("child", root)
+        grandchild = create_element("grandchild", child)
+        assert grandchild.path == ("root", "child", "grandchild")
+
+        child.parent = first
+
+        assert grandchild.path == ("root", "first", "child", "grandchild")
+        assert grandchild.stack == ["root", "first", "child", "grandchild"]
+
+    def test_path_changes_when_children_are_replaced(self) -> None:
+        root = create_element("root")
+        other = create_element("other")
+        child = create_element("child", other)
+        assert child.path == ("other", "child")
+
+        root.children = [child]
+
+        assert child.path == ("root", "child")
+
+
+class TestFindNodeAtClass:
+    SOURCE = '<tool><inputs><param name="a"/><param name="b"/></inputs><outputs/></tool>'
+
+    @pytest.mark.parametrize(
+        "offset, expected_name",
+        [
+            (0, "tool"),
+            (8, "inputs"),
+            (15, "param"),
+            (21, "name"),
+            (31, "param"),
+            (58, "outputs"),
+        ],
+    )
+    def test_find_node_at_returns_innermost_node(self, offset: int, expected_name: str) -> None:
+        xml_document = TestUtils.from_source_to_xml_document(self.SOURCE)
+
+        node = xml_document.find_node_at(offset)
+
+        assert node
+        assert node.name == expected_name
+
+    def test_find_node_at_prefers_first_of_contiguous_siblings(self) -> None:
+        xml_document = TestUtils.from_source_to_xml_document(self.SOURCE)
+        assert xml_document.root
+        first, second = xml_document.root.elements[0].elements
+
+        node = xml_document.find_node_at(first.end)
+
+        assert first.end == second.start
+        assert node is first
+
+    def test_find_node_at_in_many_siblings(self) -> None:
+        params = "".join(f'<param name="p{index}"/>' for index in range(500))
+        source = f"<tool><inputs>{params}</inputs></tool>"
+        xml_document = TestUtils.from_source_to_xml_document(source)
+        offset = source.index('"p321"')
+
+        node = xml_document.find_node_at(offset)
+
+        assert isinstance(node, XmlAttributeValue)
+        assert node.owner.value is node
+        assert node.owner.key.name == "name"
+        assert source[node.start : node.end] == '"p321"'
@@ -1,11 +1,24 @@
+from typing import (
+    Any,
+    cast,
+)
+
 import pytest
-from lsprotocol.types import Position
+from anytree import PreOrderIter  # type: ignore
+from lsprotocol.types import (
+    Position,
+    Range,
+    TextDocumentContentChangePartial,
+    TextDocumentContentChangeWholeDocument,
+)
 from pygls.workspace import TextDocument
 
+from ....services.xml.document import XmlDocument
 from ....services.xml.nodes import (
     XmlAttribute,
     XmlCDATASection,
     XmlElement,
+    XmlSyntaxNode,
 )
 from ....services.xml.parser import XmlDocumentParser
 from ....services.xml.types import (
@@ -56,6 +69,44 @@ def assert_attribute_has_value_offsets(attribute: XmlAttribute | None, start: in
     assert attribute.value.end == end
 
 
+def get_node_fields(node: XmlSyntaxNode) -> dict[str, Any]:
+    fields = dict(getattr(node, "__dict__", {}))
+    for cls in type(node).__mro__:
+        for slot in getattr(cls, "__slots__", ()):
+            fields[slot] = getattr(node, slot)
+    return fields
+
+
+def dump_syntax_tree(xml_document: XmlDocument) -> list[tuple]:
+    result = []
+    for node in PreOrderIter(xml_document):
+        offsets = sorted(
+            (key, value) for key, value in get_node_fields(node).items() if isinstance(value, int) and not key.startswith("_")
+        )
+        result.append((type(node).__name__, node.name, node.is_closed, tuple(offsets)))
+    return result
+
+
+def change(start: tuple[int, int], end: tuple[int, int], text: str) -> TextDocumentContentChangePartial:
+    return TextDocumentContentChangePartial(
+        range=Range(start=Position(line=start[0], character=start[1]), end=Position(line=end[0], character=end[1])),
+        text=text,
+    )
+
+
+TEST_INCREMENTAL_SOURCE = """<tool id="test" name="Test">
+    <command><![CDATA[
+echo "hello" > $output
+    ]]></command>
+    <inputs>
+        <param name="input" type="data"/>
+        <!-- A comment -->
+    </inputs>
+    <outputs/>
+</tool>
+"""
+
+
 class TestXmlDocumentParserClass:
     @pytest.mark.parametrize(
         "document, expected",
@@ -167,6 +218,20 @@ class TestXmlDocumentParserClass:
         assert type(xml_document.root.elements[0].children[1]) is XmlCDATASection
         assert type(xml_document.root.elements[3].children[0]) is XmlCDATASection
 
+    @pytest.mark.parametrize(
+        "source",
+        [
+            "<tool><command><![CDATA[ a[i]]]></command><inputs/></tool>",
+            "<tool><command><!----></command><inputs/></tool>",
+            "<tool><command><!-- a ---></command><inputs/></tool>",
+        ],
+    )
+    def test_parse_finds_end_of_section_ending_with_repeated_chars(self, source: str) -> None:
+        xml_document = TestUtils.from_source_to_xml_document(source)
+
+        assert xml_document.root
+        assert [element.name for element in xml_document.root.elements] == ["command", "inputs"]
+
     def test_parse_returns_expected_elements_when_macro(self) -> None:
         test_document = TEST_MACRO_01_DOCUMENT
         parser = XmlDocumentParser()
@@ -311,3 +376,135 @@ class TestXmlDocumentParserClass:
         xml_document = parser.parse(document)
 
         assert xml_document.is_macros_file == expected
+
+
+def get_element_index(xml_document: XmlDocument) -> dict[str, list[int]]:
+    names = {node.name for node in PreOrderIter(xml_document) if type(node) is XmlElement and node.name}
+    return {name: [element.start for element in xml_document.get_elements_with_name(name)] for name in names}
+
+
+class TestXmlDocumentElementIndexClass:
+    @pytest.mark.parametrize(
+        "source",
+        [
+            TEST_INCREMENTAL_SOURCE,
+            "<tool><inputs><param/><param></inputs></tool>",
+            "<tool><inputs></param></inputs><outputs></</tool>",
+            "<tool></other><macros><xml name='a'><param/></xml></macros>",
+        ],
+    )
+    def test_parse_indexes_elements_in_document_order(self, source: str) -> None:
+        xml_document = XmlDocumentParser().parse(TestUtils.to_document(source))
+        expected: dict[str, list[int]] = {}
+        for node in PreOrderIter(xml_document):
+            if type(node) is XmlElement and node.name:
+                expected.setdefault(node.name, []).append(node.start)
+
+        assert get_element_index(xml_document) == expected
+
+    def test_get_recursive_descendants_with_name_returns_only_descendants(self) -> None:
+        source = "<tool><inputs><param/><section><param/></section></inputs><outputs><param/></outputs></tool>"
+        xml_document = XmlDocumentParser().parse(TestUtils.to_document(source))
+        assert xml_document.root
+        inputs = xml_document.root.elements[0]
+
+        params = inputs.get_recursive_descendants_with_name("param")
+
+        assert [param.start for param in params] == [14, 31]
+
+    def test_get_recursive_descendants_with_name_without_document(self) -> None:
+        xml_document = XmlDocumentParser().parse(TestUtils.to_document("<inputs><section><param/></section></inputs>"))
+        inputs = cast(XmlElement, xml_document.root)
+        inputs.parent = None
+
+        params = inputs.get_recursive_descendants_with_name("param")
+
+        assert [param.start for param in params] == [17]
+
+
+class TestXmlDocumentParserIncrementalParsing:
+    @pytest.mark.parametrize(
+        "changes, expected_incremental",
+        [
+            ([change((2, 4), (2, 4), "world ")], True),
+            ([change((2, 0), (2, 4), "")], True),
+            ([change((2, 4), (2, 4), "a\nb\n")], True),
+            ([change((2, 4), (2, 4), "x"), change((2, 5), (2, 5), "y")], True),
+            ([change((6, 8), (6, 8), "<param/>")], True),
+            ([change((6, 12), (6, 21), "Other")], True),
+            ([change((5, 21), (5, 26), "other")], True),
+            ([change((2, 4), (2, 4), "]]>")], True),
+            ([change((6, 8), (6, 8), "</inputs>")], False),
+            ([change((6, 8), (6, 8), "<param>")], False),
+            ([change((0, 10), (0, 14), "other")], False),
+            ([change((4, 4), (4, 4), "<requirements/>")], True),
+            ([change((9, 0), (9, 0), "<!-- end -->")], True),
+            ([change((10, 0), (10, 0), "<!-- end -->")], False),
+            ([change((1, 0), (9, 0), "")], True),
+            ([change((2, 4), (2, 4), "\n"), change((7, 0), (7, 0), "<!-- é😋 -->")], True),
+            ([change((7, 0), (7, 0), "<!-- x -->"), change((2, 0), (2, 4), "")], True),
+            ([change((2, 4), (2, 4), "x"), change((6, 8), (6, 8), "</inputs>")], False),
+        ],
+    )
+    def test_parse_incremental_returns_same_tree_as_full_parse(
+        self, changes: list[TextDocumentContentChangePartial], expected_incremental: bool
+    ) -> None:
+        parser = XmlDocumentParser()
+        document = TestUtils.to_document(TEST_INCREMENTAL_SOURCE, version=0)
+        previous = parser.parse(document)
+        previous_root = previous.root
+        for content_change in changes:
+            document.apply_change(content_change)
+        document.version = 1
+
+        actual = parser.parse_incremental(previous, document, changes)
+
+        expected = parser.parse(TestUtils.to_document(document.source, version=1))
+        assert dump_syntax_tree(actual) == dump_syntax_tree(expected)
+        assert get_element_index(actual) == get_element_index(expected)
+        assert [node.path for node in PreOrderIter(actual)] == [node.path for node in PreOrderIter(expected)]
+        assert actual.source == document.source
+        assert actual.version == 1
+        assert [actual.get_position(offset) for offset in range(len(actual.source) + 1)] == [
+            expected.get_position(offset) for offset in range(len(expected.source) + 1)
+        ]
+        assert (actual.root is previous_root) == expected_incremental
+
+    def test_parse_incremental_with_full_document_change_parses_whole_document(self) -> None:
+        parser = XmlDocumentParser()
+        document = TestUtils.to_document(TEST_INCREMENTAL_SOURCE, version=0)
+        previous = parser.parse(document)
+        changes = [TextDocumentContentChangeWholeDocument(text="<macros></macros>")]
+        document.apply_change(changes[0])
+
+        actual = parser.parse_incremental(previous, document, changes)
+
+        assert actual.is_macros_file
+
+    @pytest.mark.parametrize(
+        "source",
+        [
+            TEST_INCREMENTAL_SOURCE,
+            "<tool><inputs><param name='a' name='b' value=/><param></inputs></tool>",
+            "<?xml version='1.0'?><tool></other><macros><xml name='a'><param/></xml></macros>",
+        ],
+    )
+    def test_copy_returns_same_tree_without_sharing_nodes(self, source: str) -> None:
+        xml_document = XmlDocumentParser().parse(TestUtils.to_document(source, version=1))
+
+        actual = xml_document.copy()
+
+        nodes = list(PreOrderIter(xml_document))
+        copied_nodes = list(PreOrderIter(actual))
+        assert dump_syntax_tree(actual) == dump_syntax_tree(xml_document)
+        assert get_element_index(actual) == get_element_index(xml_document)
+        assert {id(node) for node in nodes}.isdisjoint(id(node) for node in copied_nodes)
+        assert all(node.parent in copied_nodes for node in copied_nodes[1:])
+        for node, copied_node in zip(nodes, copied_nodes):
+            assert node.path == copied_node.path
+            if type(node) is XmlElement:
+                copied_element = cast(XmlElement, copied_node)
+                assert list(copied_element.attributes) == list(node.attributes)
+                assert all(attribute in copied_element.children for attribute in copied_element.attributes.values())
+                assert copied_element.get_attribute_value("name") == node.get_attribute_value("name")
+        assert (actual.source, actual.version) == (xml_document.source, xml_document.version)
@@ -1,17 +1,15 @@
 import pytest
 from lsprotocol.types import (
     Position,
+    PositionEncodingKind,
     Range,
 )
+from pygls.workspace import PositionCodec
 
-from galaxyls.services.xml.utils import (
-    convert_document_offset_to_position,
-    convert_document_offsets_to_range,
-)
-from galaxyls.tests.unit.utils import TestUtils
+from galaxyls.services.xml.utils import LineIndex
 
 
-class TestXmlUtils:
+class TestLineIndexClass:
     @pytest.mark.parametrize(
         "source, offset, expected_position",
         [
@@ -26,12 +24,12 @@ class TestXmlUtils:
             ("<tool>\n<description/>\n<inputs>\n</tool>", 38, Position(line=3, character=7)),
         ],
     )
-    def test_convert_document_offset_to_position_returns_expected_result(
+    def test_offset_to_position_returns_expected_result_for_ascii_text(
         self, source: str, offset: int, expected_position: Position
     ) -> None:
-        document = TestUtils.to_document(source)
+        line_index = LineIndex(source)
 
-        actual_position = convert_document_offset_to_position(document, offset)
+        actual_position = line_index.offset_to_position(offset)
 
         assert actual_position == expected_position
 
@@ -64,11 +62,87 @@ class TestXmlUtils:
             ),
         ],
     )
-    def test_convert_document_offsets_to_range_returns_expected_result(
+    def test_offsets_to_range_returns_expected_result(
         self, source: str, start_offset: int, end_offset: int, expected_range: Range
     ) -> None:
-        document = TestUtils.to_document(source)
+        line_index = LineIndex(source)
 
-        actual_range = convert_document_offsets_to_range(document, start_offset, end_offset)
+        actual_range = line_index.offsets_to_range(start_offset, end_offset)
 
         assert actual_range == expected_range
+
+    @pytest.mark.parametrize(
+        "source, offset, expected_position",
+        [
+            ("<tool></tool>", 0, Position(line=0, character=0)),
+            ("<tool>\n<description/>\n</tool>", 22, Position(line=2, character=0)),
+            ('<tool name="😋"/>', 12, Position(line=0, character=12)),
+            ('<tool name="😋"/>', 14, Position(line=0, character=15)),
+            ('<tool>\n<param label="é😋"/>', 23, Position(line=1, character=17)),
+            ("<tool>\r\n</tool>", 8, Position(line=1, character=0)),
+        ],
+    )
+    def test_offset_to_position_returns_utf16_columns(self, source: str, offset: int, expected_position: Position) -> None:
+        line_index = LineIndex(source)
+
+        actual_position = line_index.offset_to_position(offset)
+
+        assert actual_position == expected_position
+
+    def test_offset_to_position_returns_utf8_columns(self) -> None:
+        line_index = LineIndex('<tool name="é😋"/>', PositionCodec(PositionEncodingKind.Utf8))
+
+        actual_position = line_index.offset_to_position(14)
+
+        assert actual_position == Position(line=0, character=18)
+
+    @pytest.mark.parametrize(
+        "source",
+        [
+            "<tool>\n<description/>\n</tool>\n",
+            '<tool name="😋">\n  <param label="é😋 x"/>\n</tool>',
+        ],
+    )
+    def test_position_to_offset_is_inverse_of_offset_to_position(self, source: str) -> None:
+        line_index = LineIndex(source)
+
+        for offset in range(len(source) + 1):
+            position = line_index.offset_to_position(offset)
+            assert line_index.position_to_offset(position) == offset
+
+    @pytest.mark.parametrize(
+        "position, expected_offset",
+        [
+            (Position(line=0, character=100), 6),
+            (Position(line=1, character=100), 14),
+            (Position(line=5, character=0), 14),
+        ],
+    )
+    def test_position_to_offset_clamps_positions_out_of_bounds(self, position: Position, expected_offset: int) -> None:
+        line_index = LineIndex("<tool>\n</tool>")
+
+        actual_offset = line_index.position_to_offset(position)
+
+        assert actual_offset == expected_offset
+
+    @pytest.mark.parametrize(
+        "source, start, end, text",
+        [
+            ("<tool>\n<inputs/>\n</tool>", 7, 7, "<param/>"),
+            ("<tool>\n<inputs/>\n</tool>", 7, 7, "\n\n"),
+            ("<tool>\n<inputs/>\n</tool>", 6, 17, ""),
+            ("<tool>\n<inputs/>\n</tool>", 0, 24, "<macros>\n</macros>"),
+            ("<tool>\n<inputs/>\n</tool>\n", 25, 25, "<!-- end -->"),
+            ("<tool>\n<inputs/>\n</tool>", 8, 8, 'label="é😋"\n'),
+        ],
+    )
+    def test_apply_change_returns_same_index_as_new_text(self, source: str, start: int, end: int, text: str) -> None:
+        new_source = source[:start] + text + source[end:]
+        expected = LineIndex(new_source)
+
+        actual = LineIndex(source).apply_change(new_source, start, end, text)
+
+        assert actual.line_count == expected.line_count
+        assert [actual.offset_to_position(offset) for offset in range(len(new_source) + 1)] == [
+            expected.offset_to_position(offset) for offset in range(len(new_source) + 1)
+        ]
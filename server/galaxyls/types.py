@@ -103,6 +103,15 @@ class GeneratedExpandedDocument:
     error_message: str | None = attrs.field(default=None, alias="errorMessage")
 
 
+@attrs.define
+class ProfileResult:
+    """Contains the file with the stacks sampled by the profiler of the server."""
+
+    path: str | None = attrs.field(default=None)
+    samples: int = attrs.field(default=0)
+    error_message: str | None = attrs.field(default=None, alias="errorMessage")
+
+
 class ParamReferencesResult:
     """Contains information about the references to a parameter in the document."""
 
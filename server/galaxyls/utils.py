@@ -1,3 +1,5 @@
+import os
+from pathlib import Path
 from typing import (
     NamedTuple,
     TypeVar,
@@ -13,3 +15,15 @@ def convert_to(params: NamedTuple, type: type[T]) -> T:
     converter = cv.get_converter()
     obj = converter.structure(params, type)
     return obj
+
+
+def get_cache_dir() -> Path:
+    """Gets the directory where the server can persist data between sessions.
+
+    It can be set with the `GALAXYLS_CACHE_DIR` environment variable and defaults
+    to `galaxyls` inside the user cache directory."""
+    cache_dir = os.environ.get("GALAXYLS_CACHE_DIR")
+    if cache_dir:
+        return Path(cache_dir)
+    user_cache_dir = os.environ.get("XDG_CACHE_HOME") or os.environ.get("LOCALAPPDATA")
+    return (Path(user_cache_dir) if user_cache_dir else Path.home() / ".cache") / "galaxyls"
@@ -40,6 +40,13 @@ setup(
     license=LICENSE,
     packages=packages,
     include_package_data=True,
+    package_data={"galaxyls.bench": ["synthetic_wrappers/*/*.xml"]},
+    entry_points={
+        "console_scripts": [
+            "galaxyls-bench=galaxyls.bench.__main__:main",
+            "galaxyls-replay=galaxyls.replay.__main__:main",
+        ]
+    },
     install_requires=requirements,
     python_requires=">=3.10",
     classifiers=[